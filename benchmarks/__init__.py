@@ -0,0 +1,3 @@
+"""
+Offline benchmarks, see benchmarks/run.py.
+"""
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Offline Benchmarks
+------------------
+Times the data, screening and alert paths at 10, 1k and 10k symbols
+(or alerts) against synthetic OHLCV bars served by the replay provider,
+so nothing touches the network:
+
+1. get_stock_data + clean_stock_data, per symbol
+2. is_near_high, per symbol
+3. calculate_rsi + calculate_ema, per symbol
+4. create_stock_plot, for a sample of charts
+5. StockService.get_filtered_stocks over the whole watchlist
+6. OracleService.process_symbol_data over a 90 day batch panel
+7. PriceMonitorService.check_alerts with one alert per symbol, with
+   price levels only and with a mix of every rule type (the indicator
+   state is built in setup, like after the first check of a session)
+8. handing a 1y watchlist panel to another process: pickled (the old
+   worker reply), mapped from a shared panel file and checked with
+   is_intact() like the app's cache does, and copied out of the file
+9. AlertService.mark_alerts_triggered and a page of the alert history,
+   with HISTORY_PER_ALERT triggers per alert stored over the past year
+
+plus the cold import time of the app and of each page's route in a fresh
+interpreter. `import app` loading one of HEAVY_MODULES fails the run:
+those are only imported on first use.
+
+Results can be saved as a baseline and later runs compared against it;
+a benchmark slower than the baseline by more than the tolerance is a
+regression and makes the script exit with status 1.
+
+Run it from the repository root:
+    python benchmarks/run.py
+    python benchmarks/run.py --sizes 10 1000 --save
+    python benchmarks/run.py --compare --tolerance 0.25
+    python benchmarks/run.py --data .cache/replay/recording.npz
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import subprocess
+import platform
+import tempfile
+import warnings
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SIZES = (10, 1000, 10000)
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+DEFAULT_TOLERANCE = 0.25  # Allowed slowdown before a result counts as a regression
+NOISE_FLOOR = 0.005  # Seconds; differences below this are timer noise
+PLOT_SAMPLE = 3  # Charts rendered per size, plotting cost doesn't depend on the watchlist
+TRIGGER_EVERY = 100  # One alert in this many is set to trigger
+SYNTHETIC_END = '2025-06-30'  # Fixed so runs on different days compare
+HISTORY_PER_ALERT = 10  # Stored history entries per alert in the history benchmarks
+HISTORY_PAGE = 50  # Rows per history page
+IMPORT_REPEAT = 5  # Fresh interpreters per import benchmark
+# Statements timed in a fresh interpreter; each page adds its route to the app
+IMPORT_TARGETS = {
+    'import_app': "import app",
+    'import_stocks_page': "import app, src.routes.stock_routes",
+    'import_alerts_page': "import app, src.routes.alert_routes",
+    'import_oracle_page': "import app, src.routes.oracle_routes",
+}
+# Dependencies a cold start must not pay for until they are used
+HEAVY_MODULES = ('openai', 'matplotlib', 'yfinance', 'twilio.rest', 'ccxt', 'curl_cffi')
+IMPORT_SCRIPT = """
+import sys, time, json
+start = time.perf_counter()
+exec({statement!r})
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'heavy': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def timed(fn, repeat):
+    """Best wall time of fn() over repeat runs."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class StubTwilio:
+    """Counts notifications instead of sending them."""
+
+    def __init__(self):
+        self.sent = 0
+
+    def send_whatsapp_message(self, symbol, price, message=None):
+        self.sent += 1
+        return True
+
+
+def build_benchmarks(provider, symbols):
+    """
+    Create the benchmarks for one symbol count.
+
+    Returns:
+        list: (name, items, setup, run) tuples; setup() builds per-run state
+        outside the timed section and its result is passed to run()
+    """
+    from src.utils.data_loader import get_stock_data, clean_stock_data
+    from src.utils.indicators import is_near_high, calculate_rsi, calculate_ema
+    from src.utils.plotting import create_stock_plot
+    from src.utils.price_cache import PriceCache
+    from src.services.stock_service import StockService
+    from src.services.alert_service import AlertService, history_root
+    from src.services.alert_history import AlertHistory
+    from src.services.price_monitor_service import PriceMonitorService
+    from src.services.rule_engine import RULE_TYPES, PRICE_RULES
+    from src.services.oracle_service import OracleService
+    from src.utils.shared_panel import SharedPanelWriter, SharedPanelReader
+    from src.utils.data_loader import get_panel_data
+    import matplotlib.pyplot as plt
+    import pickle
+
+    frames = [provider.history(symbol, period='1y') for symbol in symbols]
+    quotes = provider.quotes(symbols)
+
+    def run_data(_):
+        for symbol in symbols:
+            clean_stock_data(get_stock_data(symbol, period='6mo'))
+
+    def run_near_high(_):
+        for frame in frames:
+            is_near_high(frame)
+
+    def run_indicators(_):
+        for frame in frames:
+            calculate_rsi(frame, periods=14)
+            calculate_ema(frame, span=20)
+
+    def run_plot(_):
+        for frame in frames[:PLOT_SAMPLE]:
+            plt.close(create_stock_plot(frame, period='6mo'))
+
+    service = StockService()
+
+    def run_screen(_):
+        service.get_filtered_stocks(symbols, '1mo', 1.0)
+
+    def setup_oracle():
+        oracle = OracleService(provider=provider)
+        oracle.symbol_index.ensure(symbols)
+        return oracle, provider.bulk_history(symbols, period='90d')
+
+    def run_oracle(state):
+        oracle, panel = state
+        for symbol in symbols:
+            oracle.process_symbol_data(symbol, panel)
+
+    def setup_alerts(rule_types=('above',)):
+        alerts_file = os.path.join(tempfile.mkdtemp(), 'alerts.json')
+        active = []
+        for i, symbol in enumerate(symbols):
+            price = quotes[symbol]['price']
+            alert_type = rule_types[i % len(rule_types)]
+            # Most price alerts stay armed, every TRIGGER_EVERY-th one fires
+            threshold = price * (0.5 if i % TRIGGER_EVERY == 0 else 2.0)
+            active.append({
+                "id": f"bench-{i}", "symbol": symbol,
+                "price_threshold": threshold if alert_type in PRICE_RULES else None,
+                "alert_type": alert_type, "created_at": "2025-01-01T00:00:00",
+                "triggered": False, "triggered_at": None
+            })
+        with open(alerts_file, 'w') as f:
+            json.dump({"active": active, "history": []}, f)
+        monitor = PriceMonitorService(AlertService(alerts_file), StubTwilio(), provider=provider,
+                                      price_cache=PriceCache(max_entries=len(symbols) + 1))
+        monitor.rule_engine.refresh_state(symbols)
+        return monitor
+
+    def setup_rules():
+        return setup_alerts(tuple(RULE_TYPES))
+
+    def run_alerts(monitor):
+        monitor.check_alerts()
+
+    def setup_history():
+        alerts_file = os.path.join(tempfile.mkdtemp(), 'alerts.json')
+        # Nothing is past retention, whatever the date of the run
+        history = AlertHistory(history_root(alerts_file), retention=None)
+        end = pd.Timestamp(SYNTHETIC_END)
+        times = pd.date_range(end - pd.Timedelta(days=365), end, periods=len(symbols) * HISTORY_PER_ALERT)
+        history.append([
+            {"id": f"bench-{i}", "symbol": symbols[i % len(symbols)], "alert_type": "above",
+             "price_threshold": 1.0, "value": None, "created_at": "2025-01-01T00:00:00",
+             "triggered": True, "triggered_at": at.isoformat(), "triggered_price": 1.0}
+            for i, at in enumerate(times)
+        ])
+        service = AlertService(alerts_file, history=AlertHistory(history.root, retention=None))
+        return service, service.add_alert(symbols[0], 1.0)
+
+    def run_mark(state):
+        service, alert = state
+        service.mark_alerts_triggered({alert['id']: 1.0})
+
+    def run_history_page(state):
+        service, _ = state
+        # A page from the middle of the whole history, read cold
+        service.get_alert_history(offset=len(symbols) * HISTORY_PER_ALERT // 2, limit=HISTORY_PAGE)
+
+    panel = get_panel_data(symbols, period='1y')
+    writer = SharedPanelWriter(tempfile.mkdtemp())
+    reader = SharedPanelReader(writer.publish('bench', panel)[0])
+
+    def run_pickle(_):
+        pickle.loads(pickle.dumps(panel, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def run_shared(_):
+        # What a cache miss in the app costs; hits only repeat the is_intact() check
+        _, version = reader.read()
+        assert reader.is_intact(version)
+
+    def run_shared_copy(_):
+        reader.read(copy=True)
+
+    count = len(symbols)
+    return [
+        ('get_stock_data+clean', count, None, run_data),
+        ('is_near_high', count, None, run_near_high),
+        ('rsi+ema', count, None, run_indicators),
+        ('create_stock_plot', min(count, PLOT_SAMPLE), None, run_plot),
+        ('get_filtered_stocks', count, None, run_screen),
+        ('oracle_process_symbol_data', count, setup_oracle, run_oracle),
+        ('check_alerts', count, setup_alerts, run_alerts),
+        ('check_rules', count, setup_rules, run_alerts),
+        ('mark_alerts_triggered', 1, setup_history, run_mark),
+        ('alert_history_page', HISTORY_PAGE, setup_history, run_history_page),
+        ('panel_pickle', count, None, run_pickle),
+        ('shared_panel_read', count, None, run_shared),
+        ('shared_panel_copy', count, None, run_shared_copy),
+    ]
+
+
+def run_benchmarks(sizes, data_path=None, only=None):
+    """
+    Run every benchmark at every size.
+
+    Returns:
+        dict: 'name@size' -> {'seconds', 'items', 'per_item_us'}
+    """
+    from src.providers import set_provider
+    from src.providers.replay_provider import ReplayProvider
+    from src.utils.synthetic import generate_panel
+
+    if data_path is None:
+        data_path = os.path.join(tempfile.mkdtemp(), 'synthetic.npz')
+        generate_panel(max(sizes), end=SYNTHETIC_END).save(data_path)
+    base = ReplayProvider(data_path, speed=0)
+    base.set_time(base.panel.dates[-1])
+    set_provider(base)
+
+    results = {}
+    for size in sizes:
+        symbols = list(base.panel.symbols[:size])
+        repeat = 5 if size <= 100 else 3 if size <= 1000 else 1
+        for name, items, setup, run in build_benchmarks(base, symbols):
+            if only and name not in only:
+                continue
+            seconds = float('inf')
+            for _ in range(repeat):
+                state = setup() if setup else None
+                seconds = min(seconds, timed(lambda: run(state), 1))
+            key = f"{name}@{len(symbols)}"
+            results[key] = {
+                'seconds': seconds,
+                'items': items,
+                'per_item_us': seconds / max(items, 1) * 1e6
+            }
+            print(f"{key:<40} {seconds:>10.4f}s {results[key]['per_item_us']:>12.1f} us/item", flush=True)
+    return results
+
+
+def time_import(statement, repeat=IMPORT_REPEAT):
+    """
+    Best cold import time of a statement over fresh interpreters.
+
+    Returns:
+        tuple: (seconds, heavy modules the statement loaded)
+    """
+    script = IMPORT_SCRIPT.format(statement=statement, heavy=HEAVY_MODULES)
+    best, heavy = float('inf'), []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', script], cwd=ROOT, check=True,
+                                capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        best, heavy = min(best, result['seconds']), result['heavy']
+    return best, heavy
+
+
+def run_import_benchmarks(only=None):
+    """
+    Time the cold imports in IMPORT_TARGETS.
+
+    Returns:
+        tuple: (results dict like run_benchmarks, list of (name, heavy modules) violations)
+    """
+    results, violations = {}, []
+    for name, statement in IMPORT_TARGETS.items():
+        if only and name not in only:
+            continue
+        seconds, heavy = time_import(statement)
+        results[name] = {'seconds': seconds, 'items': 1, 'per_item_us': seconds * 1e6}
+        loaded = f"  loads {', '.join(heavy)}" if heavy else ""
+        print(f"{name:<40} {seconds:>10.4f}s{loaded}", flush=True)
+        if name == 'import_app' and heavy:
+            violations.append((name, heavy))
+    return results, violations
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results with a baseline.
+
+    Returns:
+        list: Keys that regressed
+    """
+    regressions = []
+    print(f"\n{'benchmark':<40} {'baseline':>10} {'current':>10} {'change':>8}")
+    for key, result in results.items():
+        before = baseline.get('results', {}).get(key)
+        if before is None:
+            print(f"{key:<40} {'-':>10} {result['seconds']:>9.4f}s {'new':>8}")
+            continue
+        change = result['seconds'] / before['seconds'] - 1 if before['seconds'] else 0.0
+        regressed = change > tolerance and result['seconds'] - before['seconds'] > NOISE_FLOOR
+        marker = "  REGRESSION" if regressed else ""
+        print(f"{key:<40} {before['seconds']:>9.4f}s {result['seconds']:>9.4f}s {change:>+7.1%}{marker}")
+        if regressed:
+            regressions.append(key)
+    return regressions
+
+
+def environment():
+    """Details that make baselines comparable."""
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the data, screening and alert paths")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help="Symbol/alert counts to run at")
+    parser.add_argument('--only', nargs='+', help="Run only these benchmarks")
+    parser.add_argument('--no-imports', action='store_true', help="Skip the cold import benchmarks")
+    parser.add_argument('--data', help="Recorded PricePanel .npz to use instead of synthetic data")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline file")
+    parser.add_argument('--save', action='store_true', help="Save the results as the baseline")
+    parser.add_argument('--compare', action='store_true', help="Compare with the baseline, exit 1 on regressions")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown as a fraction (default: 0.25)")
+    args = parser.parse_args()
+
+    data_path = os.path.abspath(args.data) if args.data else None
+    baseline_path = os.path.abspath(args.baseline)
+
+    # The services write logs, alert files and caches to the working directory
+    workdir = tempfile.mkdtemp(prefix='mbt-bench-')
+    os.chdir(workdir)
+    warnings.simplefilter('ignore')
+
+    status = 0
+    results = {}
+    if not args.no_imports:
+        import_results, violations = run_import_benchmarks(args.only)
+        results.update(import_results)
+        for name, heavy in violations:
+            print(f"❌ {name} imports {', '.join(heavy)} at startup")
+            status = 1
+
+    results.update(run_benchmarks(sorted(args.sizes), data_path, args.only))
+
+    if args.compare:
+        if not os.path.exists(baseline_path):
+            print(f"No baseline at {baseline_path}, run with --save first")
+            status = 1
+        else:
+            with open(baseline_path) as f:
+                regressions = compare(results, json.load(f), args.tolerance)
+            if regressions:
+                print(f"\n❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+                status = 1
+            else:
+                print("\n✅ No regressions")
+
+    if args.save:
+        with open(baseline_path, 'w') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+        print(f"Saved baseline to {baseline_path}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
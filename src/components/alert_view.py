@@ -1,21 +1,33 @@
 import streamlit as st
 import pandas as pd
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
+from src.providers import get_provider
+from src.utils.price_cache import get_price_cache
+from src.utils import profiling
+from src.utils.cache import call_worker, NO_WORKER
+from src.services.rule_engine import (
+    RULE_TYPES, PRICE_RULES, INTRADAY_RULES, INTRADAY_INTERVAL, DEFAULT_VALUES,
+    DEFAULT_HYSTERESIS, DEFAULT_COOLDOWN, DEFAULT_MAX_TRIGGERS, describe_rule, describe_repeat
+)
+
+HISTORY_PAGE_SIZES = (25, 50, 100)  # Rows per page of the alert history
 
 class AlertView:
     """Component for displaying and managing stock price alerts."""
     
-    def __init__(self, alert_service, stock_service):
+    def __init__(self, alert_service, stock_service, price_cache=None):
         """
         Initialize the alert view.
         
         Args:
             alert_service: AlertService instance
             stock_service: StockService instance
+            price_cache: PriceCache for current prices (default: the cache shared with the price monitor)
         """
         self.alert_service = alert_service
         self.stock_service = stock_service
+        self.price_cache = price_cache if price_cache is not None else get_price_cache()
     
     def _format_datetime(self, iso_datetime):
         """Format ISO datetime string to readable format."""
@@ -27,10 +39,63 @@ class AlertView:
         except:
             return iso_datetime
     
+    @profiling.timed('quote')
+    def get_current_price(self, symbol):
+        """Latest price for a symbol from a single quote, shared with the price monitor's cache."""
+        quote = call_worker('quote', symbol)
+        if quote is NO_WORKER:
+            quote = self.price_cache.get_or_fetch(symbol, get_provider().quote)
+        return quote['price'] if quote else None
+    
+    def get_check_interval(self):
+        """Minutes between the price monitor's checks, here or in the worker; None if no monitor runs."""
+        if 'price_monitor' in st.session_state:
+            return st.session_state.price_monitor.check_interval // 60
+        status = call_worker('monitor_status')
+        if status is NO_WORKER or not status.get('running'):
+            return None
+        return status['check_interval'] // 60
+    
+    def set_check_interval(self, minutes):
+        """Change how often the price monitor checks; False if no monitor took the change."""
+        if 'price_monitor' in st.session_state:
+            st.session_state.price_monitor.check_interval = minutes * 60  # Convert to seconds
+            return True
+        return call_worker('set_check_interval', minutes * 60) is True
+    
+    def _render_rule_value(self, alert_type):
+        """Input for the parameter of a rule type; None for rules without one."""
+        if alert_type in PRICE_RULES:
+            return st.number_input(
+                "Price Threshold",
+                min_value=0.0001,
+                format="%.4f",
+                help=f"Alert when price goes {alert_type} this value",
+                key=f"{alert_type}_price_input"
+            )
+        if alert_type in ('pct_up', 'pct_down'):
+            return st.number_input("Move (%)", min_value=0.1, value=DEFAULT_VALUES[alert_type], step=0.5,
+                                   help="Change from the previous session's close")
+        if alert_type in ('rsi_above', 'rsi_below'):
+            return st.number_input("RSI Level", min_value=1.0, max_value=99.0, value=DEFAULT_VALUES[alert_type],
+                                   step=1.0, key=f"{alert_type}_level_input")
+        if alert_type == 'volume_spike':
+            return st.number_input("Volume Multiple", min_value=1.0, value=DEFAULT_VALUES[alert_type], step=0.5,
+                                   help="Session volume so far compared to the 20 day average")
+        if alert_type in INTRADAY_RULES:
+            return st.number_input("Move (%)", min_value=0.1, value=DEFAULT_VALUES[alert_type], step=0.5,
+                                   help=f"Change from the price an hour ago, on {INTRADAY_INTERVAL} bars of the current session",
+                                   key=f"{alert_type}_move_input")
+        st.caption("Uses the same indicators as the stock charts, on daily bars.")
+        return None
+    
     def render_add_alert_form(self):
         """Render the form for adding a new alert."""
         st.subheader("Create New Price Alert")
         
+        # Outside the form, so the inputs below follow the selected condition
+        alert_type = st.selectbox("Condition", options=list(RULE_TYPES), format_func=RULE_TYPES.get)
+        
         with st.form("add_alert_form"):
             # Symbol input
             symbol = st.text_input("Stock Symbol", "").upper()
@@ -39,41 +104,40 @@ class AlertView:
             current_price = None
             if symbol:
                 try:
-                    stock_info = self.stock_service.get_stock_info(symbol, "1d")
-                    if stock_info:
-                        current_price = stock_info['current_price']
+                    current_price = self.get_current_price(symbol)
+                    if current_price is not None:
                         st.info(f"Current price of {symbol}: ${current_price:.4f}")
                 except:
                     st.warning(f"Could not fetch current price for {symbol}")
             
-            # Alert type selection
-            alert_type = st.radio("Alert Type", ["Upper Price Alert", "Lower Price Alert"], horizontal=True)
+            # Threshold, percent, RSI level or volume multiple, depending on the condition
+            value = self._render_rule_value(alert_type)
             
-            # Price threshold input based on selected alert type
-            if alert_type == "Upper Price Alert":
-                price_threshold = st.number_input(
-                    "Upper Price Threshold",
-                    min_value=0.0001,
-                    format="%.4f",
-                    help="Alert when price goes above this value",
-                    key="upper_price_input"
-                )
-            else:  # Lower Price Alert
-                price_threshold = st.number_input(
-                    "Lower Price Threshold",
-                    min_value=0.0001,
-                    format="%.4f",
-                    help="Alert when price goes below this value",
-                    key="lower_price_input"
-                )
+            # Time interval selector, showing the interval the monitor (here or in the worker) uses
+            current_interval = self.get_check_interval()
+            if current_interval is None:
+                check_interval = None
+                st.caption("The price monitor is not running, so alerts are not checked.")
+            else:
+                check_interval = st.number_input("Check Interval (minutes)", 
+                                               min_value=1, 
+                                               max_value=60, 
+                                               value=min(max(current_interval, 1), 60),
+                                               step=1,
+                                               help="How often to check if the alert conditions are met")
             
-            # Time interval selector
-            check_interval = st.number_input("Check Interval (minutes)", 
-                                           min_value=1, 
-                                           max_value=60, 
-                                           value=5,
-                                           step=1,
-                                           help="How often to check if price thresholds have been crossed")
+            # Recurring alerts re-arm once the condition clears by the band
+            with st.expander("Repeat"):
+                recurring = st.checkbox("Keep the alert after it triggers",
+                                        help="Notify again each time the condition is met after clearing")
+                hysteresis = st.number_input("Re-arm Band (%)", min_value=0.0, max_value=50.0,
+                                             value=DEFAULT_HYSTERESIS, step=0.5,
+                                             help="How far the condition must clear, relative to its level, before the alert can trigger again")
+                cooldown = st.number_input("Cooldown (minutes)", min_value=0, max_value=24 * 60,
+                                           value=DEFAULT_COOLDOWN // 60, step=5,
+                                           help="Minimum time between two notifications")
+                max_triggers = st.number_input("Max Notifications per Day", min_value=1, max_value=100,
+                                               value=DEFAULT_MAX_TRIGGERS, step=1)
             
             submitted = st.form_submit_button("Create Alert")
             
@@ -82,26 +146,23 @@ class AlertView:
                     st.error("Please enter a stock symbol")
                     return
                 
-                # Create the alert based on selected type
-                if alert_type == "Upper Price Alert":
-                    alert = self.alert_service.add_alert(
-                        symbol=symbol,
-                        price_threshold=price_threshold,
-                        alert_type="above"
-                    )
-                else:  # Lower Price Alert
-                    alert = self.alert_service.add_alert(
-                        symbol=symbol,
-                        price_threshold=price_threshold,
-                        alert_type="below"
-                    )
+                # Create the alert for the selected condition
+                repeat = dict(recurring=recurring, hysteresis=hysteresis, cooldown=cooldown * 60,
+                              max_triggers=max_triggers)
+                if alert_type in PRICE_RULES:
+                    alert = self.alert_service.add_alert(symbol=symbol, price_threshold=value, alert_type=alert_type,
+                                                         **repeat)
+                else:
+                    alert = self.alert_service.add_alert(symbol=symbol, alert_type=alert_type, value=value, **repeat)
                 
                 # Update the check interval in the price monitor service
-                if 'price_monitor' in st.session_state:
-                    st.session_state.price_monitor.check_interval = check_interval * 60  # Convert to seconds
+                if check_interval is not None and self.set_check_interval(check_interval):
+                    checking = f"Checking every {check_interval} minutes."
+                else:
+                    checking = "The price monitor is not running."
                 
-                alert_type_display = "upper" if alert_type == "Upper Price Alert" else "lower"
-                st.success(f"{alert_type_display.capitalize()} price alert created for {symbol} at ${price_threshold:.4f}. Checking every {check_interval} minutes.")
+                st.success(f"Alert created for {symbol}: {describe_rule(alert)} ({describe_repeat(alert).lower()}). "
+                           f"{checking}")
                 return [alert]
         
         return None
@@ -123,18 +184,24 @@ class AlertView:
         display_df = df.copy()
         if not display_df.empty:
             display_df['created_at'] = display_df['created_at'].apply(self._format_datetime)
-            display_df['alert_type'] = display_df['alert_type'].apply(lambda x: f"Price goes {x} threshold")
+            display_df['condition'] = [describe_rule(a) for a in active_alerts]
+            display_df['repeat'] = [describe_repeat(a) for a in active_alerts]
+            display_df['status'] = [
+                ("Armed" if a.get('armed', True) else "Waiting to clear") + (f", {a['trigger_count']} sent" if a.get('trigger_count') else "")
+                for a in active_alerts
+            ]
             
             # Rename columns for display
             display_df = display_df.rename(columns={
                 'symbol': 'Symbol',
-                'price_threshold': 'Price Threshold',
-                'alert_type': 'Alert Type',
+                'condition': 'Condition',
+                'repeat': 'Repeats',
+                'status': 'Status',
                 'created_at': 'Created At'
             })
             
             # Select columns to display
-            display_df = display_df[['Symbol', 'Price Threshold', 'Alert Type', 'Created At']]
+            display_df = display_df[['Symbol', 'Condition', 'Repeats', 'Status', 'Created At']]
         
         # Display the DataFrame
         st.dataframe(display_df)
@@ -145,7 +212,7 @@ class AlertView:
         
         with col1:
             alert_ids = [a['id'] for a in active_alerts]
-            alert_labels = [f"{a['symbol']} - ${a['price_threshold']} ({a['alert_type']})" for a in active_alerts]
+            alert_labels = [f"{a['symbol']} - {describe_rule(a)}" for a in active_alerts]
             selected_alert = st.selectbox("Select Alert to Delete", 
                                          options=range(len(alert_ids)),
                                          format_func=lambda i: alert_labels[i] if i < len(alert_labels) else "")
@@ -159,15 +226,37 @@ class AlertView:
                         st.rerun()
     
     def render_alert_history(self):
-        """Render the alert history."""
+        """Render the alert history a page at a time, filtered by symbol and trigger date."""
         st.subheader("Alert History")
         
-        alert_history = self.alert_service.get_alert_history()
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            symbol = st.selectbox("Symbol", ["All"] + self.alert_service.get_history_symbols(),
+                                  key="history_symbol")
+        with col2:
+            dates = st.date_input("Triggered between", value=(), key="history_dates")
+        with col3:
+            page_size = st.selectbox("Rows per page", HISTORY_PAGE_SIZES, index=1, key="history_page_size")
         
-        if not alert_history:
-            st.info("No alert history yet.")
+        # An open range (one date picked) filters from that day on; the end date is inclusive
+        dates = list(dates) if isinstance(dates, (list, tuple)) else [dates]
+        filters = {
+            "symbol": None if symbol == "All" else symbol,
+            "start": dates[0] if dates else None,
+            "end": dates[1] + timedelta(days=1) if len(dates) > 1 else None
+        }
+        total = self.alert_service.count_alert_history(**filters)
+        
+        if not total:
+            st.info("No alert history yet." if symbol == "All" and not dates else "No alerts match these filters.")
             return
         
+        pages = -(-total // page_size)
+        # Not keyed, so the page starts over at 1 when the filters change the page count
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1) if pages > 1 else 1
+        offset = (page - 1) * page_size
+        alert_history = self.alert_service.get_alert_history(offset=offset, limit=page_size, **filters)
+        
         # Convert to DataFrame for display
         df = pd.DataFrame(alert_history)
         
@@ -176,28 +265,32 @@ class AlertView:
         if not display_df.empty:
             display_df['created_at'] = display_df['created_at'].apply(self._format_datetime)
             display_df['triggered_at'] = display_df['triggered_at'].apply(self._format_datetime)
-            display_df['alert_type'] = display_df['alert_type'].apply(lambda x: f"Price went {x} threshold")
+            display_df['condition'] = [describe_rule(a) for a in alert_history]
             
             # Rename columns for display
             display_df = display_df.rename(columns={
                 'symbol': 'Symbol',
-                'price_threshold': 'Threshold',
+                'condition': 'Condition',
                 'triggered_price': 'Triggered Price',
-                'alert_type': 'Alert Type',
                 'created_at': 'Created At',
                 'triggered_at': 'Triggered At'
             })
             
             # Select columns to display
-            display_df = display_df[['Symbol', 'Threshold', 'Triggered Price', 'Alert Type', 'Created At', 'Triggered At']]
+            display_df = display_df[['Symbol', 'Condition', 'Triggered Price', 'Created At', 'Triggered At']]
         
         # Display the DataFrame
         st.dataframe(display_df)
+        st.caption(f"Showing {offset + 1}-{offset + len(alert_history)} of {total} triggered alerts, newest first")
     
     def render_price_check_logs(self):
         """Render the price check logs."""
         st.subheader("Price Check Logs")
         
+        stats = self.price_cache.stats()
+        st.caption(f"Price cache: {stats['entries']} symbols, {stats['hits']} hits, "
+                   f"{stats['misses']} misses, {stats['evictions']} evictions")
+        
         log_file = "price_monitor.log"
         
         if not os.path.exists(log_file):
@@ -252,16 +345,20 @@ class AlertView:
         st.title("Stock Price Alerts")
         
         # Add new alert form
-        self.render_add_alert_form()
+        with profiling.stage('form'):
+            self.render_add_alert_form()
         
         # Show active alerts
         st.markdown("---")
-        self.render_active_alerts()
+        with profiling.stage('active'):
+            self.render_active_alerts()
         
         # Show alert history
         st.markdown("---")
-        self.render_alert_history()
+        with profiling.stage('history'):
+            self.render_alert_history()
         
         # Show price check logs
         st.markdown("---")
-        self.render_price_check_logs() 
\ No newline at end of file
+        with profiling.stage('logs'):
+            self.render_price_check_logs() 
\ No newline at end of file
@@ -1,6 +1,9 @@
-import os
 import streamlit as st
-from src.utils.data_loader import load_json_file
+import pandas as pd
+from src.services.universe_service import UniverseService
+from src.utils.data_loader import INTERVAL_OPTIONS, interval_periods
+
+PROFILE_HISTORY = 20  # Reruns kept for the profile panel's history
 
 class Sidebar:
     def __init__(self):
@@ -10,6 +13,7 @@ class Sidebar:
             "6mo": "6 Months",
             "1y": "1 Year"
         }
+        self.universe_service = UniverseService()
         
         # Initialize navigation state if not exists
         if 'current_view' not in st.session_state:
@@ -49,8 +53,8 @@ class Sidebar:
         
         st.sidebar.title("Stock Controls")
             
-        # Load JSON files from root directory
-        stock_files = [f for f in os.listdir('.') if f.endswith('.json')]
+        # Load watchlist JSON files (files with a symbols list) from root directory
+        stock_files = self.universe_service.watchlist_files()
         
         st.sidebar.subheader("Load Stock Symbols from JSON:")
         default_json_index = stock_files.index("ark.json") if "ark.json" in stock_files else 0
@@ -70,12 +74,16 @@ class Sidebar:
         # Load symbols if JSON file selected
         symbols = []
         if selected_json != "None":
-            symbols = load_json_file(selected_json)
+            symbols = list(self.universe_service.get_universe(selected_json))
             st.session_state.symbols = symbols
 
         # Stock controls
         user_symbol = st.sidebar.text_input("Quick Symbol Search", "")
-        chosen_period = st.sidebar.selectbox("Select Data Period", list(self.stock_period_options.keys()))
+        interval = st.sidebar.selectbox("Bar Interval", list(INTERVAL_OPTIONS.keys()),
+                                        format_func=INTERVAL_OPTIONS.get)
+        period_options = self.stock_period_options if interval == '1d' else interval_periods(interval)
+        chosen_period = st.sidebar.selectbox("Select Data Period", list(period_options.keys()),
+                                             format_func=period_options.get)
         
         threshold = None
         if selected_json != "None":
@@ -84,7 +92,27 @@ class Sidebar:
         return {
             'user_symbol': user_symbol,
             'chosen_period': chosen_period,
+            'interval': interval,
             'threshold': threshold,
             'show_ema': True,
-            'symbols': symbols
-        } 
\ No newline at end of file
+            'symbols': symbols,
+            'watchlist_file': selected_json if selected_json != "None" else None
+        } 
+
+    def render_profile_panel(self, profile):
+        """Render the stage timings of a rerun (only when MBT_PROFILE is set)."""
+        if profile is None:
+            return
+        
+        history = st.session_state.setdefault('profile_history', [])
+        history.append({'view': profile.view, 'seconds': round(profile.total, 3)})
+        del history[:-PROFILE_HISTORY]
+        
+        with st.sidebar.expander("⏱️ Profile", expanded=False):
+            st.caption(f"{profile.view} rerun: {profile.total:.3f}s")
+            st.dataframe(pd.DataFrame(profile.rows()), use_container_width=True, hide_index=True)
+            if profile.capture_path:
+                st.caption(f"Profile written to {profile.capture_path}")
+            if len(history) > 1:
+                st.caption("Recent reruns")
+                st.dataframe(pd.DataFrame(history[::-1]), use_container_width=True, hide_index=True)
@@ -1,62 +1,184 @@
 import streamlit as st
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from src.services.stock_service import StockService
 from src.services.gpt_service import GPTService
 from src.utils.plotting import create_stock_plot
+from src.utils.indicators import calculate_rsi, calculate_ema
+from src.utils.market_calendar import calendar_for
+from src.utils import profiling
+from src.utils.cache import call_worker, NO_WORKER
+
+MAX_CHART_REQUESTS = 8  # Charts requested from the worker at once
 
 class StockView:
-    def __init__(self):
-        self.stock_service = StockService()
-        self.gpt_service = GPTService()
+    def __init__(self, stock_service=None, gpt_service=None):
+        self.stock_service = stock_service or StockService()
+        self.gpt_service = gpt_service or GPTService()
+
+    def get_indicator_snapshot(self, data):
+        """Latest values of the indicators drawn in the stock chart."""
+        return {
+            'rsi14': calculate_rsi(data, periods=14).iloc[-1],
+            'ema20': calculate_ema(data, span=20).iloc[-1],
+            'ema50': calculate_ema(data, span=50).iloc[-1],
+            'high20': data['High'].rolling(window=20).max().iloc[-1],
+            'low10': data['Low'].rolling(window=10).min().iloc[-1]
+        }
+
+    def _describe_stock(self, stock_info, data):
+        """Data summary shared by the detailed and summary prompts."""
+        snapshot = self.get_indicator_snapshot(data)
+        return f"""Symbol: {stock_info['symbol']}
+Data as of: {data.index[-1].date().isoformat()}
+Current price: ${stock_info['current_price']:.2f}
+Period high: ${stock_info['period_high']:.2f} ({stock_info['diff_percent']:.2f}% below)
+Period low: ${stock_info['period_low']:.2f}
+Average volume: {stock_info['average_volume']:,.0f}
+RSI(14): {snapshot['rsi14']:.1f}
+EMA20: ${snapshot['ema20']:.2f}
+EMA50: ${snapshot['ema50']:.2f}
+20D high: ${snapshot['high20']:.2f}
+10D low: ${snapshot['low10']:.2f}"""
 
     def prepare_detailed_analysis_data(self, stock_info):
-        symbol = stock_info['symbol']
+        data = stock_info['panel'].frame(stock_info['symbol'])
         
-        prompt = f"""Give me a detailed analysis of {symbol}"""
+        prompt = f"""Give me a detailed analysis of {stock_info['symbol']} based on this data:
+
+{self._describe_stock(stock_info, data)}"""
         return prompt
 
-    def display_stock_metrics(self, stock_info, controls):
-        # Display plot at the bottom
+    def prepare_summary_analysis_data(self, stock_info):
+        data = stock_info['panel'].frame(stock_info['symbol'])
+        
+        prompt = f"""Based on this data:
+
+{self._describe_stock(stock_info, data)}
+
+Answer in exactly one line formatted as: <bullish|bearish|neutral> | <key price level> | <one sentence rationale>"""
+        return prompt, data.index[-1].date().isoformat()
+
+    def display_bulk_analysis(self, filtered_results):
+        """Analyze all filtered stocks concurrently and show a summary table."""
+        symbols = tuple(res['symbol'] for res in filtered_results)
+        if st.button("🤖 Analyze All", key="ai_bulk", type="primary", use_container_width=True):
+            requests = {res['symbol']: self.prepare_summary_analysis_data(res) for res in filtered_results}
+            with st.spinner(f"Analyzing {len(requests)} stocks..."):
+                analyses = self.gpt_service.analyze_many(requests, max_tokens=150)
+            st.session_state.bulk_analysis = {'symbols': symbols, 'analyses': analyses}
+        
+        # Keep showing the table on reruns for the same result set
+        bulk_analysis = st.session_state.get('bulk_analysis')
+        if not bulk_analysis or bulk_analysis['symbols'] != symbols:
+            return
+        
+        rows = []
+        for res in filtered_results:
+            parts = [p.strip() for p in bulk_analysis['analyses'][res['symbol']].strip().split('|', 2)]
+            parts += [""] * (3 - len(parts))
+            rows.append({
+                'Symbol': res['symbol'],
+                'Price': f"${res['current_price']:.2f}",
+                'Diff from High': f"{res['diff_percent']:.2f}%",
+                'Bias': parts[0],
+                'Key Level': parts[1],
+                'Rationale': parts[2]
+            })
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+    def render_analysis(self, analysis):
+        # Split the analysis into sections
+        sections = analysis.split('\n')
+        for section in sections:
+            if section.startswith('###'):
+                st.markdown(f"<h3 style='color: #1f77b4;'>{section.replace('###', '').strip()}</h3>", unsafe_allow_html=True)
+            elif section.startswith('-'):
+                item = section.replace('-', '').strip()
+                if ':' in item:
+                    label, content = item.split(':', 1)
+                    st.markdown(f"""
+                    <div style='margin-bottom: 10px;'>
+                        <span style='font-weight: bold; color: #2c3e50;'>{label}:</span>
+                        <span style='color: #34495e;'>{content}</span>
+                    </div>
+                    """, unsafe_allow_html=True)
+                else:
+                    st.markdown(f"<div style='color: #34495e; margin-left: 20px;'>{item}</div>", unsafe_allow_html=True)
+            elif section.strip():
+                st.markdown(f"<div style='color: #34495e;'>{section}</div>", unsafe_allow_html=True)
+
+    def render_worker_charts(self, filtered_results, controls):
+        """
+        Render the charts of all results in the worker's chart processes at once.
+
+        Returns:
+            dict: symbol -> PNG bytes; empty without a worker, charts that failed are missing
+        """
+        def render(stock_info):
+            symbol = stock_info['symbol']
+            return symbol, call_worker('render_chart', symbol, stock_info['panel'].frame(symbol),
+                                       controls.get('show_ema', False), controls.get('chosen_period', '1mo'),
+                                       controls.get('interval', '1d'))
+
+        if call_worker('ping') is NO_WORKER:
+            return {}
+        with ThreadPoolExecutor(min(MAX_CHART_REQUESTS, len(filtered_results))) as pool:
+            return {symbol: png for symbol, png in pool.map(render, filtered_results) if png is not NO_WORKER}
+
+    def display_stock_metrics(self, stock_info, controls, chart=None):
+        data = stock_info['panel'].frame(stock_info['symbol'])
+        
+        # Display plot at the bottom (a PNG rendered by the worker, if there is one)
+        if chart is not None:
+            st.image(chart, use_container_width=True)
+        else:
+            self._display_plot(stock_info['symbol'], data, controls)
+        self._display_gpt_analysis(stock_info, data)
+
+    def _display_plot(self, symbol, data, controls):
         fig = create_stock_plot(
-            stock_info['data'],
-            show_ema=controls.get('show_ema', False)
+            data,
+            show_ema=controls.get('show_ema', False),
+            period=controls.get('chosen_period', '1mo'),
+            interval=controls.get('interval', '1d'),
+            calendar=calendar_for(symbol)
         )
-        st.pyplot(fig, use_container_width=True)
+        with profiling.stage('pyplot'):
+            st.pyplot(fig, use_container_width=True)
 
+    def _display_gpt_analysis(self, stock_info, data):
         # GPT Analysis button
         get_analysis = st.button("🤖 Ask GPT Analysis", key=f"ai_{stock_info['symbol']}", type="primary", use_container_width=True)
         if get_analysis:
             prompt = self.prepare_detailed_analysis_data(stock_info)
-            analysis = self.gpt_service.get_stock_analysis(prompt)
+            snapshot_date = data.index[-1].date().isoformat() if not data.empty else None
             
-            # Split the analysis into sections
-            sections = analysis.split('\n')
-            for section in sections:
-                if section.startswith('###'):
-                    st.markdown(f"<h3 style='color: #1f77b4;'>{section.replace('###', '').strip()}</h3>", unsafe_allow_html=True)
-                elif section.startswith('-'):
-                    item = section.replace('-', '').strip()
-                    if ':' in item:
-                        label, content = item.split(':', 1)
-                        st.markdown(f"""
-                        <div style='margin-bottom: 10px;'>
-                            <span style='font-weight: bold; color: #2c3e50;'>{label}:</span>
-                            <span style='color: #34495e;'>{content}</span>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    else:
-                        st.markdown(f"<div style='color: #34495e; margin-left: 20px;'>{item}</div>", unsafe_allow_html=True)
-                elif section.strip():
-                    st.markdown(f"<div style='color: #34495e;'>{section}</div>", unsafe_allow_html=True)
+            # Show tokens as they arrive, then replace them with the formatted analysis
+            placeholder = st.empty()
+            analysis = ""
+            for chunk in self.gpt_service.stream_stock_analysis(prompt, snapshot_date):
+                analysis += chunk
+                placeholder.markdown(analysis)
+            placeholder.empty()
+            
+            self.render_analysis(analysis)
 
     def display_stocks(self, filtered_results, controls):
         if not filtered_results:
             return
 
+        with profiling.stage('gpt'):
+            self.display_bulk_analysis(filtered_results)
+
         tab_titles = [res['symbol'] for res in filtered_results]
         tabs = st.tabs(tab_titles)
         
-        for i, stock_info in enumerate(filtered_results):
-            with tabs[i]:
-                symbol = stock_info['symbol']
-                st.subheader(f"{symbol}")
-                self.display_stock_metrics(stock_info, controls) 
\ No newline at end of file
+        with profiling.stage('render'):
+            with profiling.stage('worker_charts'):
+                charts = self.render_worker_charts(filtered_results, controls)
+            for i, stock_info in enumerate(filtered_results):
+                with tabs[i]:
+                    symbol = stock_info['symbol']
+                    st.subheader(f"{symbol}")
+                    self.display_stock_metrics(stock_info, controls, charts.get(symbol)) 
\ No newline at end of file
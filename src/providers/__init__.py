@@ -0,0 +1,142 @@
+"""
+Market data providers.
+
+get_provider() returns the process-wide provider, configured through
+environment variables:
+
+- MBT_MARKET_DATA_PROVIDER: 'yfinance' (default), 'replay' or 'synthetic'
+- MBT_REPLAY_PATH / MBT_REPLAY_SPEED: recording and speed for 'replay'
+- MBT_SYNTHETIC_SYMBOLS / MBT_SYNTHETIC_SEED / MBT_SYNTHETIC_INTERVAL:
+  generated universe for 'synthetic' (load testing the monitor with live
+  ticks); MBT_SYNTHETIC_BAR_STORE serves bars written with
+  `python -m src.utils.synthetic --bar-store` instead
+- MBT_CRYPTO_PROVIDER: set to 'ccxt' to serve crypto pairs (BTC-USD) from
+  an exchange via ccxt (MBT_CCXT_EXCHANGE, default kraken)
+
+Network providers are wrapped in a CoalescingProvider, so concurrent
+requests for the same symbol share one fetch.
+"""
+import os
+import threading
+from src.providers.base import MarketDataProvider, is_crypto_symbol
+from src.providers.coalescing import CoalescingProvider
+from src.utils.price_panel import PricePanel
+
+PROVIDER_ENV = "MBT_MARKET_DATA_PROVIDER"
+CRYPTO_PROVIDER_ENV = "MBT_CRYPTO_PROVIDER"
+REPLAY_PATH_ENV = "MBT_REPLAY_PATH"
+REPLAY_SPEED_ENV = "MBT_REPLAY_SPEED"
+CCXT_EXCHANGE_ENV = "MBT_CCXT_EXCHANGE"
+SYNTHETIC_SYMBOLS_ENV = "MBT_SYNTHETIC_SYMBOLS"
+SYNTHETIC_SEED_ENV = "MBT_SYNTHETIC_SEED"
+SYNTHETIC_INTERVAL_ENV = "MBT_SYNTHETIC_INTERVAL"
+SYNTHETIC_BAR_STORE_ENV = "MBT_SYNTHETIC_BAR_STORE"
+DEFAULT_REPLAY_PATH = os.path.join('.cache', 'replay')
+
+
+class RoutingProvider(MarketDataProvider):
+    """Sends crypto pairs to one provider and everything else to another."""
+
+    name = "routing"
+
+    def __init__(self, default, crypto):
+        self.default = default
+        self.crypto = crypto
+
+    def _route(self, symbol):
+        return self.crypto if is_crypto_symbol(symbol) else self.default
+
+    def history(self, symbol, period='2y', interval='1d'):
+        return self._route(symbol).history(symbol, period, interval)
+
+    def bulk_history(self, symbols, period='2y', interval='1d'):
+        symbols = list(symbols)
+        crypto = [s for s in symbols if self._route(s) is self.crypto]
+        others = [s for s in symbols if self._route(s) is self.default]
+        if not crypto:
+            return self.default.bulk_history(others, period, interval)
+        if not others:
+            return self.crypto.bulk_history(crypto, period, interval)
+        panels = [self.default.bulk_history(others, period, interval),
+                  self.crypto.bulk_history(crypto, period, interval)]
+        frames = {symbol: panel.frame(symbol) for panel in panels for symbol in panel.symbols}
+        return PricePanel.from_frames({s: frames[s] for s in symbols if s in frames})
+
+    def quote(self, symbol):
+        return self._route(symbol).quote(symbol)
+
+    def quotes(self, symbols):
+        symbols = list(symbols)
+        quotes = self.default.quotes([s for s in symbols if self._route(s) is self.default])
+        crypto = [s for s in symbols if self._route(s) is self.crypto]
+        if crypto:
+            quotes.update(self.crypto.quotes(crypto))
+        return quotes
+
+    def fundamentals(self, symbol):
+        return self._route(symbol).fundamentals(symbol)
+
+
+def create_provider(name=None):
+    """
+    Create a provider by name.
+
+    Args:
+        name: 'yfinance', 'ccxt', 'replay' or 'synthetic' (default: MBT_MARKET_DATA_PROVIDER or 'yfinance')
+
+    Returns:
+        MarketDataProvider instance; network providers are wrapped for request
+        coalescing, and for crypto routing if MBT_CRYPTO_PROVIDER=ccxt
+    """
+    name = name or os.environ.get(PROVIDER_ENV, 'yfinance')
+    if name == 'yfinance':
+        from src.providers.yfinance_provider import YFinanceProvider
+        provider = YFinanceProvider()
+    elif name == 'ccxt':
+        from src.providers.ccxt_provider import CCXTProvider
+        return CoalescingProvider(CCXTProvider(os.environ.get(CCXT_EXCHANGE_ENV, 'kraken')))
+    elif name == 'replay':
+        from src.providers.replay_provider import ReplayProvider, REPLAY_SPEED
+        return ReplayProvider(
+            os.environ.get(REPLAY_PATH_ENV, DEFAULT_REPLAY_PATH),
+            speed=float(os.environ.get(REPLAY_SPEED_ENV, REPLAY_SPEED))
+        )
+    elif name == 'synthetic':
+        from src.providers.synthetic_provider import SyntheticProvider, SYNTHETIC_SYMBOLS
+        seed = int(os.environ.get(SYNTHETIC_SEED_ENV, 0))
+        interval = os.environ.get(SYNTHETIC_INTERVAL_ENV, '1d')
+        if os.environ.get(SYNTHETIC_BAR_STORE_ENV):
+            return SyntheticProvider.from_bar_store(os.environ[SYNTHETIC_BAR_STORE_ENV], interval, seed=seed)
+        return SyntheticProvider(
+            symbols=int(os.environ.get(SYNTHETIC_SYMBOLS_ENV, SYNTHETIC_SYMBOLS)),
+            seed=seed,
+            interval=interval
+        )
+    else:
+        raise ValueError(f"Unknown market data provider: {name}")
+
+    if os.environ.get(CRYPTO_PROVIDER_ENV) == 'ccxt':
+        from src.providers.ccxt_provider import CCXTProvider
+        provider = RoutingProvider(provider, CCXTProvider(os.environ.get(CCXT_EXCHANGE_ENV, 'kraken')))
+    return CoalescingProvider(provider)
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    """Get the process-wide market data provider."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = create_provider()
+    return _provider
+
+
+def set_provider(provider):
+    """Replace the process-wide provider (e.g. with a ReplayProvider for load tests)."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
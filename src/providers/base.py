@@ -0,0 +1,138 @@
+import re
+import numpy as np
+import pandas as pd
+from src.utils.price_panel import PricePanel
+
+# Length of the period strings used by yfinance ('90d', '2y', ...)
+PERIOD_UNITS = {
+    'd': pd.Timedelta(days=1),
+    'wk': pd.Timedelta(weeks=1),
+    'mo': pd.Timedelta(days=31),
+    'y': pd.Timedelta(days=366),
+}
+
+
+def period_to_timedelta(period):
+    """
+    Convert a yfinance style period ('1d', '90d', '3mo', '2y') to a Timedelta.
+
+    Args:
+        period (str): Period string
+
+    Returns:
+        pd.Timedelta: Length of the period
+    """
+    match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    return int(match.group(1)) * PERIOD_UNITS[match.group(2)]
+
+
+def is_crypto_symbol(symbol):
+    """Whether a symbol looks like a Yahoo crypto pair (BTC-USD, DOGE-USDT)."""
+    return symbol.upper().endswith(('-USD', '-USDT', '-EUR', '-BTC'))
+
+
+def panel_quotes(panel):
+    """
+    Build quotes from the last bar of each symbol in a panel.
+
+    Args:
+        panel (PricePanel): Recent bars
+
+    Returns:
+        dict: symbol -> quote dict, for symbols with at least one close
+    """
+    quotes = {}
+    for symbol in panel.symbols:
+        closes = panel.series(symbol, 'Close')
+        valid = np.flatnonzero(~np.isnan(closes))
+        if not len(valid):
+            continue
+        last = valid[-1]
+        quotes[symbol] = {
+            'price': float(closes[last]),
+            'timestamp': panel.dates[last],
+            'day_high': float(panel.series(symbol, 'High')[last]),
+            'day_low': float(panel.series(symbol, 'Low')[last]),
+            'volume': float(panel.series(symbol, 'Volume')[last])
+        }
+    return quotes
+
+
+class MarketDataProvider:
+    """
+    Interface for market data sources.
+
+    Subclasses implement history(); the other methods have generic
+    implementations built on it that providers override when the source
+    offers something cheaper.
+    """
+
+    name = "base"
+    cacheable = True  # Whether fetched bars may be kept in the on-disk bar store
+
+    def history(self, symbol, period='2y', interval='1d'):
+        """
+        Get OHLCV bars for one symbol.
+
+        Args:
+            symbol (str): Symbol
+            period (str): How far back to go ('1d', '90d', '2y', ...)
+            interval (str): Bar size
+
+        Returns:
+            pd.DataFrame: Open/High/Low/Close/Volume bars, empty if unavailable
+        """
+        raise NotImplementedError
+
+    def bulk_history(self, symbols, period='2y', interval='1d'):
+        """
+        Get OHLCV bars for many symbols.
+
+        Returns:
+            PricePanel holding the symbols that returned data
+        """
+        return PricePanel.from_frames({symbol: self.history(symbol, period, interval) for symbol in symbols})
+
+    def quote(self, symbol):
+        """
+        Get the latest price of a symbol.
+
+        Returns:
+            dict with 'price', 'timestamp', 'day_high', 'day_low' and 'volume'
+            (traded so far in the session), or None
+        """
+        data = self.history(symbol, period='1d')
+        if data.empty:
+            return None
+        return {
+            'price': float(data['Close'].iloc[-1]),
+            'timestamp': data.index[-1],
+            'day_high': float(data['High'].iloc[-1]),
+            'day_low': float(data['Low'].iloc[-1]),
+            'volume': float(data['Volume'].iloc[-1])
+        }
+
+    def quotes(self, symbols):
+        """
+        Get the latest prices of many symbols, in as few requests as the source allows.
+
+        Returns:
+            dict: symbol -> quote dict (see quote()), without symbols that had no price
+        """
+        quotes = {}
+        for symbol in symbols:
+            quote = self.quote(symbol)
+            if quote is not None:
+                quotes[symbol] = quote
+        return quotes
+
+    def fundamentals(self, symbol):
+        """
+        Get fundamental data of a symbol.
+
+        Returns:
+            dict (e.g. 'market_cap'), empty if the source has none
+        """
+        return {}
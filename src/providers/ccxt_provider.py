@@ -0,0 +1,91 @@
+import pandas as pd
+import ccxt
+from src.providers.base import MarketDataProvider, period_to_timedelta
+from src.services.http_transport import get_transport
+
+DEFAULT_EXCHANGE = "kraken"
+MAX_CANDLES_PER_REQUEST = 720  # Kraken returns at most 720 candles per call
+# yfinance interval names mapped to ccxt timeframes
+TIMEFRAMES = {'1m': '1m', '5m': '5m', '15m': '15m', '1h': '1h', '1d': '1d', '1wk': '1w'}
+
+
+def to_market_symbol(symbol):
+    """Convert a Yahoo crypto symbol ('BTC-USD') to a ccxt market ('BTC/USD')."""
+    return symbol.replace('-', '/', 1)
+
+
+class CCXTProvider(MarketDataProvider):
+    """Crypto market data from an exchange via ccxt; takes Yahoo style symbols like BTC-USD."""
+
+    name = "ccxt"
+
+    def __init__(self, exchange_id=DEFAULT_EXCHANGE, transport=None):
+        """
+        Initialize the provider.
+
+        Args:
+            exchange_id: ccxt exchange id (default: kraken)
+            transport: HttpTransport whose pooled session the exchange uses (default: shared transport)
+        """
+        self.transport = transport or get_transport()
+        self.exchange = getattr(ccxt, exchange_id)({
+            'enableRateLimit': True,
+            'timeout': int(self.transport.timeout[1] * 1000),
+            'session': self.transport.session
+        })
+        self.host = exchange_id
+
+    def history(self, symbol, period='2y', interval='1d'):
+        timeframe = TIMEFRAMES.get(interval)
+        if timeframe is None:
+            raise ValueError(f"Unsupported interval for ccxt: {interval}")
+
+        market = to_market_symbol(symbol)
+        since = pd.Timestamp.now(tz='UTC') - period_to_timedelta(period)
+        since_ms = int(since.timestamp() * 1000)
+
+        # Page through the candles, the exchange caps each response
+        candles = []
+        with self.transport.track(self.host):
+            while True:
+                batch = self.exchange.fetch_ohlcv(market, timeframe, since=since_ms, limit=MAX_CANDLES_PER_REQUEST)
+                candles.extend(batch)
+                if len(batch) < MAX_CANDLES_PER_REQUEST:
+                    break
+                since_ms = batch[-1][0] + 1
+
+        if not candles:
+            return pd.DataFrame()
+        data = pd.DataFrame(candles, columns=['Timestamp', 'Open', 'High', 'Low', 'Close', 'Volume'])
+        data.index = pd.to_datetime(data.pop('Timestamp'), unit='ms', utc=True)
+        return data[~data.index.duplicated(keep='last')]
+
+    @staticmethod
+    def _ticker_quote(ticker):
+        if not ticker or ticker.get('last') is None:
+            return None
+        return {
+            'price': float(ticker['last']),
+            'timestamp': pd.to_datetime(ticker['timestamp'], unit='ms', utc=True),
+            'day_high': ticker.get('high'),
+            'day_low': ticker.get('low'),
+            'volume': ticker.get('baseVolume')
+        }
+
+    def quote(self, symbol):
+        with self.transport.track(self.host):
+            ticker = self.exchange.fetch_ticker(to_market_symbol(symbol))
+        return self._ticker_quote(ticker)
+
+    def quotes(self, symbols):
+        symbols = list(symbols)
+        if len(symbols) < 2 or not self.exchange.has.get('fetchTickers'):
+            return super().quotes(symbols)
+        with self.transport.track(self.host):
+            tickers = self.exchange.fetch_tickers([to_market_symbol(s) for s in symbols])
+        quotes = {}
+        for symbol in symbols:
+            quote = self._ticker_quote(tickers.get(to_market_symbol(symbol)))
+            if quote is not None:
+                quotes[symbol] = quote
+        return quotes
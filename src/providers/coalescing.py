@@ -0,0 +1,64 @@
+from src.providers.base import MarketDataProvider
+from src.utils.single_flight import SingleFlight
+from src.utils.metrics import PROVIDER_FETCH_SECONDS, PROVIDER_FETCH_ERRORS
+
+HISTORY_TTL = 60.0  # Seconds a history result is shared between callers
+QUOTE_TTL = 15.0  # Seconds a quote is shared between callers
+FUNDAMENTALS_TTL = 60 * 60.0  # Seconds fundamentals are shared between callers
+
+
+class CoalescingProvider(MarketDataProvider):
+    """
+    Wraps a provider so concurrent requests for the same data share one fetch.
+
+    Requests are keyed by (symbol(s), period, interval); callers arriving
+    while a fetch is in flight, or within the TTL after it, get its result.
+    Only the fetches actually made are timed in the provider metrics.
+    """
+
+    def __init__(self, provider, history_ttl=HISTORY_TTL, quote_ttl=QUOTE_TTL,
+                 fundamentals_ttl=FUNDAMENTALS_TTL):
+        """
+        Initialize the wrapper.
+
+        Args:
+            provider: MarketDataProvider to deduplicate requests for
+            history_ttl: Seconds history results are shared
+            quote_ttl: Seconds quotes are shared
+            fundamentals_ttl: Seconds fundamentals are shared
+        """
+        self.provider = provider
+        self.name = provider.name
+        self.cacheable = provider.cacheable
+        self.history_flights = SingleFlight(ttl=history_ttl)
+        self.quote_flights = SingleFlight(ttl=quote_ttl)
+        self.fundamentals_flights = SingleFlight(ttl=fundamentals_ttl)
+
+    def _fetch(self, method, *args):
+        """Call the wrapped provider, recording latency and errors."""
+        try:
+            with PROVIDER_FETCH_SECONDS.time(provider=self.name, method=method):
+                return getattr(self.provider, method)(*args)
+        except Exception:
+            PROVIDER_FETCH_ERRORS.inc(provider=self.name, method=method)
+            raise
+
+    def history(self, symbol, period='2y', interval='1d'):
+        key = ('history', symbol, period, interval)
+        return self.history_flights.do(key, self._fetch, 'history', symbol, period, interval)
+
+    def bulk_history(self, symbols, period='2y', interval='1d'):
+        symbols = list(symbols)
+        key = ('bulk', tuple(symbols), period, interval)
+        return self.history_flights.do(key, self._fetch, 'bulk_history', symbols, period, interval)
+
+    def quote(self, symbol):
+        return self.quote_flights.do(('quote', symbol), self._fetch, 'quote', symbol)
+
+    def quotes(self, symbols):
+        symbols = list(symbols)
+        key = ('quotes', tuple(symbols))
+        return self.quote_flights.do(key, self._fetch, 'quotes', symbols)
+
+    def fundamentals(self, symbol):
+        return self.fundamentals_flights.do(('fundamentals', symbol), self._fetch, 'fundamentals', symbol)
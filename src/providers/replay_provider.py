@@ -0,0 +1,127 @@
+import os
+import glob
+import time
+import threading
+import pandas as pd
+from src.providers.base import MarketDataProvider, period_to_timedelta, panel_quotes
+from src.utils.price_panel import PricePanel
+
+REPLAY_SPEED = 24 * 60 * 60  # Replay seconds per wall-clock second (one day of bars per second)
+WARMUP_BARS = 252  # Bars visible when the replay starts, so indicators have history
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Serves recorded bars from PricePanel files on a replay clock.
+
+    The clock starts WARMUP_BARS into the recording and runs `speed` times
+    faster than wall time; only bars up to the replay time are visible, so
+    quotes move as the replay advances. With speed=0 the clock only moves
+    through advance()/set_time(), which makes runs fully deterministic.
+    """
+
+    name = "replay"
+    cacheable = False  # Bars depend on the replay clock, never persist them
+
+    def __init__(self, path, speed=REPLAY_SPEED, start=None, loop=False):
+        """
+        Initialize the provider.
+
+        Args:
+            path: A PricePanel .npz file or a directory of them (see record())
+            speed: Replay seconds per wall-clock second
+            start: Replay start time (default: WARMUP_BARS into the recording)
+            loop: Restart from the beginning after the last bar
+        """
+        files = sorted(glob.glob(os.path.join(path, '*.npz'))) if os.path.isdir(path) else [path]
+        panels = [PricePanel.load(f) for f in files]
+        if not panels:
+            raise FileNotFoundError(f"No recorded panels found in {path}")
+        self.panel = panels[0] if len(panels) == 1 else PricePanel.from_frames({
+            symbol: panel.frame(symbol) for panel in panels for symbol in panel.symbols
+        })
+
+        dates = self.panel.dates
+        if start is None:
+            start = dates[min(WARMUP_BARS, len(dates) - 1)]
+        self.speed = speed
+        self.loop = loop
+        self._lock = threading.Lock()
+        self._start = self._align(start)
+        self._wall_start = time.monotonic()
+        self._offset = pd.Timedelta(0)
+
+    def _align(self, timestamp):
+        """Give a timestamp the timezone of the recorded dates."""
+        timestamp = pd.Timestamp(timestamp)
+        tz = self.panel.dates.tz
+        if tz is None:
+            return timestamp.tz_localize(None) if timestamp.tz is not None else timestamp
+        return timestamp.tz_localize(tz) if timestamp.tz is None else timestamp.tz_convert(tz)
+
+    def now(self):
+        """Current replay time."""
+        with self._lock:
+            elapsed = pd.Timedelta(seconds=(time.monotonic() - self._wall_start) * self.speed)
+            current = self._start + self._offset + elapsed
+        last = self.panel.dates[-1]
+        if current <= last:
+            return current
+        span = last - self._start
+        if not self.loop or span <= pd.Timedelta(0):
+            return last
+        return self._start + (current - self._start) % span
+
+    def advance(self, delta):
+        """Move the replay clock forward by a Timedelta (or seconds)."""
+        with self._lock:
+            self._offset += pd.Timedelta(seconds=delta) if isinstance(delta, (int, float)) else delta
+
+    def set_time(self, timestamp):
+        """Jump the replay clock to a given time."""
+        with self._lock:
+            self._start = self._align(timestamp)
+            self._wall_start = time.monotonic()
+            self._offset = pd.Timedelta(0)
+
+    def _visible(self, period):
+        """Panel view of the bars inside the period ending at the replay time."""
+        end = self.now()
+        return self.panel.between(end - period_to_timedelta(period), end)
+
+    def history(self, symbol, period='2y', interval='1d'):
+        if symbol not in self.panel:
+            return pd.DataFrame()
+        return self._visible(period).frame(symbol)
+
+    def bulk_history(self, symbols, period='2y', interval='1d'):
+        return self._visible(period).select(symbols)
+
+    def quote(self, symbol):
+        return self.quotes([symbol]).get(symbol)
+
+    def quotes(self, symbols):
+        symbols = [s for s in symbols if s in self.panel]
+        if not symbols:
+            return {}
+        return panel_quotes(self.panel.between(None, self.now()).select(symbols))
+
+    @staticmethod
+    def record(provider, symbols, path, period='2y', interval='1d'):
+        """
+        Record bars from another provider into a replay file.
+
+        Args:
+            provider: Source MarketDataProvider
+            symbols: Symbols to record
+            path: .npz file to write
+            period: History to record
+            interval: Bar size
+
+        Returns:
+            PricePanel that was written
+        """
+        panel = provider.bulk_history(symbols, period=period, interval=interval)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        panel.save(path)
+        return panel
@@ -0,0 +1,113 @@
+import os
+import glob
+import numpy as np
+import pandas as pd
+from src.providers.base import MarketDataProvider, period_to_timedelta
+from src.utils.synthetic import generate_panel, TickStream, DEFAULT_SESSIONS
+from src.utils.bar_store import BarStore, INTERVAL_SECONDS
+from src.utils.price_panel import PricePanel
+from src.utils.resample import resample_bars, INTERVAL_RULES, CALENDAR_RULES
+
+SYNTHETIC_SYMBOLS = 500  # Symbols generated when no panel is given
+TICK_INTERVAL = 1.0  # Wall-clock seconds per quote tick
+INTRADAY_SESSIONS = 22  # Sessions generated for intraday intervals (Yahoo serves about a month of 5m bars)
+
+
+class SyntheticProvider(MarketDataProvider):
+    """
+    Generated market data for load tests: bars from a synthetic panel and
+    live quotes from a tick stream continuing its last closes.
+
+    Symbols are AAAA, AAAB, ... unless a panel with other names is given.
+    Bars are served at the panel's interval, or resampled to a coarser one
+    (e.g. 5m bars as 1h, daily bars as weekly); other intervals raise
+    ValueError.
+    """
+
+    name = "synthetic"
+    cacheable = False  # Regenerated per process, never persist it
+
+    def __init__(self, panel=None, symbols=SYNTHETIC_SYMBOLS, tick_interval=TICK_INTERVAL, seed=0, interval='1d',
+                 sessions=None):
+        """
+        Initialize the provider.
+
+        Args:
+            panel: PricePanel to serve (default: generated with generate_panel)
+            symbols: Number of symbols to generate when no panel is given
+            tick_interval: Wall-clock seconds per quote tick
+            seed: Random seed
+            interval: Bar interval of the panel
+            sessions: Sessions to generate (default: DEFAULT_SESSIONS daily, INTRADAY_SESSIONS intraday)
+        """
+        self.interval = interval
+        if panel is None:
+            if sessions is None:
+                sessions = DEFAULT_SESSIONS if interval == '1d' else INTRADAY_SESSIONS
+            panel = generate_panel(symbols, sessions=sessions, seed=seed, interval=interval)
+        self.panel = panel
+        closes = self.panel.last_valid('Close')
+        volumes = np.nanmean(self.panel.field('Volume'), axis=1) if len(self.panel.dates) else None
+        self.ticks = TickStream(self.panel.symbols, closes, tick_interval=tick_interval, seed=seed + 1, volumes=volumes)
+        rng = np.random.default_rng(seed + 2)
+        # Shares outstanding, so market caps span small to mega caps
+        self.shares = dict(zip(self.panel.symbols, rng.lognormal(np.log(1e8), 1.5, size=len(self.panel.symbols))))
+
+    @classmethod
+    def from_bar_store(cls, root, interval='1d', **kwargs):
+        """
+        Serve the bars written by src.utils.synthetic.write_bar_store (or --bar-store).
+
+        Args:
+            root: Store root the bars were written to
+            interval: Interval partition to load
+            **kwargs: Other SyntheticProvider arguments (tick_interval, seed)
+        """
+        store = BarStore(root)
+        symbols = sorted(os.path.splitext(os.path.basename(path))[0]
+                         for path in glob.glob(os.path.join(root, interval, '*.npz')))
+        if not symbols:
+            raise ValueError(f"No {interval} bars stored in {root}")
+        return cls(PricePanel.from_frames({symbol: store.load(symbol, interval) for symbol in symbols}),
+                   interval=interval, **kwargs)
+
+    def _check_interval(self, interval):
+        if interval == self.interval:
+            return
+        if self.interval == '1d':
+            coarser = interval in CALENDAR_RULES
+        else:
+            coarser = (interval in INTERVAL_RULES and INTERVAL_SECONDS[interval] > INTERVAL_SECONDS[self.interval]
+                       and INTERVAL_SECONDS[interval] % INTERVAL_SECONDS[self.interval] == 0)
+        if not coarser:
+            raise ValueError(f"Synthetic bars are {self.interval}, {interval} bars can't be built from them")
+
+    def _recent(self, period):
+        end = self.panel.dates[-1] if len(self.panel.dates) else pd.Timestamp.now()
+        return self.panel.between(end - period_to_timedelta(period), None)
+
+    def history(self, symbol, period='2y', interval='1d'):
+        self._check_interval(interval)
+        if symbol not in self.panel:
+            return pd.DataFrame()
+        data = self._recent(period).frame(symbol)
+        return data if interval == self.interval else resample_bars(data, interval)
+
+    def bulk_history(self, symbols, period='2y', interval='1d'):
+        self._check_interval(interval)
+        panel = self._recent(period).select([s for s in symbols if s in self.panel])
+        if interval == self.interval:
+            return panel
+        return PricePanel.from_frames({symbol: resample_bars(panel.frame(symbol), interval) for symbol in panel.symbols})
+
+    def quote(self, symbol):
+        return self.quotes([symbol]).get(symbol)
+
+    def quotes(self, symbols):
+        return self.ticks.quotes(symbols)
+
+    def fundamentals(self, symbol):
+        quote = self.quote(symbol)
+        if quote is None:
+            return {}
+        return {'market_cap': quote['price'] * self.shares[symbol]}
@@ -0,0 +1,58 @@
+import pandas as pd
+import yfinance as yf
+from src.providers.base import MarketDataProvider, panel_quotes
+from src.services.http_transport import get_transport, YAHOO_HOST
+from src.utils.price_panel import PricePanel
+
+
+QUOTE_PERIOD = "5d"  # Daily bars fetched for a quote, so weekends and holidays still have a last close
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Market data from Yahoo Finance via yfinance."""
+
+    name = "yfinance"
+
+    def __init__(self, transport=None):
+        """
+        Initialize the provider.
+
+        Args:
+            transport: HttpTransport for the Yahoo session and host limits (default: shared transport)
+        """
+        self.transport = transport or get_transport()
+
+    def _ticker(self, symbol):
+        return yf.Ticker(symbol, session=self.transport.yfinance_session())
+
+    def history(self, symbol, period='2y', interval='1d'):
+        with self.transport.track(YAHOO_HOST):
+            data = self._ticker(symbol).history(period=period, interval=interval)
+        return data if data is not None else pd.DataFrame()
+
+    def bulk_history(self, symbols, period='2y', interval='1d'):
+        symbols = list(symbols)
+        if not symbols:
+            return PricePanel.empty()
+        with self.transport.track(YAHOO_HOST):
+            data = yf.download(symbols, period=period, interval=interval, group_by='ticker',
+                               auto_adjust=True, progress=False, threads=True,
+                               session=self.transport.yfinance_session())
+        return PricePanel.from_download(data, symbols)
+
+    def quote(self, symbol):
+        return self.quotes([symbol]).get(symbol)
+
+    def quotes(self, symbols):
+        # A few daily bars for all symbols in one chart request; the last bar
+        # carries the latest price and the day range
+        return panel_quotes(self.bulk_history(symbols, period=QUOTE_PERIOD, interval='1d'))
+
+    def fundamentals(self, symbol):
+        with self.transport.track(YAHOO_HOST):
+            info = self._ticker(symbol).info
+        return {
+            'market_cap': info.get('marketCap', 0),
+            'average_volume': info.get('averageVolume'),
+            'exchange': info.get('exchange')
+        }
@@ -2,17 +2,22 @@ import streamlit as st
 from src.components.sidebar import Sidebar
 from src.components.alert_view import AlertView
 from src.services.alert_service import AlertService
-from src.services.stock_service import StockService
+from src.utils import cache, profiling
 
 def handle_alert_view():
     """Handle the alert view route."""
     sidebar = Sidebar()
-    alert_service = AlertService()
-    stock_service = StockService()
-    alert_view = AlertView(alert_service, stock_service)
     
-    # Get sidebar controls
-    sidebar.render_stock_controls()
+    with profiling.rerun('alerts') as profile:
+        alert_service = AlertService(history=cache.get_alert_history())
+        stock_service = cache.get_stock_service()
+        alert_view = AlertView(alert_service, stock_service)
+        
+        # Get sidebar controls
+        with profiling.stage('controls'):
+            sidebar.render_stock_controls()
+        
+        # Render the alert view
+        alert_view.render()
     
-    # Render the alert view
-    alert_view.render() 
\ No newline at end of file
+    sidebar.render_profile_panel(profile)
@@ -1,14 +1,20 @@
 import streamlit as st
 from src.components.sidebar import Sidebar
 from src.components.oracle_view import OracleView
+from src.utils import profiling
 
 def handle_oracle_view():
     """Handle the oracle view route."""
     sidebar = Sidebar()
-    oracle_view = OracleView()
     
-    # Get sidebar controls
-    sidebar.render_stock_controls()
+    with profiling.rerun('oracle') as profile:
+        oracle_view = OracleView()
+        
+        # Get sidebar controls
+        with profiling.stage('controls'):
+            sidebar.render_stock_controls()
+        
+        # Render the oracle view
+        oracle_view.render()
     
-    # Render the oracle view
-    oracle_view.render() 
\ No newline at end of file
+    sidebar.render_profile_panel(profile)
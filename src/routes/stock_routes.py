@@ -1,37 +1,47 @@
 import streamlit as st
 from src.components.sidebar import Sidebar
 from src.components.stock_view import StockView
-from src.services.stock_service import StockService
+from src.utils import cache, profiling
 
 def handle_stock_view():
     """Handle the stock view route."""
     sidebar = Sidebar()
-    stock_view = StockView()
-    stock_service = StockService()
     
-    # Get sidebar controls
-    controls = sidebar.render_stock_controls()
-    
-    # Process stock data
-    filtered_results = []
-    if controls['user_symbol'].strip():
-        symbol = controls['user_symbol'].strip().upper()
-        stock_info = stock_service.get_stock_info(
-            symbol,
-            controls['chosen_period']
-        )
-        if stock_info:
-            filtered_results = [stock_info]
-        else:
-            st.warning(f"No data found for symbol: {symbol}")
-    elif controls['symbols']:
-        filtered_results = stock_service.get_filtered_stocks(
-            controls['symbols'],
-            controls['chosen_period'],
-            controls['threshold']
-        )
-        if not filtered_results:
-            st.info(f"No stocks found within {controls['threshold']}% of their period high in the selected timeframe.")
+    with profiling.rerun('stocks') as profile:
+        stock_view = StockView(cache.get_stock_service(), cache.get_gpt_service())
+        
+        # Get sidebar controls
+        with profiling.stage('controls'):
+            controls = sidebar.render_stock_controls()
         
-    # Display results
-    stock_view.display_stocks(filtered_results, controls) 
\ No newline at end of file
+        # Process stock data
+        filtered_results = []
+        if controls['user_symbol'].strip():
+            symbol = controls['user_symbol'].strip().upper()
+            with profiling.stage('data'):
+                stock_info = cache.get_stock_info(
+                    symbol,
+                    controls['chosen_period'],
+                    controls['interval']
+                )
+            if stock_info:
+                filtered_results = [stock_info]
+            else:
+                st.warning(f"No data found for symbol: {symbol}")
+        elif controls['symbols']:
+            # Cached per (watchlist, period, threshold, data version)
+            with profiling.stage('data'):
+                filtered_results = cache.get_filtered_stocks(
+                    controls['watchlist_file'],
+                    controls['symbols'],
+                    controls['chosen_period'],
+                    controls['threshold'],
+                    controls['interval']
+                )
+            if not filtered_results:
+                st.info(f"No stocks found within {controls['threshold']}% of their period high in the selected timeframe.")
+            
+        # Display results
+        stock_view.display_stocks(filtered_results, controls)
+    
+    sidebar.render_profile_panel(profile)
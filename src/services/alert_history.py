@@ -0,0 +1,342 @@
+"""
+Alert history stored apart from the active alerts, partitioned by month.
+
+Triggered alerts are appended as JSON lines to <root>/<YYYY-MM>.jsonl, by
+the month they triggered in, so recording a trigger never rewrites what
+is already stored. Once a month has ended it is archived: compressed to
+<YYYY-MM>.jsonl.gz, next to <YYYY-MM>.counts.json with its triggers per
+symbol, and archives past the retention window are removed. Alerts
+appended to a month that is already archived are merged into it.
+
+Queries return the newest entries first, a page at a time. Months are
+skipped by their key when they are outside the date range, and by their
+counts when they fall before the requested page, so only the months a
+page comes from are read. Those are indexed by symbol once and kept in
+a small cache; an open month is read incrementally as lines are added.
+"""
+import os
+import glob
+import gzip
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+
+logger = logging.getLogger('alert_history')
+
+ARCHIVE_AFTER_MONTHS = 1  # Months after the end of a month before it is compressed
+RETENTION_MONTHS = 24  # Months of history kept (None keeps everything)
+ARCHIVE_INTERVAL = 60 * 60  # Seconds between archival sweeps
+CACHED_PARTITIONS = 4  # Months kept parsed in memory
+
+
+def _month_bounds(month):
+    """First day of a month and of the month after it, as ISO strings."""
+    year, number = int(month[:4]), int(month[5:7])
+    following = f"{year + 1}-01" if number == 12 else f"{year}-{number + 1:02d}"
+    return f"{month}-01", f"{following}-01"
+
+
+def _months_between(newer, older):
+    """Whole months from an older month key to a newer one."""
+    return (int(newer[:4]) - int(older[:4])) * 12 + int(newer[5:7]) - int(older[5:7])
+
+
+def _iso(value):
+    """Bound of a date range as an ISO string, comparable to triggered_at."""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Expected a date, datetime or ISO string, got {type(value).__name__}")
+
+
+class _Partition:
+    """The entries of one month, indexed by symbol."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = []
+        self.by_symbol = {}  # symbol -> positions in entries, oldest first
+        self._offset = 0
+        self._key = None
+
+    def update(self):
+        """Read what was appended since the last update."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return self
+        key = (stat.st_mtime_ns, stat.st_size)
+        if key == self._key:
+            return self
+        if self.path.endswith('.gz'):
+            with gzip.open(self.path, 'rb') as f:
+                data, self._offset = f.read(), 0
+            self.entries, self.by_symbol = [], {}
+        else:
+            if stat.st_size < self._offset:
+                # Rewritten rather than appended to, start over
+                self.entries, self.by_symbol, self._offset = [], {}, 0
+            with open(self.path, 'rb') as f:
+                f.seek(self._offset)
+                data = f.read()
+            # A line still being written is picked up by the next update
+            data = data[:data.rfind(b'\n') + 1]
+            self._offset += len(data)
+        for line in data.splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping unreadable line in {self.path}")
+                continue
+            self.by_symbol.setdefault(entry.get('symbol'), []).append(len(self.entries))
+            self.entries.append(entry)
+        self._key = key
+        return self
+
+    def counts(self):
+        return {symbol: len(positions) for symbol, positions in self.by_symbol.items()}
+
+    def select(self, symbol=None, start=None, end=None):
+        """Entries of a symbol (or all) triggered in [start, end), oldest first."""
+        entries = self.entries if symbol is None else [self.entries[i] for i in self.by_symbol.get(symbol, ())]
+        if start is None and end is None:
+            return entries
+        return [
+            entry for entry in entries
+            if (start is None or entry.get('triggered_at', '') >= start)
+            and (end is None or entry.get('triggered_at', '') < end)
+        ]
+
+
+class AlertHistory:
+    """Append-only alert history in monthly partitions, queried a page at a time."""
+
+    def __init__(self, root, archive_after=ARCHIVE_AFTER_MONTHS, retention=RETENTION_MONTHS,
+                 cached_partitions=CACHED_PARTITIONS):
+        """
+        Initialize the history.
+
+        Args:
+            root: Directory holding the monthly partitions
+            archive_after: Months after its end before a month is compressed
+            retention: Months of history kept (None keeps everything)
+            cached_partitions: Months kept parsed in memory
+        """
+        self.root = root
+        self.archive_after = archive_after
+        self.retention = retention
+        self.cached_partitions = cached_partitions
+        self._partitions = OrderedDict()  # path -> _Partition
+        self._counts = {}  # archived month -> (counts file mtime, symbol counts)
+        self._lock = threading.Lock()
+        self._last_archive = 0.0
+
+    def _path(self, month, archived=False):
+        return os.path.join(self.root, f"{month}.jsonl.gz" if archived else f"{month}.jsonl")
+
+    def _counts_path(self, month):
+        return os.path.join(self.root, f"{month}.counts.json")
+
+    def months(self):
+        """Months with history, oldest first."""
+        names = glob.glob(os.path.join(self.root, '*.jsonl')) + glob.glob(os.path.join(self.root, '*.jsonl.gz'))
+        return sorted({os.path.basename(name)[:7] for name in names})
+
+    def append(self, entries):
+        """
+        Record triggered alerts.
+
+        Each month's entries are added with a single append to its
+        partition, so the cost doesn't depend on the stored history.
+
+        Args:
+            entries: History entry dicts, each with a 'triggered_at' ISO timestamp
+        """
+        by_month = {}
+        for entry in entries:
+            by_month.setdefault(entry['triggered_at'][:7], []).append(entry)
+        if not by_month:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        for month, month_entries in by_month.items():
+            data = ''.join(json.dumps(entry) + '\n' for entry in month_entries).encode()
+            # One unbuffered write, so lines from the app and the worker never interleave
+            with open(self._path(month), 'ab', buffering=0) as f:
+                f.write(data)
+            if os.path.exists(self._path(month, archived=True)):
+                # Queries read an archived month from its .gz, merge the new lines in now
+                try:
+                    self._archive_month(month)
+                except OSError as e:
+                    logger.warning(f"Could not merge alerts into the archive of {month}: {e}")
+        self.maybe_archive()
+
+    def _partition(self, month):
+        """Parsed entries of a month, from the archive once it exists."""
+        path = self._path(month, archived=True)
+        if not os.path.exists(path):
+            path = self._path(month)
+        with self._lock:
+            partition = self._partitions.pop(path, None) or _Partition(path)
+            self._partitions[path] = partition
+            while len(self._partitions) > self.cached_partitions:
+                self._partitions.popitem(last=False)
+            return partition.update()
+
+    def counts(self, month):
+        """
+        Triggers per symbol in a month.
+
+        Archived months answer from their counts file without reading
+        the entries.
+        """
+        if os.path.exists(self._path(month, archived=True)):
+            try:
+                # Keyed by the file, as late appends (from any process) rewrite it
+                mtime = os.stat(self._counts_path(month)).st_mtime_ns
+                cached = self._counts.get(month)
+                if cached is not None and cached[0] == mtime:
+                    return cached[1]
+                with open(self._counts_path(month), 'r') as f:
+                    counts = json.load(f)
+                self._counts[month] = (mtime, counts)
+                return counts
+            except (OSError, json.JSONDecodeError):
+                pass
+        return self._partition(month).counts()
+
+    def symbols(self):
+        """Symbols with history, sorted."""
+        return sorted({symbol for month in self.months() for symbol in self.counts(month) if symbol})
+
+    def _months_in(self, start, end):
+        """Months overlapping [start, end), newest first, and whether each lies entirely inside."""
+        selected = []
+        for month in reversed(self.months()):
+            first, following = _month_bounds(month)
+            if (start is not None and start >= following) or (end is not None and end <= first):
+                continue
+            inside = (start is None or start <= first) and (end is None or end >= following)
+            selected.append((month, inside))
+        return selected
+
+    def count(self, symbol=None, start=None, end=None):
+        """
+        Number of entries matching a query.
+
+        Args:
+            symbol: Only entries of this symbol (default: all)
+            start: Triggered at or after this date, datetime or ISO string
+            end: Triggered before this date, datetime or ISO string
+        """
+        start, end = _iso(start), _iso(end)
+        total = 0
+        for month, inside in self._months_in(start, end):
+            if inside:
+                counts = self.counts(month)
+                total += counts.get(symbol, 0) if symbol is not None else sum(counts.values())
+            else:
+                total += len(self._partition(month).select(symbol, start, end))
+        return total
+
+    def query(self, symbol=None, start=None, end=None, offset=0, limit=None):
+        """
+        Entries matching a query, newest first.
+
+        Args:
+            symbol: Only entries of this symbol (default: all)
+            start: Triggered at or after this date, datetime or ISO string
+            end: Triggered before this date, datetime or ISO string
+            offset: Matching entries to skip
+            limit: Maximum number of entries returned (default: all)
+
+        Returns:
+            list: History entry dicts
+        """
+        start, end = _iso(start), _iso(end)
+        entries = []
+        skip = offset
+        for month, inside in self._months_in(start, end):
+            if limit is not None and len(entries) >= limit:
+                break
+            if inside and skip:
+                counts = self.counts(month)
+                matching = counts.get(symbol, 0) if symbol is not None else sum(counts.values())
+                if skip >= matching:
+                    skip -= matching
+                    continue
+            selected = self._partition(month).select(symbol, start, end)
+            if skip >= len(selected):
+                skip -= len(selected)
+                continue
+            selected = selected[len(selected) - 1 - skip::-1]
+            skip = 0
+            entries.extend(selected if limit is None else selected[:limit - len(entries)])
+        return entries
+
+    def archive(self, now=None):
+        """
+        Compress ended months and remove the ones past retention.
+
+        Returns:
+            int: Number of months archived or removed
+        """
+        current = (now or datetime.now()).strftime('%Y-%m')
+        changed = 0
+        for month in self.months():
+            age = _months_between(current, month)
+            if self.retention is not None and age > self.retention:
+                for path in (self._path(month), self._path(month, archived=True), self._counts_path(month)):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                self._counts.pop(month, None)
+                changed += 1
+            elif age >= self.archive_after and os.path.exists(self._path(month)):
+                self._archive_month(month)
+                changed += 1
+        return changed
+
+    def _archive_month(self, month):
+        """Compress a month's lines, merged into its archive if it already has one."""
+        path = self._path(month)
+        archived = self._path(month, archived=True)
+        partition = _Partition(path).update()
+        entries = partition.entries
+        if os.path.exists(archived):
+            # Late appends to an archived month
+            entries = _Partition(archived).update().entries + entries
+            entries.sort(key=lambda entry: entry.get('triggered_at', ''))
+        counts = {}
+        for entry in entries:
+            counts[entry.get('symbol')] = counts.get(entry.get('symbol'), 0) + 1
+        suffix = f".{os.getpid()}.tmp"
+        with gzip.open(archived + suffix, 'wb') as f:
+            f.write(''.join(json.dumps(entry) + '\n' for entry in entries).encode())
+        with open(self._counts_path(month) + suffix, 'w') as f:
+            json.dump(counts, f)
+        # Counts first: a month is read as archived as soon as its .gz exists
+        os.replace(self._counts_path(month) + suffix, self._counts_path(month))
+        os.replace(archived + suffix, archived)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        logger.info(f"Archived {len(partition.entries)} alerts of {month}")
+
+    def maybe_archive(self):
+        """Run archive() if the last sweep is older than ARCHIVE_INTERVAL."""
+        if time.monotonic() - self._last_archive < ARCHIVE_INTERVAL and self._last_archive:
+            return
+        self._last_archive = time.monotonic()
+        try:
+            self.archive()
+        except OSError as e:
+            logger.warning(f"Could not archive alert history: {e}")
@@ -2,82 +2,217 @@ import json
 import os
 import uuid
 from datetime import datetime
+from src.services.alert_history import AlertHistory
+from src.services.rule_engine import (
+    RULE_TYPES, PRICE_RULES, VALUELESS_RULES, DEFAULT_VALUES,
+    DEFAULT_HYSTERESIS, DEFAULT_COOLDOWN, DEFAULT_MAX_TRIGGERS
+)
+
+ALERTS_FILE = "alerts.json"
+
+
+def history_root(alerts_file=ALERTS_FILE):
+    """Directory the history of an alerts file is kept in, e.g. alerts_history/."""
+    return f"{os.path.splitext(alerts_file)[0]}_history"
 
 class AlertService:
     """Service to manage stock price alerts."""
     
-    def __init__(self, alerts_file="alerts.json"):
-        """Initialize the alert service with a file to store alerts."""
+    def __init__(self, alerts_file=ALERTS_FILE, history=None):
+        """
+        Initialize the alert service with a file to store alerts.
+        
+        Args:
+            alerts_file: JSON file holding the active alerts
+            history: AlertHistory for triggered alerts (default: one in history_root(alerts_file))
+        """
         self.alerts_file = alerts_file
+        self.history = history if history is not None else AlertHistory(history_root(alerts_file))
+        self._mtime = None
         self.alerts = self._load_alerts()
     
+    def _file_mtime(self):
+        try:
+            return os.stat(self.alerts_file).st_mtime_ns
+        except OSError:
+            return None
+    
+    def _refresh(self):
+        """Reload the alerts if another process (the app or the worker) changed the file."""
+        if self._file_mtime() != self._mtime:
+            self.alerts = self._load_alerts()
+    
     def _load_alerts(self):
         """Load alerts from the JSON file."""
+        self._mtime = self._file_mtime()
         if os.path.exists(self.alerts_file):
             try:
                 with open(self.alerts_file, 'r') as f:
-                    return json.load(f)
+                    alerts = json.load(f)
             except json.JSONDecodeError:
-                return {"active": [], "history": []}
-        return {"active": [], "history": []}
+                return {"active": []}
+            if "history" in alerts:
+                self._migrate_history(alerts)
+            return alerts
+        return {"active": []}
+    
+    def _migrate_history(self, alerts):
+        """Move history kept in the alerts file (older versions) to the history store."""
+        history = alerts.pop("history")
+        for entry in history:
+            # History is partitioned by the month an alert triggered in
+            entry["triggered_at"] = entry.get("triggered_at") or entry.get("created_at") or datetime.now().isoformat()
+        if history:
+            self.history.append(sorted(history, key=lambda entry: entry["triggered_at"]))
+        self.alerts = alerts
+        self._save_alerts()
     
     def _save_alerts(self):
         """Save alerts to the JSON file."""
         with open(self.alerts_file, 'w') as f:
             json.dump(self.alerts, f, indent=4)
+        self._mtime = self._file_mtime()
     
-    def add_alert(self, symbol, price_threshold, alert_type):
+    def add_alert(self, symbol, price_threshold=None, alert_type='above', value=None, recurring=False,
+                  hysteresis=DEFAULT_HYSTERESIS, cooldown=DEFAULT_COOLDOWN, max_triggers=DEFAULT_MAX_TRIGGERS):
         """
         Add a new alert.
         
         Args:
             symbol: Stock symbol
-            price_threshold: Price threshold to trigger the alert
-            alert_type: 'above' or 'below'
+            price_threshold: Price threshold to trigger the alert ('above' and 'below')
+            alert_type: One of RULE_TYPES, e.g. 'above', 'pct_up', 'ema_cross_up', 'rsi_above'
+            value: Parameter of the other rule types: percent move, RSI level or
+                volume multiple (default: DEFAULT_VALUES; unused by crosses and breakouts)
+            recurring: Keep the alert active after it triggers instead of moving it to history
+            hysteresis: Recurring alerts: percent of the level the condition must clear by to re-arm
+            cooldown: Recurring alerts: minimum seconds between two triggers
+            max_triggers: Recurring alerts: triggers allowed per day
         
         Returns:
             The created alert object
+        
+        Raises:
+            ValueError: If the alert type is unknown or a price alert has no threshold
         """
+        if alert_type not in RULE_TYPES:
+            raise ValueError(f"Unknown alert type: {alert_type}")
+        if alert_type in PRICE_RULES:
+            if price_threshold is None:
+                raise ValueError(f"A price threshold is required for '{alert_type}' alerts")
+            price_threshold, value = float(price_threshold), None
+        else:
+            price_threshold = None
+            if alert_type in VALUELESS_RULES:
+                value = None
+            else:
+                value = float(value if value is not None else DEFAULT_VALUES[alert_type])
         alert = {
             "id": str(uuid.uuid4()),
             "symbol": symbol.upper(),
-            "price_threshold": float(price_threshold),
+            "price_threshold": price_threshold,
+            "value": value,
             "alert_type": alert_type,
             "created_at": datetime.now().isoformat(),
             "triggered": False,
             "triggered_at": None
         }
+        if recurring:
+            alert.update({
+                "recurring": True,
+                "hysteresis": float(hysteresis),
+                "cooldown": int(cooldown),
+                "max_triggers": int(max_triggers),
+                "armed": True,
+                "trigger_count": 0,
+                "last_triggered_at": None,
+                "recent_triggers": []
+            })
         
+        self._refresh()
         self.alerts["active"].append(alert)
         self._save_alerts()
         return alert
     
     def get_active_alerts(self):
         """Get all active alerts."""
+        self._refresh()
         return self.alerts["active"]
     
-    def get_alert_history(self):
-        """Get alert history."""
-        return self.alerts["history"]
+    def get_alert_history(self, symbol=None, start=None, end=None, offset=0, limit=None):
+        """
+        Get triggered alerts, newest first.
+        
+        Args:
+            symbol: Only alerts of this symbol (default: all)
+            start: Triggered at or after this date or datetime
+            end: Triggered before this date or datetime
+            offset: Matching alerts to skip, for paging
+            limit: Maximum number of alerts returned (default: all)
+        """
+        return self.history.query(symbol, start, end, offset, limit)
+    
+    def count_alert_history(self, symbol=None, start=None, end=None):
+        """Number of triggered alerts matching get_alert_history's filters."""
+        return self.history.count(symbol, start, end)
+    
+    def get_history_symbols(self):
+        """Symbols with triggered alerts."""
+        return self.history.symbols()
     
     def delete_alert(self, alert_id):
         """Delete an alert by ID."""
+        self._refresh()
         self.alerts["active"] = [a for a in self.alerts["active"] if a["id"] != alert_id]
         self._save_alerts()
         return True
     
     def mark_alert_triggered(self, alert_id, current_price):
         """Mark an alert as triggered and move it to history."""
-        for i, alert in enumerate(self.alerts["active"]):
-            if alert["id"] == alert_id:
-                alert["triggered"] = True
-                alert["triggered_at"] = datetime.now().isoformat()
-                alert["triggered_price"] = current_price
-                
-                # Move to history
-                self.alerts["history"].append(alert)
-                self.alerts["active"].pop(i)
-                self._save_alerts()
-                return alert
+        triggered = self.mark_alerts_triggered({alert_id: current_price})
+        return triggered[0] if triggered else None
+    
+    def mark_alerts_triggered(self, prices, rearmed=()):
+        """
+        Record the outcome of a check with a single save.
+        
+        One-shot alerts that triggered move to history. Recurring ones stay
+        active, disarmed, with a copy of the trigger added to history.
+        
+        Args:
+            prices: dict mapping alert IDs to the price that triggered them
+            rearmed: IDs of recurring alerts whose condition cleared
+        
+        Returns:
+            list: History entries of the alerts that were still active
+        """
+        self._refresh()
+        triggered_at = datetime.now().isoformat()
+        rearmed = set(rearmed)
+        triggered, active = [], []
+        for alert in self.alerts["active"]:
+            if alert["id"] in rearmed:
+                alert["armed"] = True
+            if alert["id"] not in prices:
+                active.append(alert)
+                continue
+            if alert.get("recurring"):
+                alert["armed"] = False
+                alert["trigger_count"] = alert.get("trigger_count", 0) + 1
+                alert["last_triggered_at"] = triggered_at
+                # Only the triggers that count against the daily budget are kept
+                recent = alert.get("recent_triggers", []) + [triggered_at]
+                alert["recent_triggers"] = recent[-alert.get("max_triggers", DEFAULT_MAX_TRIGGERS):]
+                active.append(alert)
+                entry = {k: v for k, v in alert.items() if k != "recent_triggers"}
+            else:
+                entry = alert
+            entry.update(triggered=True, triggered_at=triggered_at, triggered_price=prices[alert["id"]])
+            triggered.append(entry)
         
-        return None 
\ No newline at end of file
+        if triggered or rearmed:
+            self.alerts["active"] = active
+            self._save_alerts()
+            # Move to history; appended, so this costs the same however long the history is
+            self.history.append(triggered)
+        return triggered
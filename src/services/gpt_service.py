@@ -1,32 +1,278 @@
+import os
+import json
+import time
+import random
+import asyncio
+import hashlib
+import threading
+import logging
 import streamlit as st
-from openai import OpenAI
+from src.services.http_transport import get_transport
+
+logger = logging.getLogger('gpt_service')
+
+MODEL = "deepseek-chat"
+# MODEL = "gpt-4o"
+DEFAULT_BASE_URL = "https://api.deepseek.com"
+SYSTEM_PROMPT = """You are a quantitative trading strategist** specializing in precise technical execution"""
+RESPONSE_CACHE_FILE = os.path.join('.cache', 'gpt_responses.json')
+RESPONSE_CACHE_TTL = 24 * 60 * 60  # Seconds an analysis is reused for the same prompt and data
+MAX_CONCURRENT_REQUESTS = 4  # Concurrent requests in bulk analysis
+MAX_RATE_LIMIT_RETRIES = 5  # Retries per request after a rate-limit response
+BACKOFF_BASE_DELAY = 1.0  # First rate-limit backoff in seconds, doubled on every retry
+
+
+class ResponseCache:
+    """Thread-safe, TTL-bound cache of LLM responses persisted to a JSON file."""
+
+    def __init__(self, path=RESPONSE_CACHE_FILE, ttl=RESPONSE_CACHE_TTL):
+        """
+        Initialize the cache, loading unexpired entries from disk.
+
+        Args:
+            path: JSON file the cache is persisted to (None keeps it in memory)
+            ttl: Seconds an entry stays valid
+        """
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable response cache {self.path}: {e}")
+            return
+        now = time.time()
+        self._entries = {k: v for k, v in entries.items() if now - v['created_at'] < self.ttl}
+
+    def _save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def make_key(model, prompt, snapshot_date):
+        """Build the cache key for a (model, prompt, data snapshot date) triple."""
+        payload = json.dumps([model, SYSTEM_PROMPT, prompt, snapshot_date])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key):
+        """Get a cached response, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry['created_at'] >= self.ttl:
+                del self._entries[key]
+                return None
+            return entry['response']
+
+    def set(self, key, response):
+        """Store a response and persist the cache."""
+        with self._lock:
+            self._entries[key] = {'response': response, 'created_at': time.time()}
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning(f"Could not persist response cache: {e}")
+
 
 class GPTService:
-    def __init__(self):
-        # self.client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
-        self.client = OpenAI(api_key=st.secrets["DEEPSEEK_API_KEY"], base_url="https://api.deepseek.com")
-        
-    def get_stock_analysis(self, prompt):
+    def __init__(self, api_key=None, base_url=None, cache=None, transport=None):
+        """
+        Initialize the GPT service.
+
+        Args:
+            api_key: API key, defaults to DEEPSEEK_API_KEY from Streamlit secrets
+            base_url: API base URL, defaults to DEEPSEEK_BASE_URL from secrets or the DeepSeek API
+            cache: ResponseCache instance (default: persisted to RESPONSE_CACHE_FILE)
+            transport: HttpTransport providing pooled clients and host overrides
+        """
+        # api_key = api_key or st.secrets["OPENAI_API_KEY"]
+        api_key = api_key or st.secrets["DEEPSEEK_API_KEY"]
+        base_url = base_url or st.secrets.get("DEEPSEEK_BASE_URL", DEFAULT_BASE_URL)
+        self.transport = transport or get_transport()
+        base_url = self.transport.resolve(base_url)
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = MODEL
+        self.cache = cache or ResponseCache()
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        """OpenAI client, created (and openai imported) on first use."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import OpenAI
+                    self._client = OpenAI(api_key=self.api_key, base_url=self.base_url,
+                                          http_client=self.transport.openai_http_client())
+        return self._client
+
+    def _messages(self, prompt):
+        return [
+            {
+                "role": "system",
+                "content": SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+
+    def get_stock_analysis(self, prompt, snapshot_date=None):
+        """
+        Get an analysis for a prompt, reusing a cached response when possible.
+
+        Args:
+            prompt: User prompt
+            snapshot_date: Date of the latest bar the prompt is based on; a new
+                bar produces a new cache entry
+
+        Returns:
+            The analysis text, or an error message
+        """
+        key = ResponseCache.make_key(self.model, prompt, snapshot_date)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
         try:
             response = self.client.chat.completions.create(
-                model="deepseek-chat",
-                # model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are a quantitative trading strategist** specializing in precise technical execution"""
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+                model=self.model,
+                messages=self._messages(prompt),
                 temperature=0.7,
                 max_tokens=750
             )
 
             content = response.choices[0].message.content
-            
+            self.cache.set(key, content)
+
             return content
         except Exception as e:
-            return f"Error getting GPT analysis: {str(e)}" 
\ No newline at end of file
+            return f"Error getting GPT analysis: {str(e)}"
+
+    def stream_stock_analysis(self, prompt, snapshot_date=None):
+        """
+        Stream an analysis for a prompt as it is generated.
+
+        A cached response is yielded in one piece; otherwise tokens are
+        yielded as they arrive and the full text is cached at the end.
+
+        Args:
+            prompt: User prompt
+            snapshot_date: Date of the latest bar the prompt is based on
+
+        Yields:
+            Chunks of the analysis text
+        """
+        key = ResponseCache.make_key(self.model, prompt, snapshot_date)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=self._messages(prompt),
+                temperature=0.7,
+                max_tokens=750,
+                stream=True
+            )
+
+            chunks = []
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    chunks.append(delta)
+                    yield delta
+            self.cache.set(key, "".join(chunks))
+        except Exception as e:
+            yield f"Error getting GPT analysis: {str(e)}"
+
+    async def _analyze_one(self, client, semaphore, prompt, snapshot_date, max_tokens):
+        """Request one analysis under the concurrency cap, backing off on rate limits."""
+        from openai import RateLimitError
+        key = ResponseCache.make_key(self.model, prompt, snapshot_date)
+        async with semaphore:
+            for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+                try:
+                    response = await client.chat.completions.create(
+                        model=self.model,
+                        messages=self._messages(prompt),
+                        temperature=0.7,
+                        max_tokens=max_tokens
+                    )
+                    content = response.choices[0].message.content
+                    self.cache.set(key, content)
+                    return content
+                except RateLimitError as e:
+                    if attempt == MAX_RATE_LIMIT_RETRIES:
+                        return f"Error getting GPT analysis: {str(e)}"
+                    # Honour Retry-After when the server sends it, else back off exponentially
+                    retry_after = e.response.headers.get('retry-after') if e.response is not None else None
+                    try:
+                        delay = float(retry_after)
+                    except (TypeError, ValueError):
+                        delay = BACKOFF_BASE_DELAY * (2 ** attempt) * random.uniform(1.0, 1.5)
+                    logger.warning(f"Rate limited, retrying in {delay:.1f}s (attempt {attempt + 1})")
+                    await asyncio.sleep(delay)
+                except Exception as e:
+                    return f"Error getting GPT analysis: {str(e)}"
+
+    async def _analyze_many(self, pending, max_concurrency, max_tokens):
+        from openai import AsyncOpenAI
+        semaphore = asyncio.Semaphore(max_concurrency)
+        # Retries are handled by _analyze_one's backoff, not by the client
+        async with AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0,
+                               http_client=self.transport.openai_http_client(async_client=True)) as client:
+            results = await asyncio.gather(*(
+                self._analyze_one(client, semaphore, prompt, snapshot_date, max_tokens)
+                for prompt, snapshot_date in pending.values()
+            ))
+        return dict(zip(pending, results))
+
+    def analyze_many(self, requests, max_concurrency=MAX_CONCURRENT_REQUESTS, max_tokens=750):
+        """
+        Get analyses for many prompts concurrently.
+
+        Cached responses are returned without a request; the rest are sent
+        concurrently (at most max_concurrency in flight) and cached.
+
+        Args:
+            requests: dict mapping an id (e.g. the symbol) to (prompt, snapshot_date)
+            max_concurrency: Maximum number of requests in flight
+            max_tokens: Token limit per response
+
+        Returns:
+            dict: id -> analysis text (or error message)
+        """
+        results = {}
+        pending = {}
+        for request_id, (prompt, snapshot_date) in requests.items():
+            cached = self.cache.get(ResponseCache.make_key(self.model, prompt, snapshot_date))
+            if cached is not None:
+                results[request_id] = cached
+            else:
+                pending[request_id] = (prompt, snapshot_date)
+
+        if pending:
+            logger.info(f"Bulk analysis: {len(results)} cached, {len(pending)} to request")
+            results.update(asyncio.run(self._analyze_many(pending, max_concurrency, max_tokens)))
+        return {request_id: results[request_id] for request_id in requests}
@@ -0,0 +1,204 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit, urlunsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from src.utils.metrics import REGISTRY
+
+logger = logging.getLogger('http_transport')
+
+DEFAULT_TIMEOUT = (5, 30)  # (connect, read) timeout in seconds
+MAX_RETRIES = 3  # Retries for idempotent requests on connection errors and retryable statuses
+BACKOFF_FACTOR = 0.5  # Retry delays of 0.5s, 1s, 2s, ...
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+POOL_SIZE = 16  # Keep-alive connections kept per host
+PER_HOST_LIMIT = 8  # Concurrent requests allowed per host
+YAHOO_HOST = "query2.finance.yahoo.com"
+OVERRIDES_ENV = "MBT_HTTP_OVERRIDES"  # e.g. "raw.githubusercontent.com=http://127.0.0.1:8000"
+
+
+def _parse_overrides(value):
+    """Parse 'host=base_url,host=base_url' into a dict."""
+    overrides = {}
+    for item in (value or "").split(','):
+        if '=' in item:
+            host, base_url = item.split('=', 1)
+            overrides[host.strip()] = base_url.strip().rstrip('/')
+    return overrides
+
+
+class HttpTransport:
+    """Shared outbound HTTP layer: pooled keep-alive connections, limits, retries and counters."""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_retries=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR,
+                 pool_size=POOL_SIZE, per_host_limit=PER_HOST_LIMIT, overrides=None):
+        """
+        Initialize the transport.
+
+        Args:
+            timeout: Default (connect, read) timeout in seconds
+            max_retries: Retries for idempotent requests
+            backoff_factor: Exponential backoff factor between retries
+            pool_size: Keep-alive connections per host
+            per_host_limit: Concurrent requests allowed per host
+            overrides: dict mapping a host to a replacement base URL (e.g. a
+                local stub server); defaults to the MBT_HTTP_OVERRIDES env var
+        """
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.per_host_limit = per_host_limit
+        self.overrides = overrides if overrides is not None else _parse_overrides(os.environ.get(OVERRIDES_ENV))
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self._limits = {}
+        self._stats = {}
+        self._yfinance_session = None
+
+    def _host_limit(self, host):
+        with self._lock:
+            if host not in self._limits:
+                self._limits[host] = threading.BoundedSemaphore(self.per_host_limit)
+                self._stats[host] = {'requests': 0, 'errors': 0, 'in_flight': 0, 'total_time': 0.0}
+            return self._limits[host]
+
+    @contextmanager
+    def track(self, host):
+        """
+        Run an outbound call under the per-host concurrency limit and count it.
+
+        Used directly around calls made by client libraries (yfinance) that
+        do not go through request().
+        """
+        with self._host_limit(host):
+            stats = self._stats[host]
+            with self._lock:
+                stats['requests'] += 1
+                stats['in_flight'] += 1
+            start = time.perf_counter()
+            try:
+                yield
+            except Exception:
+                with self._lock:
+                    stats['errors'] += 1
+                raise
+            finally:
+                with self._lock:
+                    stats['in_flight'] -= 1
+                    stats['total_time'] += time.perf_counter() - start
+
+    def resolve(self, url):
+        """Rewrite a URL whose host has an override (e.g. a local stub server)."""
+        parts = urlsplit(url)
+        base_url = self.overrides.get(parts.hostname)
+        if not base_url:
+            return url
+        base = urlsplit(base_url)
+        return urlunsplit((base.scheme, base.netloc, base.path + parts.path, parts.query, parts.fragment))
+
+    def request(self, method, url, **kwargs):
+        """Send a request through the pooled session."""
+        # Counted under the original host, even when served by an override
+        host = urlsplit(url).hostname
+        kwargs.setdefault('timeout', self.timeout)
+        with self.track(host):
+            return self.session.request(method, self.resolve(url), **kwargs)
+
+    def get(self, url, **kwargs):
+        """Send a GET request through the pooled session."""
+        return self.request('GET', url, **kwargs)
+
+    def yfinance_session(self):
+        """
+        Shared session for yfinance calls.
+
+        Yahoo requires a curl_cffi session (installed with yfinance); None
+        lets yfinance fall back to its own session.
+        """
+        if self._yfinance_session is None:
+            try:
+                from curl_cffi import requests as curl_requests
+            except ImportError:
+                return None
+            with self._lock:
+                if self._yfinance_session is None:
+                    self._yfinance_session = curl_requests.Session(impersonate="chrome", timeout=self.timeout[1])
+        return self._yfinance_session
+
+    def openai_http_client(self, async_client=False):
+        """
+        Pooled HTTP client with the transport timeout for an OpenAI client.
+
+        Returns None (the OpenAI default client) if httpx is not importable.
+        """
+        import openai
+        try:
+            import httpx
+        except ImportError:
+            return None
+        timeout = httpx.Timeout(self.timeout[1], connect=self.timeout[0])
+        limits = httpx.Limits(max_connections=self.per_host_limit, max_keepalive_connections=self.per_host_limit)
+        if async_client:
+            return openai.DefaultAsyncHttpxClient(timeout=timeout, limits=limits)
+        return openai.DefaultHttpxClient(timeout=timeout, limits=limits)
+
+    def twilio_http_client(self):
+        """Twilio HTTP client sharing the pooled session."""
+        from twilio.http.http_client import TwilioHttpClient
+        http_client = TwilioHttpClient(timeout=self.timeout[1])
+        http_client.session = self.session
+        return http_client
+
+    def stats(self):
+        """Get per-host request counters."""
+        with self._lock:
+            return {host: dict(stats) for host, stats in self._stats.items()}
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """Get the process-wide HttpTransport."""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HttpTransport()
+    return _transport
+
+
+def _collect_metrics():
+    """Per-host request counters, read when the metrics endpoint is scraped."""
+    if _transport is None:
+        return []
+    stats = _transport.stats()
+    return [
+        ('mbt_http_requests_total', 'counter', "Outbound HTTP requests by host",
+         [({'host': host}, s['requests']) for host, s in stats.items()]),
+        ('mbt_http_errors_total', 'counter', "Outbound HTTP requests that failed",
+         [({'host': host}, s['errors']) for host, s in stats.items()]),
+        ('mbt_http_in_flight', 'gauge', "Outbound HTTP requests in progress",
+         [({'host': host}, s['in_flight']) for host, s in stats.items()]),
+        ('mbt_http_seconds_total', 'counter', "Time spent in outbound HTTP requests",
+         [({'host': host}, round(s['total_time'], 6)) for host, s in stats.items()]),
+    ]
+
+
+REGISTRY.register_collector(_collect_metrics)
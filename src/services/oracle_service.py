@@ -0,0 +1,280 @@
+import json
+import time
+import random
+import logging
+import threading
+from typing import List, Dict
+import numpy as np
+from src.services.universe_service import UniverseService
+from src.utils.symbol_index import SymbolIndex
+from src.utils.price_panel import PricePanel
+from src.utils.shared_panel import panel_name
+from src.providers import get_provider
+from src.utils import profiling
+from src.utils.metrics import ORACLE_SYMBOLS, ORACLE_BATCH_SECONDS
+
+# Define filter criteria
+PRICE_THRESHOLD = 0.03  # 3% threshold from 90-day high
+MAX_RETRIES = 3  # Maximum number of retries for failed downloads
+BATCH_SIZE = 10  # Reduced batch size to avoid rate limiting
+MIN_DELAY = 2  # Minimum delay between batches in seconds
+MAX_DELAY = 4  # Maximum delay between batches in seconds
+MIN_PRICE = 5.0  # Minimum stock price
+MAX_PRICE = 100.0  # Maximum stock price
+MIN_MARKET_CAP = 2_000_000_000  # Minimum market cap of $2 billion
+MAX_SYMBOL_LENGTH = 4  # Maximum length of stock symbol
+LOG_FILE = 'stock_filter.log'  # Matches are logged here and read back by the Oracle view
+RESULTS_FILE = 'filtered_stocks.json'
+SHARED_BATCH = panel_name('oracle-batch')  # Shared panel the batches of a scan replace one another in
+
+_logger_lock = threading.Lock()
+
+
+def get_oracle_logger():
+    """
+    Logger writing to LOG_FILE in the format OracleView parses.
+
+    It has its own handler instead of relying on logging.basicConfig, so the
+    matches land in the Oracle log whichever module configured logging first.
+    """
+    logger = logging.getLogger('stock_filter')
+    with _logger_lock:
+        if not logger.handlers:
+            handler = logging.FileHandler(LOG_FILE)
+            handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S'))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+    return logger
+
+
+class OracleService:
+    """Screens all US stocks for prices near their 90-day high."""
+
+    def __init__(self, provider=None, universe_service=None, symbol_index=None, shared_panels=None):
+        """
+        Initialize the oracle service.
+
+        Args:
+            provider: MarketDataProvider for batch downloads (default: the configured provider)
+            universe_service: UniverseService for the US symbol lists
+            symbol_index: SymbolIndex used to pre-filter symbols
+            shared_panels: SharedPanelWriter batches are published to and screened from
+                (the worker's; default: screen the downloaded panels directly)
+        """
+        self.provider = provider or get_provider()
+        self.shared_panels = shared_panels
+        self.universe_service = universe_service or UniverseService()
+        self.symbol_index = symbol_index or SymbolIndex()
+        self.logger = get_oracle_logger()
+
+    def get_us_symbols(self):
+        """Get all available US stock symbols."""
+        # NASDAQ and NYSE lists come from the local cache, refreshed daily
+        universe = self.universe_service.get_us_universe()
+        self.symbol_index.ensure(universe)
+        return list(universe)
+
+    def download_batch_with_retry(self, batch: List[str], retries: int = MAX_RETRIES) -> PricePanel:
+        """Download data for a batch of symbols with retry logic."""
+        for attempt in range(retries):
+            try:
+                panel = self.provider.bulk_history(batch, period="90d")
+                if len(panel):
+                    if self.shared_panels is not None:
+                        # One file for the whole scan, so batches don't push watchlists out of the writer
+                        panel = self.shared_panels.share(SHARED_BATCH, panel)
+                    return panel
+
+                if attempt < retries - 1:
+                    delay = random.uniform(MIN_DELAY, MAX_DELAY)
+                    time.sleep(delay)
+
+            except Exception as e:
+                if attempt < retries - 1:
+                    delay = random.uniform(MIN_DELAY, MAX_DELAY)
+                    time.sleep(delay)
+                else:
+                    self.logger.error(f"Failed to download after {retries} attempts: {e}")
+
+        return PricePanel.empty()
+
+    def process_symbol_data(self, symbol: str, panel: PricePanel) -> Dict:
+        """Process data for a single symbol and return results if it matches criteria."""
+        try:
+            # Skip if symbol is longer than MAX_SYMBOL_LENGTH
+            if len(symbol) > MAX_SYMBOL_LENGTH:
+                return None
+
+            # Skip if we don't have enough data
+            if symbol not in panel:
+                self.logger.warning(f"{symbol}: Insufficient data")
+                return None
+
+            # Zero-copy views of the symbol's rows in the batch panel
+            price_data = panel.series(symbol, 'Close')
+            price_data = price_data[~np.isnan(price_data)]
+            if len(price_data) == 0:
+                self.logger.warning(f"{symbol}: Insufficient data")
+                return None
+
+            current_price = float(price_data[-1])
+            high_90d = float(np.nanmax(panel.series(symbol, 'High')))
+
+            # Remember the latest values so the next run can plan around them
+            self.symbol_index.update(
+                symbol,
+                last_price=current_price,
+                avg_volume=float(np.nanmean(panel.series(symbol, 'Volume'), dtype=np.float64))
+            )
+
+            # Skip if price is not within desired range (checked before the market cap lookup)
+            if current_price < MIN_PRICE or current_price > MAX_PRICE:
+                return None
+
+            # Get market cap data
+            try:
+                market_cap = self.provider.fundamentals(symbol).get('market_cap')
+                if not market_cap:
+                    # Unknown (e.g. replay or synthetic data): can't pass the filter, but isn't
+                    # recorded either, so sources that have it still download the symbol
+                    return None
+                self.symbol_index.update(symbol, market_cap=market_cap)
+
+                # Skip if market cap is below minimum
+                if market_cap < MIN_MARKET_CAP:
+                    return None
+            except Exception as e:
+                self.logger.warning(f"{symbol}: Could not fetch market cap data: {e}")
+                return None
+
+            # Calculate percentage difference from 90-day high
+            price_diff_pct = (high_90d - current_price) / high_90d
+
+            if price_diff_pct <= PRICE_THRESHOLD:
+                result = {
+                    "symbol": symbol,
+                    "current_price": current_price,
+                    "90d_high": high_90d,
+                    "diff_percentage": price_diff_pct * 100,
+                    "market_cap": market_cap
+                }
+                self.logger.info(f"{symbol}: Current ${current_price:.2f} | 90d High ${high_90d:.2f} | Diff: {price_diff_pct*100:.2f}% | Market Cap: ${market_cap:,.0f}")
+                return result
+
+        except Exception as e:
+            self.logger.error(f"Error processing {symbol}: {e}")
+            return None
+
+    def filter_stocks(self, symbols, progress=None):
+        """
+        Filter stocks based on proximity to 90-day high.
+
+        Args:
+            symbols: Symbols to screen
+            progress: Optional callback(fraction, message) called as batches complete
+
+        Returns:
+            list: Result dicts of the matching symbols
+        """
+        progress = progress or (lambda fraction, message: None)
+        results = []
+
+        # Only download symbols that can still pass the static filters
+        planned = self.symbol_index.candidates(
+            symbols,
+            max_symbol_length=MAX_SYMBOL_LENGTH,
+            min_price=MIN_PRICE,
+            max_price=MAX_PRICE,
+            min_market_cap=MIN_MARKET_CAP
+        )
+        progress(0.0, f"Download plan: {len(planned)} of {len(symbols)} symbols after pre-filtering")
+        self.logger.info(f"Pre-filter kept {len(planned)} of {len(symbols)} symbols")
+        symbols = planned
+        if not symbols:
+            return results
+
+        total_batches = (len(symbols) - 1) // BATCH_SIZE + 1
+
+        # Process symbols in smaller batches with delays
+        for i in range(0, len(symbols), BATCH_SIZE):
+            batch = symbols[i:i + BATCH_SIZE]
+            progress((i // BATCH_SIZE + 1) / total_batches, f"Processing batch {i//BATCH_SIZE + 1}/{total_batches}")
+
+            batch_start = time.perf_counter()
+            # Download data with retry logic
+            # Providers return batches as compact float32 panels
+            with profiling.stage('download'):
+                panel = self.download_batch_with_retry(batch)
+
+            if not len(panel):
+                progress((i // BATCH_SIZE + 1) / total_batches, "Skipping batch due to download failure")
+                continue
+
+            # Process each symbol in the batch
+            with profiling.stage('process'):
+                for symbol in batch:
+                    result = self.process_symbol_data(symbol, panel)
+                    if result:
+                        results.append(result)
+            ORACLE_BATCH_SECONDS.observe(time.perf_counter() - batch_start)
+            ORACLE_SYMBOLS.inc(len(batch))
+
+            # Add delay between batches to avoid rate limiting
+            if i + BATCH_SIZE < len(symbols):
+                delay = random.uniform(MIN_DELAY, MAX_DELAY)
+                with profiling.stage('throttle'):
+                    time.sleep(delay)
+
+        progress(1.0, f"Screened {len(symbols)} symbols")
+
+        try:
+            self.symbol_index.save()
+        except OSError as e:
+            self.logger.warning(f"Could not save symbol index: {e}")
+        return results
+
+    def run(self, progress=None):
+        """
+        Run a full scan: clear the log, screen every US symbol and save the matches.
+
+        Args:
+            progress: Optional callback(fraction, message)
+
+        Returns:
+            list: Result dicts of the matching symbols
+
+        Raises:
+            ValueError: If no symbols could be loaded
+        """
+        # Clean the log file at the start of each run
+        try:
+            open(LOG_FILE, 'w').close()
+            self.logger.info("Starting new stock filtering run...")
+        except OSError as e:
+            self.logger.warning(f"Could not clean log file: {e}")
+
+        # Get all US stock symbols
+        with profiling.stage('symbols'):
+            symbols = self.get_us_symbols()
+        if not symbols:
+            raise ValueError("No symbols found!")
+        if progress:
+            progress(0.0, f"Found {len(symbols)} unique US stock symbols")
+
+        # Filter stocks
+        filtered_stocks = self.filter_stocks(symbols, progress)
+
+        if filtered_stocks:
+            # Create JSON structure with more detailed information
+            output_json = {
+                "stocks": filtered_stocks,
+                "filter_criteria": {
+                    "threshold_percentage": PRICE_THRESHOLD * 100
+                }
+            }
+
+            # Save to JSON file
+            with open(RESULTS_FILE, 'w') as f:
+                json.dump(output_json, f, indent=2)
+        return filtered_stocks
@@ -1,10 +1,15 @@
 import threading
 import time
 import logging
-from datetime import datetime
-import yfinance as yf
 from src.services.alert_service import AlertService
 from src.services.twilio_service import TwilioService
+from src.services.rule_engine import RuleEngine, describe_rule, HISTORY_PERIOD, INTRADAY_INTERVAL, PRICE_RULES
+from src.providers import get_provider
+from src.utils.price_cache import get_price_cache
+from src.utils.metrics import (
+    ALERTS_EVALUATED, ALERTS_TRIGGERED, ALERTS_HELD, ALERTS_REARMED, ALERTS_ACTIVE, ALERT_CHECK_SECONDS,
+    NOTIFICATION_SECONDS, NOTIFICATIONS, start_metrics_server
+)
 
 # Configure logging
 logging.basicConfig(
@@ -14,60 +19,101 @@ logging.basicConfig(
 )
 logger = logging.getLogger('price_monitor')
 
+MAX_NOTIFICATIONS = 20  # Recurring-alert notifications sent per check; further triggers are only recorded in history
+
 class PriceMonitorService:
     """Service to monitor stock prices and trigger alerts."""
     
-    def __init__(self, alert_service=None, twilio_service=None, check_interval=300):
+    def __init__(self, alert_service=None, twilio_service=None, check_interval=300, provider=None,
+                 price_cache=None, max_notifications=MAX_NOTIFICATIONS, history=None):
         """
         Initialize the price monitor service.
         
         Args:
             alert_service: AlertService instance
-            twilio_service: TwilioService instance
+            twilio_service: TwilioService instance (default: created on the first notification)
             check_interval: Interval in seconds between price checks (default: 5 minutes)
+            provider: MarketDataProvider for prices (default: the configured provider, on first use)
+            price_cache: PriceCache for recent quotes (default: the shared cache)
+            max_notifications: Recurring-alert notifications sent per check, bounding the send
+                rate when many fire; one-shot alerts are notified once and always sent
+            history: Callable(symbols) returning the daily bars of the indicator rules
+                (default: a HISTORY_PERIOD download from the provider)
         """
+        self._provider = provider
         self.alert_service = alert_service or AlertService()
-        self.twilio_service = twilio_service or TwilioService()
+        self._twilio_service = twilio_service
         self.check_interval = check_interval
         self.is_running = False
         self.monitor_thread = None
-        self.price_cache = {}  # Cache to store recent price data
+        self.price_cache = price_cache if price_cache is not None else get_price_cache()  # An empty cache is falsy
+        self.max_notifications = max_notifications
+        # Indicator rules get their daily history, and intraday rules today's bars, from the same provider
+        self.rule_engine = RuleEngine(
+            history or (lambda symbols: self.provider.bulk_history(symbols, period=HISTORY_PERIOD)),
+            intraday=lambda symbols: self.provider.bulk_history(symbols, period='1d', interval=INTRADAY_INTERVAL)
+        )
         
+    @property
+    def provider(self):
+        """Market data provider, resolved on first use (in the monitor thread, not at page load)."""
+        if self._provider is None:
+            self._provider = get_provider()
+        return self._provider
+    
+    @property
+    def twilio_service(self):
+        """Notification service, created when the first alert triggers."""
+        if self._twilio_service is None:
+            self._twilio_service = TwilioService()
+        return self._twilio_service
+    
     def get_current_price(self, symbol):
         """Get the current price for a symbol."""
         try:
-            # Check if we have a recent price in cache (less than 60 seconds old)
-            cache_entry = self.price_cache.get(symbol)
-            if cache_entry and (datetime.now() - cache_entry['timestamp']).total_seconds() < 60:
-                return cache_entry['price']
-            
-            # Fetch new price
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(period="1d")
+            # Use a recent quote from the shared cache if there is one
+            quote = self.price_cache.get_or_fetch(symbol, self.provider.quote)
             
-            if data.empty:
+            if quote is None:
                 logger.warning(f"No data found for {symbol}")
                 return None
             
-            current_price = data['Close'].iloc[-1]
+            current_price = quote['price']
             
             # Log the current price
             logger.info(f"Current price for {symbol}: ${current_price:.6f}")
             
-            # Update cache
-            self.price_cache[symbol] = {
-                'price': current_price,
-                'timestamp': datetime.now()
-            }
-            
             return current_price
         except Exception as e:
             logger.error(f"Error getting price for {symbol}: {str(e)}")
             return None
     
+    def get_current_quotes(self, symbols):
+        """Get the current quotes for many symbols with one batched quote request."""
+        try:
+            quotes = self.price_cache.get_many_or_fetch(symbols, self.provider.quotes)
+        except Exception as e:
+            logger.error(f"Error getting prices for {', '.join(symbols)}: {str(e)}")
+            return {}
+        
+        found = {}
+        for symbol in dict.fromkeys(symbols):
+            quote = quotes.get(symbol)
+            if quote is None:
+                logger.warning(f"No data found for {symbol}")
+                continue
+            found[symbol] = quote
+            logger.info(f"Current price for {symbol}: ${quote['price']:.6f}")
+        return found
+    
     def check_alerts(self):
         """Check all active alerts against current prices."""
+        with ALERT_CHECK_SECONDS.time():
+            self._check_alerts()
+    
+    def _check_alerts(self):
         active_alerts = self.alert_service.get_active_alerts()
+        ALERTS_ACTIVE.set(len(active_alerts))
         
         if not active_alerts:
             logger.info("No active alerts to check")
@@ -75,47 +121,57 @@ class PriceMonitorService:
         
         logger.info(f"Checking {len(active_alerts)} active alerts")
         
-        for alert in active_alerts:
+        # Quote every alerted symbol in one request, then evaluate all rules at once
+        quotes = self.get_current_quotes([alert['symbol'] for alert in active_alerts])
+        ALERTS_EVALUATED.inc(sum(1 for alert in active_alerts if alert['symbol'] in quotes))
+        triggered, rearmed, held = self.rule_engine.evaluate(active_alerts, quotes)
+        ALERTS_HELD.inc(held)
+        ALERTS_REARMED.inc(len(rearmed))
+        if rearmed:
+            logger.info(f"Re-armed {len(rearmed)} recurring alerts")
+        if not triggered and not rearmed:
+            return
+        
+        # Mark the alerts as triggered (and re-armed) with one write of the alerts file
+        marked = self.alert_service.mark_alerts_triggered(
+            {alert['id']: price for alert, price, _ in triggered}, rearmed
+        )
+        marked = {alert['id'] for alert in marked}
+        
+        sent = 0
+        for alert, current_price, message in triggered:
+            if alert['id'] not in marked:
+                continue  # Deleted by the app since this check started
             symbol = alert['symbol']
-            threshold = alert['price_threshold']
-            alert_type = alert['alert_type']
-            
-            current_price = self.get_current_price(symbol)
-            if current_price is None:
-                continue
+            logger.info(f"Alert triggered ({describe_rule(alert)}): {message}")
+            ALERTS_TRIGGERED.inc()
             
-            # Log the check with price and threshold
-            logger.info(f"Checking {symbol} alert: current price ${current_price:.6f}, {alert_type} threshold ${threshold:.6f}")
+            if alert.get('recurring'):
+                # One-shot alerts leave the active list when they trigger, so they
+                # are always notified; recurring ones fire again and can be capped
+                if sent >= self.max_notifications:
+                    logger.warning(f"Notification limit of {self.max_notifications} per check reached, not notifying recurring {symbol} alert")
+                    NOTIFICATIONS.inc(channel='whatsapp', result='suppressed')
+                    continue
+                sent += 1
             
-            # Check if alert condition is met
-            is_triggered = False
-            if alert_type == 'above' and current_price >= threshold:
-                is_triggered = True
-                message = f"{symbol} price is now ${current_price:.2f}, above your threshold of ${threshold:.2f}"
-            elif alert_type == 'below' and current_price <= threshold:
-                is_triggered = True
-                message = f"{symbol} price is now ${current_price:.2f}, below your threshold of ${threshold:.2f}"
+            # Send notification via Twilio
+            logger.info(f"Attempting to send Twilio notification for {symbol} alert")
             
-            if is_triggered:
-                logger.info(f"Alert triggered: {message}")
-                
-                # Mark alert as triggered
-                triggered_alert = self.alert_service.mark_alert_triggered(alert['id'], current_price)
-                
-                # Send notification via Twilio
-                logger.info(f"Attempting to send Twilio notification for {symbol} alert")
-                
-                # Try to send the message using the template
+            # Price thresholds fit the "symbol at price" template; other rules say what happened
+            with NOTIFICATION_SECONDS.time(channel='whatsapp'):
                 success = self.twilio_service.send_whatsapp_message(
                     symbol=symbol,
-                    price=f"{current_price:.2f}"
+                    price=f"{current_price:.2f}",
+                    message=None if alert['alert_type'] in PRICE_RULES else message
                 )
-                
-                # Log the result
-                if success:
-                    logger.info(f"Twilio notification sent successfully for {symbol} alert")
-                else:
-                    logger.error(f"Failed to send Twilio notification for {symbol} alert")
+            NOTIFICATIONS.inc(channel='whatsapp', result='sent' if success else 'failed')
+            
+            # Log the result
+            if success:
+                logger.info(f"Twilio notification sent successfully for {symbol} alert")
+            else:
+                logger.error(f"Failed to send Twilio notification for {symbol} alert")
     
     def _monitor_loop(self):
         """Main monitoring loop that runs in a separate thread."""
@@ -139,6 +195,8 @@ class PriceMonitorService:
             return False
         
         self.is_running = True
+        # Expose the process metrics while the monitor runs (MBT_METRICS_PORT=0 disables)
+        start_metrics_server()
         self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
         self.monitor_thread.start()
         logger.info(f"Price monitor started with check interval of {self.check_interval} seconds")
@@ -0,0 +1,518 @@
+"""
+Vectorized evaluation of alert rules.
+
+Besides fixed price levels, alerts can watch the indicators drawn by
+create_stock_plot: EMA20/EMA50 crosses, 20D high breakouts, 10D low
+breakdowns and RSI(14) levels, plus percent moves from the previous close
+and volume spikes against the 20D average. Intraday rules compare the
+quote with the price INTRADAY_MINUTES ago in the current session, read
+from INTRADAY_INTERVAL bars.
+
+Indicators are split into the part that only depends on completed
+sessions, computed once per symbol and session from daily bars, and the
+live bar, which is the latest quote. A check then only extends the
+completed state by one price per symbol and compares all rules of a type
+at once, so its cost barely grows with the number of rules.
+
+Recurring alerts stay active after they trigger. They are disarmed until
+their condition clears by a hysteresis band (a fraction of the rule's
+level), so a price wobbling around a threshold doesn't notify on every
+check, and an armed alert still waits out its cooldown and its budget of
+triggers per RATE_WINDOW before it fires again.
+"""
+import logging
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from src.utils.market_calendar import calendar_for
+
+logger = logging.getLogger('price_monitor')
+
+# Rule types as shown in the alert form
+RULE_TYPES = {
+    'above': 'Price goes above',
+    'below': 'Price goes below',
+    'pct_up': 'Rises % from previous close',
+    'pct_down': 'Falls % from previous close',
+    'ema_cross_up': 'EMA20 crosses above EMA50',
+    'ema_cross_down': 'EMA20 crosses below EMA50',
+    'breakout_20d': 'Breaks above 20D high',
+    'breakdown_10d': 'Breaks below 10D low',
+    'rsi_above': 'RSI(14) goes above',
+    'rsi_below': 'RSI(14) goes below',
+    'volume_spike': 'Volume spike vs 20D average',
+    'intraday_up': 'Rises % within the last hour',
+    'intraday_down': 'Falls % within the last hour',
+}
+PRICE_RULES = ('above', 'below')  # Only need a quote, no history
+INTRADAY_RULES = ('intraday_up', 'intraday_down')  # Need the current session's intraday bars
+VALUELESS_RULES = ('ema_cross_up', 'ema_cross_down', 'breakout_20d', 'breakdown_10d')
+DEFAULT_VALUES = {'pct_up': 5.0, 'pct_down': 5.0, 'rsi_above': 80.0, 'rsi_below': 50.0, 'volume_spike': 2.0,
+                  'intraday_up': 2.0, 'intraday_down': 2.0}
+_CODES = {rule_type: code for code, rule_type in enumerate(RULE_TYPES)}
+
+# Same settings as the chart
+EMA_FAST = 20
+EMA_SLOW = 50
+BREAKOUT_SESSIONS = 20
+BREAKDOWN_SESSIONS = 10
+RSI_PERIODS = 14
+VOLUME_SESSIONS = 20
+HISTORY_PERIOD = '6mo'  # Daily bars fetched per symbol; enough for EMA50 to settle
+INTRADAY_INTERVAL = '5m'  # Bars the intraday rules read the reference price from
+INTRADAY_MINUTES = 60  # Window of the intraday rules
+
+# Recurring alerts
+DEFAULT_HYSTERESIS = 1.0  # Percent of the rule's level the condition must clear by before re-arming
+DEFAULT_COOLDOWN = 15 * 60  # Minimum seconds between two triggers of an alert
+DEFAULT_MAX_TRIGGERS = 5  # Triggers allowed per RATE_WINDOW
+RATE_WINDOW = 24 * 60 * 60  # Seconds
+
+# Completed-session state kept per symbol
+STATE_FIELDS = ('prev_close', 'ema_fast', 'ema_slow', 'high', 'low', 'avg_volume', 'rsi_gain', 'rsi_loss')
+
+
+def rule_value(alert):
+    """Parameter of an alert's rule: price level, percent, RSI level or volume multiple (NaN if it has none)."""
+    value = alert.get('value')
+    if value is None:
+        value = alert.get('price_threshold')
+    if value is None:
+        value = DEFAULT_VALUES.get(alert['alert_type'], np.nan)
+    return float(value)
+
+
+def describe_rule(alert):
+    """Human readable condition of an alert, e.g. 'RSI(14) goes above 80'."""
+    alert_type = alert['alert_type']
+    value = rule_value(alert)
+    if alert_type in PRICE_RULES:
+        return f"Price goes {alert_type} ${value:,.4f}"
+    if alert_type == 'pct_up':
+        return f"Rises {value:g}% from previous close"
+    if alert_type == 'pct_down':
+        return f"Falls {value:g}% from previous close"
+    if alert_type in ('rsi_above', 'rsi_below'):
+        return f"{RULE_TYPES[alert_type]} {value:g}"
+    if alert_type == 'volume_spike':
+        return f"Volume reaches {value:g}x its 20D average"
+    if alert_type in INTRADAY_RULES:
+        return f"{'Rises' if alert_type == 'intraday_up' else 'Falls'} {value:g}% within the last hour"
+    return RULE_TYPES.get(alert_type, alert_type)
+
+
+def describe_repeat(alert):
+    """How an alert repeats, e.g. 'Every 15 min, 1% band, max 5/day', or 'Once'."""
+    if not alert.get('recurring'):
+        return "Once"
+    cooldown = alert.get('cooldown', DEFAULT_COOLDOWN)
+    return (f"Every {cooldown / 60:g} min, {alert.get('hysteresis', DEFAULT_HYSTERESIS):g}% band, "
+            f"max {alert.get('max_triggers', DEFAULT_MAX_TRIGGERS)}/day")
+
+
+def _epoch(iso_datetime):
+    return datetime.fromisoformat(iso_datetime).timestamp() if iso_datetime else -np.inf
+
+
+def _tail_valid(values, valid, n):
+    """Last n valid values of every row, NaN-padded at the front; shape (rows, n)."""
+    if values.shape[1] < n:
+        pad = n - values.shape[1]
+        values = np.pad(values, ((0, 0), (pad, 0)), constant_values=np.nan)
+        valid = np.pad(valid, ((0, 0), (pad, 0)), constant_values=False)
+    # Stable sort puts the invalid dates first and keeps the valid ones in order
+    order = np.argsort(valid, axis=1, kind='stable')[:, -n:]
+    return np.where(np.take_along_axis(valid, order, axis=1), np.take_along_axis(values, order, axis=1), np.nan)
+
+
+def _ema(values, span):
+    """EMA of every row at its last value (adjust=False, like calculate_ema); NaN bars are skipped."""
+    alpha = 2 / (span + 1)
+    ema = np.full(len(values), np.nan)
+    for column in values.T:
+        ema = np.where(np.isnan(ema), column, np.where(np.isnan(column), ema, ema + alpha * (column - ema)))
+    return ema
+
+
+def completed_state(panel, now=None):
+    """
+    Compute the completed-session indicator state of every symbol in a panel.
+
+    Bars of each symbol's current session (per its market calendar) are
+    left out: the live quote stands in for them.
+
+    Args:
+        panel: PricePanel of daily bars
+        now: Time to evaluate (default: now)
+
+    Returns:
+        dict: STATE_FIELDS -> float64 arrays, one value per panel symbol
+    """
+    now = pd.Timestamp.now(tz='UTC') if now is None else pd.Timestamp(now)
+    fields = {name: panel.field(name).astype(np.float64) for name in ('Close', 'High', 'Low', 'Volume')}
+
+    # Hide the live session of every symbol; symbols are grouped by calendar
+    calendars = {}
+    for row, symbol in enumerate(panel.symbols):
+        calendars.setdefault(calendar_for(symbol), []).append(row)
+    for calendar, rows in calendars.items():
+        dates = panel.dates if panel.dates.tz is not None else panel.dates.tz_localize(calendar.timezone)
+        live = dates.tz_convert(calendar.timezone).normalize() >= calendar.last_session(now)
+        if live.any():
+            for values in fields.values():
+                values[np.ix_(rows, np.flatnonzero(live))] = np.nan
+
+    closes = fields['Close']
+    valid = ~np.isnan(closes)
+    last_closes = _tail_valid(closes, valid, RSI_PERIODS + 1)
+    # The live delta completes the RSI window, so only the last RSI_PERIODS - 1 completed ones are kept
+    deltas = np.diff(last_closes, axis=1)[:, 1:]
+    with np.errstate(invalid='ignore'):
+        return {
+            'prev_close': last_closes[:, -1],
+            'ema_fast': _ema(closes, EMA_FAST),
+            'ema_slow': _ema(closes, EMA_SLOW),
+            'high': np.fmax.reduce(_tail_valid(fields['High'], valid, BREAKOUT_SESSIONS), axis=1),
+            'low': np.fmin.reduce(_tail_valid(fields['Low'], valid, BREAKDOWN_SESSIONS), axis=1),
+            'avg_volume': _nanmean(_tail_valid(fields['Volume'], valid, VOLUME_SESSIONS)),
+            'rsi_gain': np.nansum(np.clip(deltas, 0, None), axis=1),
+            'rsi_loss': np.nansum(np.clip(-deltas, 0, None), axis=1),
+        }
+
+
+def _nanmean(values):
+    counts = (~np.isnan(values)).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, np.nansum(values, axis=1) / counts, np.nan)
+
+
+def intraday_reference(panel, now=None, minutes=INTRADAY_MINUTES):
+    """
+    Price of every symbol in a panel a number of minutes ago, within its current session.
+
+    This is the open of the first bar starting at or after that time, so
+    early in a session it is the session's opening price. Symbols whose
+    market is closed have no bars in the window and get NaN.
+
+    Args:
+        panel: PricePanel of intraday bars
+        now: Time to evaluate (default: now)
+        minutes: How far back to look
+
+    Returns:
+        np.ndarray: float64 reference price per panel symbol
+    """
+    now = pd.Timestamp.now(tz='UTC') if now is None else pd.Timestamp(now)
+    if now.tz is None:
+        now = now.tz_localize('UTC')
+    reference = np.full(len(panel), np.nan)
+    opens = panel.field('Open')
+    calendars = {}
+    for row, symbol in enumerate(panel.symbols):
+        calendars.setdefault(calendar_for(symbol), []).append(row)
+    for calendar, rows in calendars.items():
+        if not calendar.is_open(now):
+            continue
+        dates = panel.dates if panel.dates.tz is not None else panel.dates.tz_localize(calendar.timezone)
+        dates = dates.tz_convert(calendar.timezone)
+        window = (dates >= now - pd.Timedelta(minutes=minutes)) & (dates <= now) \
+            & (dates.normalize() == calendar.last_session(now))
+        values = opens[np.ix_(rows, np.flatnonzero(window))].astype(np.float64)
+        valid = ~np.isnan(values)
+        first = valid.argmax(axis=1)
+        found = valid.any(axis=1)
+        reference[np.asarray(rows)[found]] = values[found, first[found]]
+    return reference
+
+
+class _CompiledRules:
+    """Active alerts as arrays: one entry per rule, indexed into the unique symbols."""
+
+    def __init__(self, alerts):
+        self.alerts = list(alerts)
+        self.symbols = list(dict.fromkeys(alert['symbol'] for alert in self.alerts))
+        self.symbol_positions = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.positions = np.array([self.symbol_positions[alert['symbol']] for alert in self.alerts], dtype=np.intp)
+        self.codes = np.array([_CODES.get(alert['alert_type'], -1) for alert in self.alerts], dtype=np.int8)
+        self.values = np.array([rule_value(alert) for alert in self.alerts], dtype=np.float64)
+        self.types = [rule_type for rule_type in RULE_TYPES if (self.codes == _CODES[rule_type]).any()]
+        # Arming state; one-shot alerts are always armed and never held back
+        self.recurring = np.array([bool(alert.get('recurring')) for alert in self.alerts], dtype=bool)
+        self.armed = np.array([alert.get('armed', True) for alert in self.alerts], dtype=bool)
+        self.bands = np.array([alert.get('hysteresis', DEFAULT_HYSTERESIS) for alert in self.alerts],
+                              dtype=np.float64) / 100
+        self.cooldowns = np.array([alert.get('cooldown', DEFAULT_COOLDOWN) if alert.get('recurring') else 0
+                                   for alert in self.alerts], dtype=np.float64)
+        self.last_triggered = np.array([_epoch(alert.get('last_triggered_at')) for alert in self.alerts])
+        # The trigger that used up the budget: firing waits until it leaves the rate window
+        self.budget_used_at = np.array([self._budget_used_at(alert) for alert in self.alerts])
+        self.needs_history = any(rule_type not in PRICE_RULES + INTRADAY_RULES for rule_type in self.types)
+        self.history_symbols = list(dict.fromkeys(
+            alert['symbol'] for alert in self.alerts if alert['alert_type'] not in PRICE_RULES + INTRADAY_RULES
+        ))
+        self.intraday_symbols = list(dict.fromkeys(
+            alert['symbol'] for alert in self.alerts if alert['alert_type'] in INTRADAY_RULES
+        ))
+
+    @staticmethod
+    def _budget_used_at(alert):
+        recent = alert.get('recent_triggers') or []
+        limit = alert.get('max_triggers', DEFAULT_MAX_TRIGGERS)
+        if not alert.get('recurring') or len(recent) < limit:
+            return -np.inf
+        return _epoch(recent[-limit])
+
+
+class RuleEngine:
+    """Evaluates all active alerts against a round of quotes at once."""
+
+    def __init__(self, history, intraday=None):
+        """
+        Initialize the engine.
+
+        Args:
+            history: Callable(symbols) returning a PricePanel of daily bars
+                reaching HISTORY_PERIOD back
+            intraday: Callable(symbols) returning a PricePanel of the current
+                session's INTRADAY_INTERVAL bars (None: intraday rules never fire)
+        """
+        self.history = history
+        self.intraday = intraday
+        self.rows = {}  # symbol -> row in the state arrays
+        self.sessions = {}  # symbol -> session its state was computed for
+        self.state = {name: np.empty(0) for name in STATE_FIELDS}
+        self.last_spread = np.empty(0)  # EMA_FAST - EMA_SLOW at the previous check, for crosses
+        self._compiled = None
+        self._compiled_key = None
+        self._lock = threading.Lock()
+
+    def compile(self, alerts):
+        """Turn alerts into rule arrays; reused while the alerts don't change."""
+        key = tuple((a['id'], a['symbol'], a['alert_type'], a.get('value'), a.get('price_threshold'),
+                     a.get('armed'), a.get('last_triggered_at'), a.get('hysteresis'), a.get('cooldown'),
+                     a.get('max_triggers')) for a in alerts)
+        if key != self._compiled_key:
+            self._compiled = _CompiledRules(alerts)
+            self._compiled_key = key
+        return self._compiled
+
+    def _ensure_rows(self, symbols):
+        new = [symbol for symbol in symbols if symbol not in self.rows]
+        if not new:
+            return
+        for symbol in new:
+            self.rows[symbol] = len(self.rows)
+        for name in STATE_FIELDS:
+            self.state[name] = np.concatenate((self.state[name], np.full(len(new), np.nan)))
+        self.last_spread = np.concatenate((self.last_spread, np.full(len(new), np.nan)))
+
+    def refresh_state(self, symbols, now=None):
+        """
+        Compute the completed-session state of symbols that have none for the current session.
+
+        One history request covers all of them; the state is then reused
+        for every check until the next session starts.
+        """
+        now = pd.Timestamp.now(tz='UTC') if now is None else pd.Timestamp(now)
+        stale = [s for s in symbols if self.sessions.get(s) != calendar_for(s).last_session(now)]
+        if not stale:
+            return
+        try:
+            panel = self.history(stale)
+        except Exception as e:
+            # Indicator rules of these symbols stay quiet until the next check retries
+            logger.error(f"Error getting history for {len(stale)} symbols: {e}")
+            return
+        self._ensure_rows(stale)
+        state = completed_state(panel.select(stale), now) if len(panel) else None
+        found = {symbol: i for i, symbol in enumerate(s for s in stale if s in panel)}
+        for symbol in stale:
+            row = self.rows[symbol]
+            for name in STATE_FIELDS:
+                self.state[name][row] = state[name][found[symbol]] if symbol in found else np.nan
+            self.last_spread[row] = self.state['ema_fast'][row] - self.state['ema_slow'][row]
+            self.sessions[symbol] = calendar_for(symbol).last_session(now)
+
+    def reference_prices(self, symbols, now=None):
+        """
+        Price of symbols INTRADAY_MINUTES ago in their current session, from fresh intraday bars.
+
+        Returns:
+            np.ndarray: float64 price per symbol, NaN without bars (e.g. outside market hours)
+        """
+        reference = np.full(len(symbols), np.nan)
+        if self.intraday is None or not symbols:
+            return reference
+        try:
+            panel = self.intraday(symbols)
+        except Exception as e:
+            # Intraday rules of these symbols stay quiet until the next check retries
+            logger.error(f"Error getting intraday bars for {len(symbols)} symbols: {e}")
+            return reference
+        found = intraday_reference(panel, now)
+        for i, symbol in enumerate(symbols):
+            if symbol in panel:
+                reference[i] = found[panel.rows[symbol]]
+        return reference
+
+    def live_indicators(self, symbols, quotes):
+        """
+        Extend the completed state of symbols by their live quote.
+
+        Returns:
+            dict of arrays aligned with symbols: 'price', 'pct', 'ema_fast',
+            'ema_slow', 'high', 'low', 'rsi', 'volume_ratio', and 'rows' (state
+            row of each symbol, -1 without state)
+        """
+        price = np.array([quotes[s]['price'] if s in quotes else np.nan for s in symbols], dtype=np.float64)
+        volume = np.array([(quotes[s].get('volume') if s in quotes else None) or np.nan for s in symbols],
+                          dtype=np.float64)
+        rows = np.array([self.rows.get(s, -1) for s in symbols], dtype=np.intp)
+        known = rows >= 0
+
+        def state(name):
+            values = np.full(len(symbols), np.nan)
+            values[known] = self.state[name][rows[known]]
+            return values
+
+        prev_close = state('prev_close')
+        delta = price - prev_close
+        with np.errstate(invalid='ignore', divide='ignore'):
+            gain = state('rsi_gain') + np.clip(delta, 0, None)
+            loss = state('rsi_loss') + np.clip(-delta, 0, None)
+            ema_fast, ema_slow = state('ema_fast'), state('ema_slow')
+            return {
+                'price': price,
+                'pct': (price / prev_close - 1) * 100,
+                'ema_fast': ema_fast + 2 / (EMA_FAST + 1) * (price - ema_fast),
+                'ema_slow': ema_slow + 2 / (EMA_SLOW + 1) * (price - ema_slow),
+                'high': state('high'),
+                'low': state('low'),
+                'rsi': 100 - 100 / (1 + gain / loss),
+                'volume_ratio': volume / state('avg_volume'),
+                'rows': rows,
+            }
+
+    def evaluate(self, alerts, quotes, now=None):
+        """
+        Check every alert against the latest quotes.
+
+        Args:
+            alerts: Active alert dicts
+            quotes: symbol -> quote dict ('price', optionally 'volume')
+            now: Time of the check (default: now)
+
+        Returns:
+            tuple: (triggered, rearmed, held) where triggered lists
+            (alert, price, message) of the alerts that fire, rearmed lists
+            the IDs of disarmed recurring alerts whose condition cleared,
+            and held counts armed alerts whose condition is met but that
+            wait for their cooldown or trigger budget
+        """
+        now = pd.Timestamp.now(tz='UTC') if now is None else pd.Timestamp(now)
+        with self._lock:
+            rules = self.compile(alerts)
+            if not rules.alerts:
+                return [], [], 0
+            if rules.needs_history:
+                self.refresh_state(rules.history_symbols, now)
+            live = self.live_indicators(rules.symbols, quotes)
+            reference = np.full(len(rules.symbols), np.nan)
+            if rules.intraday_symbols:
+                at = [rules.symbol_positions[symbol] for symbol in rules.intraday_symbols]
+                reference[at] = self.reference_prices(rules.intraday_symbols, now)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                live['intraday'] = (live['price'] / reference - 1) * 100
+            hit = np.zeros(len(rules.alerts), dtype=bool)
+            clear = np.zeros(len(rules.alerts), dtype=bool)
+
+            spread = live['ema_fast'] - live['ema_slow']
+            rows = live['rows']
+            previous = np.full(len(rows), np.nan)
+            previous[rows >= 0] = self.last_spread[rows[rows >= 0]]
+
+            with np.errstate(invalid='ignore'):
+                for rule_type in rules.types:
+                    mask = rules.codes == _CODES[rule_type]
+                    at = rules.positions[mask]
+                    value = rules.values[mask]
+                    band = rules.bands[mask]
+                    price = live['price'][at]
+                    # hit: the condition is met; cleared: it is off by more than the band
+                    if rule_type == 'above':
+                        hit[mask], clear[mask] = price >= value, price < value * (1 - band)
+                    elif rule_type == 'below':
+                        hit[mask], clear[mask] = price <= value, price > value * (1 + band)
+                    elif rule_type == 'pct_up':
+                        pct = live['pct'][at]
+                        hit[mask], clear[mask] = pct >= value, pct < value * (1 - band)
+                    elif rule_type == 'pct_down':
+                        pct = live['pct'][at]
+                        hit[mask], clear[mask] = pct <= -value, pct > -value * (1 - band)
+                    elif rule_type == 'ema_cross_up':
+                        hit[mask] = (previous[at] <= 0) & (spread[at] > 0)
+                        clear[mask] = spread[at] < -band * price
+                    elif rule_type == 'ema_cross_down':
+                        hit[mask] = (previous[at] >= 0) & (spread[at] < 0)
+                        clear[mask] = spread[at] > band * price
+                    elif rule_type == 'breakout_20d':
+                        high = live['high'][at]
+                        hit[mask], clear[mask] = price > high, price < high * (1 - band)
+                    elif rule_type == 'breakdown_10d':
+                        low = live['low'][at]
+                        hit[mask], clear[mask] = price < low, price > low * (1 + band)
+                    elif rule_type == 'rsi_above':
+                        rsi = live['rsi'][at]
+                        hit[mask], clear[mask] = rsi > value, rsi < value * (1 - band)
+                    elif rule_type == 'rsi_below':
+                        rsi = live['rsi'][at]
+                        hit[mask], clear[mask] = rsi < value, rsi > value * (1 + band)
+                    elif rule_type == 'intraday_up':
+                        move = live['intraday'][at]
+                        hit[mask], clear[mask] = move >= value, move < value * (1 - band)
+                    elif rule_type == 'intraday_down':
+                        move = live['intraday'][at]
+                        hit[mask], clear[mask] = move <= -value, move > -value * (1 - band)
+                    else:
+                        ratio = live['volume_ratio'][at]
+                        hit[mask], clear[mask] = ratio >= value, ratio < value * (1 - band)
+
+            # Crosses compare against the spread seen by this check next time
+            seen = (rows >= 0) & ~np.isnan(spread)
+            self.last_spread[rows[seen]] = spread[seen]
+
+            epoch = now.timestamp()
+            ready = (epoch - rules.last_triggered >= rules.cooldowns) & (epoch - rules.budget_used_at >= RATE_WINDOW)
+            fire = hit & rules.armed & ready
+            rearm = rules.recurring & ~rules.armed & clear
+            rules.armed[fire] = False
+            rules.armed[rearm] = True
+
+            triggered = [
+                (rules.alerts[i], float(live['price'][rules.positions[i]]), self._message(rules.alerts[i], live, rules.positions[i]))
+                for i in np.flatnonzero(fire)
+            ]
+            return triggered, [rules.alerts[i]['id'] for i in np.flatnonzero(rearm)], int((hit & rules.armed & ~ready).sum())
+
+    @staticmethod
+    def _message(alert, live, position):
+        symbol = alert['symbol']
+        price = live['price'][position]
+        alert_type = alert['alert_type']
+        if alert_type in PRICE_RULES:
+            return f"{symbol} price is now ${price:.2f}, {alert_type} your threshold of ${rule_value(alert):.2f}"
+        if alert_type in ('pct_up', 'pct_down'):
+            return f"{symbol} price is now ${price:.2f}, {live['pct'][position]:+.2f}% from the previous close"
+        if alert_type in INTRADAY_RULES:
+            return f"{symbol} price is now ${price:.2f}, {live['intraday'][position]:+.2f}% within the last hour"
+        if alert_type in ('rsi_above', 'rsi_below'):
+            return f"{symbol} RSI(14) is now {live['rsi'][position]:.1f} at ${price:.2f}"
+        if alert_type == 'volume_spike':
+            return f"{symbol} volume is {live['volume_ratio'][position]:.1f}x its 20D average at ${price:.2f}"
+        if alert_type == 'breakout_20d':
+            return f"{symbol} price ${price:.2f} broke above its 20D high of ${live['high'][position]:.2f}"
+        if alert_type == 'breakdown_10d':
+            return f"{symbol} price ${price:.2f} broke below its 10D low of ${live['low'][position]:.2f}"
+        direction = 'above' if alert_type == 'ema_cross_up' else 'below'
+        return f"{symbol} EMA20 crossed {direction} EMA50 at ${price:.2f}"
@@ -1,5 +1,67 @@
-from src.utils.data_loader import get_stock_data, clean_stock_data
+import warnings
+import numpy as np
+from src.utils.data_loader import get_stock_data, get_panel_data, get_daily_data, clean_stock_data
+from src.utils.resample import period_ranges
+from src.utils.market_calendar import calendar_for
 from src.utils.indicators import is_near_high
+from src.utils.price_panel import PricePanel
+from src.utils.profiling import timed
+
+class DiffTable:
+    """Per-panel table of diff_percent for all symbols, sorted for threshold lookups."""
+    
+    def __init__(self, panel):
+        """
+        Compute the screen metrics of every symbol in the panel.
+        
+        Args:
+            panel: PricePanel to screen
+        """
+        self.panel = panel
+        if not len(panel) or not len(panel.dates):
+            self.order = np.empty(0, dtype=np.intp)
+            self.sorted_diffs = np.empty(0, dtype=np.float32)
+            return
+        
+        # Symbols without bars in the window reduce to NaN and sort last
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            self.current_prices = panel.last_valid('Close')
+            self.period_highs = np.nanmax(panel.field('High'), axis=1)
+            self.period_lows = np.nanmin(panel.field('Low'), axis=1)
+            self.average_volumes = np.nanmean(panel.field('Volume'), axis=1, dtype=np.float64)
+            self.diff_percents = np.abs((self.period_highs - self.current_prices) / self.period_highs) * 100
+        
+        self.order = np.argsort(self.diff_percents, kind='stable')
+        self.sorted_diffs = self.diff_percents[self.order]
+    
+    def __len__(self):
+        return len(self.order)
+    
+    def count_within(self, threshold):
+        """Number of symbols within threshold percent of their high (bisection)."""
+        return int(np.searchsorted(self.sorted_diffs, threshold, side='right'))
+    
+    def within(self, threshold):
+        """
+        Get the symbols within threshold percent of their period high.
+        
+        Returns:
+            list: Stock info dicts in watchlist order
+        """
+        rows = np.sort(self.order[:self.count_within(threshold)])
+        return [
+            {
+                'symbol': self.panel.symbols[i],
+                'panel': self.panel,
+                'current_price': self.current_prices[i],
+                'period_high': self.period_highs[i],
+                'period_low': self.period_lows[i],
+                'average_volume': self.average_volumes[i],
+                'diff_percent': self.diff_percents[i]
+            }
+            for i in rows
+        ]
 
 class StockService:
     def __init__(self):
@@ -10,9 +72,9 @@ class StockService:
             "1y": "1 Year"
         }
 
-    def get_stock_info(self, symbol, period):
+    def get_stock_info(self, symbol, period, interval='1d'):
         try:
-            data = get_stock_data(symbol, period=period)
+            data = get_stock_data(symbol, period=period, interval=interval)
             if data.empty:
                 return None
                 
@@ -20,11 +82,14 @@ class StockService:
             if data.empty:
                 return None
             
+            # Keep the data as a one-symbol panel, like the screener results
+            panel = PricePanel.from_frames({symbol: data})
+            data = panel.frame(symbol)
             _, diff_percent, period_high = is_near_high(data)
                 
             return {
                 'symbol': symbol,
-                'data': data,
+                'panel': panel,
                 'current_price': data['Close'].iloc[-1],
                 'period_high': period_high,
                 'period_low': data['Low'].min(),
@@ -34,28 +99,40 @@ class StockService:
         except Exception:
             return None
 
-    def get_filtered_stocks(self, symbols, period, threshold):
-        filtered_results = []
-        for symbol in symbols:
-            try:
-                data = get_stock_data(symbol, period=period)
-                if not data.empty:
-                    data = clean_stock_data(data)
-                    if not data.empty:
-                        is_near, diff_percent, period_high = is_near_high(data, threshold)
-                        if is_near:
-                            filtered_results.append({
-                                'symbol': symbol,
-                                'data': data,
-                                'current_price': data['Close'].iloc[-1],
-                                'period_high': period_high,
-                                'period_low': data['Low'].min(),
-                                'average_volume': data['Volume'].mean(),
-                                'diff_percent': diff_percent
-                            })
-            except Exception:
-                continue
-        return filtered_results
+    def get_filtered_stocks(self, symbols, period, threshold, interval='1d'):
+        """
+        Screen symbols for prices near their period high.
+        
+        All symbols are fetched into a single PricePanel and screened with
+        array reductions; each result references the shared panel instead of
+        holding its own DataFrame.
+        
+        Returns:
+            list: Stock info dicts for the symbols within threshold percent of their high
+        """
+        return self.screen_panel(get_panel_data(symbols, period=period, interval=interval), threshold)
+
+    def screen_panel(self, panel, threshold):
+        """
+        Screen an already fetched PricePanel for prices near their period high.
+        
+        Returns:
+            list: Stock info dicts for the symbols within threshold percent of their high
+        """
+        return self.build_diff_table(panel).within(threshold)
+
+    @timed('screen')
+    def build_diff_table(self, panel):
+        """
+        Compute the distance to the period high of every symbol in a panel.
+        
+        The table is sorted by diff_percent, so it answers any threshold
+        without touching the price data again; cache it per panel.
+        
+        Returns:
+            DiffTable for the panel
+        """
+        return DiffTable(panel)
 
     def calculate_technical_indicators(self, data, rsi_period=14, ema_period=20):
         # Calculate RSI
@@ -71,19 +148,23 @@ class StockService:
         return rsi.iloc[-1], ema.iloc[-1]
 
     def get_period_data(self, symbol, periods=None):
+        """
+        High and low of a symbol over several periods.
+        
+        All periods come from one fetch of the daily series and a single
+        suffix max/min pass over it; each period starts at its first
+        trading session in the symbol's market calendar.
+        
+        Returns:
+            dict: period -> {'high', 'low'}, or None if there is no data
+        """
         if periods is None:
             periods = ['1mo', '3mo', '6mo', '1y']
-            
-        period_data = {}
-        for period in periods:
-            try:
-                data = get_stock_data(symbol, period=period)
-                if not data.empty:
-                    data = clean_stock_data(data)
-                    period_data[period] = {
-                        'high': data['High'].max(),
-                        'low': data['Low'].min()
-                    }
-            except Exception:
-                period_data[period] = None
-        return period_data 
\ No newline at end of file
+        
+        data = clean_stock_data(get_daily_data(symbol))
+        try:
+            calendar = calendar_for(symbol)
+            end = data.index[-1] if not data.empty else None
+            return period_ranges(data, {period: calendar.period_start(period, end) for period in periods})
+        except Exception:
+            return {period: None for period in periods} 
\ No newline at end of file
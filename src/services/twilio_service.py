@@ -1,7 +1,8 @@
 import os
+import json
 import logging
 import streamlit as st
-from twilio.rest import Client
+from src.services.http_transport import get_transport
 
 # Configure logging
 logging.basicConfig(
@@ -14,9 +15,16 @@ logger = logging.getLogger('twilio_service')
 class TwilioService:
     """Service to handle WhatsApp message sending via Twilio."""
     
-    def __init__(self):
-        """Initialize the Twilio service using Streamlit secrets."""
+    def __init__(self, transport=None):
+        """
+        Initialize the Twilio service using Streamlit secrets.
+        
+        Args:
+            transport: HttpTransport whose pooled session the client uses (default: shared transport)
+        """
         self.client = None
+        self.rule_template_sid = None
+        self.transport = transport or get_transport()
         
         try:
             # Get credentials from Streamlit secrets
@@ -25,10 +33,14 @@ class TwilioService:
             self.from_number = st.secrets.get("TWILIO_WHATSAPP_NUMBER")
             self.to_number = st.secrets.get("TO_WHATSAPP_NUMBER")
             self.template_sid = "HXb5b62575e6e4ff6129ad7c8efe1f983e"  # Content SID for the template
+            # Optional template with a third variable for the rule's message
+            self.rule_template_sid = st.secrets.get("TWILIO_RULE_TEMPLATE_SID")
             
             # Initialize Twilio client if credentials are available
             if self.account_sid and self.auth_token:
-                self.client = Client(self.account_sid, self.auth_token)
+                from twilio.rest import Client
+                self.client = Client(self.account_sid, self.auth_token,
+                                     http_client=self.transport.twilio_http_client())
                 logger.info("Twilio client initialized successfully")
             else:
                 logger.warning("Twilio credentials not found in Streamlit secrets")
@@ -47,9 +59,15 @@ class TwilioService:
         """
         Send a WhatsApp message using a template.
         
+        The default template only reads "symbol at price". When a message
+        is given (alerts other than price thresholds), it goes in the third
+        variable of TWILIO_RULE_TEMPLATE_SID, or without that template as a
+        free-form body, which WhatsApp only delivers within 24 hours of the
+        recipient's last message.
+        
         Args:
             to_number: Optional override for recipient's phone number
-            message: Not used when using templates, kept for compatibility
+            message: Text describing what triggered, e.g. the rule engine's message
             symbol: Stock symbol for the template
             price: Current price for the template
             
@@ -73,15 +91,24 @@ class TwilioService:
             if not from_number.startswith('whatsapp:'):
                 from_number = f"whatsapp:{from_number}"
             
+            variables = {"1": str(symbol), "2": str(price)}
+            if message is None:
+                content = {'content_sid': self.template_sid, 'content_variables': json.dumps(variables)}
+            elif self.rule_template_sid:
+                variables["3"] = message
+                content = {'content_sid': self.rule_template_sid, 'content_variables': json.dumps(variables)}
+            else:
+                content = {'body': message}
+            
             # Send the message using the template
-            message = self.client.messages.create(
-                from_=from_number,
-                content_sid=self.template_sid,
-                content_variables=f'{{"1":"{symbol}","2":"{price}"}}',
-                to=recipient
-            )
+            with self.transport.track("api.twilio.com"):
+                sent = self.client.messages.create(
+                    from_=from_number,
+                    to=recipient,
+                    **content
+                )
             
-            logger.info(f"WhatsApp message sent successfully for {symbol} at ${price}. SID: {message.sid}")
+            logger.info(f"WhatsApp message sent successfully for {symbol} at ${price}. SID: {sent.sid}")
             return True
             
         except Exception as e:
@@ -0,0 +1,316 @@
+import os
+import json
+import logging
+from datetime import datetime
+import numpy as np
+from src.services.http_transport import get_transport
+
+logger = logging.getLogger('universe_service')
+
+# Remote ticker lists, refreshed into the local cache
+REMOTE_UNIVERSES = {
+    "NASDAQ": "https://raw.githubusercontent.com/rreichel3/US-Stock-Symbols/main/nasdaq/nasdaq_tickers.txt",
+    "NYSE": "https://raw.githubusercontent.com/rreichel3/US-Stock-Symbols/main/nyse/nyse_tickers.txt",
+}
+UNIVERSE_CACHE_DIR = os.path.join('.cache', 'universes')
+REFRESH_INTERVAL = 24 * 60 * 60  # Re-download remote lists at most once a day
+RETRY_INTERVAL = 15 * 60  # Wait before retrying a failed refresh, serving the cached copy meanwhile
+REQUEST_TIMEOUT = 10  # Seconds to wait for a remote list before falling back to the cache
+
+
+class Universe:
+    """An immutable, deduplicated list of symbols with precomputed filter attributes."""
+
+    def __init__(self, name, symbols, exchanges=None, refreshed_at=None, source=None):
+        """
+        Initialize the universe.
+
+        Args:
+            name: Universe name (e.g. 'NASDAQ', 'ARK')
+            symbols: Iterable of symbols, duplicates are dropped preserving order
+            exchanges: Optional exchange per symbol, parallel to symbols
+            refreshed_at: ISO timestamp of the last refresh of the source
+            source: URL or file the symbols came from
+        """
+        if exchanges is None:
+            exchanges = [""] * len(symbols)
+
+        # Keep the first occurrence of every symbol, preserving order
+        by_symbol = {}
+        for symbol, exchange in zip(symbols, exchanges):
+            symbol = symbol.strip().upper() if symbol else ""
+            if symbol:
+                by_symbol.setdefault(symbol, exchange)
+
+        self.name = name
+        self.source = source
+        self.refreshed_at = refreshed_at
+        self.symbols = tuple(by_symbol)
+        self.exchanges = np.array(list(by_symbol.values()), dtype=object)
+        self.lengths = np.fromiter((len(s) for s in self.symbols), dtype=np.uint8, count=len(self.symbols))
+        self._rows = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __iter__(self):
+        return iter(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self._rows
+
+    def __or__(self, other):
+        return self.union(other)
+
+    def __and__(self, other):
+        return self.intersection(other)
+
+    def __sub__(self, other):
+        return self.difference(other)
+
+    def _select(self, mask, name=None):
+        """Build a sub-universe from a boolean mask over the symbols."""
+        indices = np.flatnonzero(mask)
+        return Universe(
+            name or self.name,
+            [self.symbols[i] for i in indices],
+            list(self.exchanges[indices]),
+            refreshed_at=self.refreshed_at,
+            source=self.source
+        )
+
+    def exchange_of(self, symbol):
+        """Get the exchange of a symbol, or an empty string if unknown."""
+        row = self._rows.get(symbol)
+        return "" if row is None else self.exchanges[row]
+
+    def filter(self, max_length=None, exchange=None):
+        """
+        Filter the universe on its precomputed attributes.
+
+        Args:
+            max_length: Keep symbols no longer than this
+            exchange: Keep symbols listed on this exchange
+
+        Returns:
+            A new Universe with the matching symbols
+        """
+        mask = np.ones(len(self.symbols), dtype=bool)
+        if max_length is not None:
+            mask &= self.lengths <= max_length
+        if exchange is not None:
+            mask &= self.exchanges == exchange
+        return self._select(mask)
+
+    def union(self, other):
+        """Symbols in either universe, keeping this universe's order first."""
+        return Universe(
+            f"{self.name}|{other.name}",
+            self.symbols + other.symbols,
+            list(self.exchanges) + list(other.exchanges)
+        )
+
+    def intersection(self, other):
+        """Symbols present in both universes."""
+        mask = np.fromiter((s in other._rows for s in self.symbols), dtype=bool, count=len(self.symbols))
+        return self._select(mask, f"{self.name}&{other.name}")
+
+    def difference(self, other):
+        """Symbols in this universe but not in the other."""
+        mask = np.fromiter((s not in other._rows for s in self.symbols), dtype=bool, count=len(self.symbols))
+        return self._select(mask, f"{self.name}-{other.name}")
+
+    def to_dict(self):
+        """Serialize the universe for the local cache."""
+        return {
+            "name": self.name,
+            "source": self.source,
+            "refreshed_at": self.refreshed_at,
+            "symbols": list(self.symbols),
+            "exchanges": list(self.exchanges)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a universe from its cached form."""
+        return cls(
+            data["name"],
+            data.get("symbols", []),
+            data.get("exchanges"),
+            refreshed_at=data.get("refreshed_at"),
+            source=data.get("source")
+        )
+
+
+class UniverseService:
+    """Service to manage named symbol universes and watchlists."""
+
+    def __init__(self, cache_dir=UNIVERSE_CACHE_DIR, watchlist_dir='.', transport=None):
+        """
+        Initialize the universe service.
+
+        Args:
+            cache_dir: Directory holding the cached copies of remote universes
+            watchlist_dir: Directory scanned for JSON watchlists
+            transport: HttpTransport for downloads (default: shared transport)
+        """
+        self.cache_dir = cache_dir
+        self.watchlist_dir = watchlist_dir
+        self.transport = transport or get_transport()
+        self._universes = {}
+        self._refresh_attempts = {}
+
+    def _cache_path(self, name):
+        return os.path.join(self.cache_dir, f"{name.lower()}.json")
+
+    def _load_cached(self, name):
+        """Load the cached copy of a remote universe, if any."""
+        path = self._cache_path(name)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                return Universe.from_dict(json.load(f))
+        except (json.JSONDecodeError, KeyError) as e:
+            logger.warning(f"Ignoring corrupt universe cache {path}: {e}")
+            return None
+
+    def _save_cached(self, universe):
+        """Write a universe to the local cache."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_path(universe.name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(universe.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    def _is_fresh(self, universe):
+        if universe is None or not universe.refreshed_at:
+            return False
+        age = datetime.now() - datetime.fromisoformat(universe.refreshed_at)
+        return age.total_seconds() < REFRESH_INTERVAL
+
+    def _download(self, name):
+        """Download a remote universe and store it in the cache."""
+        url = REMOTE_UNIVERSES[name]
+        response = self.transport.get(url, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        symbols = response.text.splitlines()
+        universe = Universe(
+            name,
+            symbols,
+            [name] * len(symbols),
+            refreshed_at=datetime.now().isoformat(),
+            source=url
+        )
+        self._save_cached(universe)
+        logger.info(f"Refreshed {name} universe: {len(universe)} symbols")
+        return universe
+
+    def refresh(self, name):
+        """
+        Force a refresh of a remote universe.
+
+        Returns:
+            The refreshed Universe, or the cached copy if the download fails
+        """
+        self._refresh_attempts[name] = datetime.now()
+        try:
+            universe = self._download(name)
+        except Exception as e:
+            logger.warning(f"Could not refresh {name}, using cached copy: {e}")
+            universe = self._load_cached(name) or Universe(name, [])
+        self._universes[name] = universe
+        return universe
+
+    def watchlist_files(self):
+        """List the JSON files in the watchlist directory that hold a symbols list."""
+        files = []
+        for filename in sorted(os.listdir(self.watchlist_dir)):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.watchlist_dir, filename), 'r') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if isinstance(data, dict) and isinstance(data.get('symbols'), list):
+                files.append(filename)
+        return files
+
+    def list_universes(self):
+        """List the names of all available universes."""
+        watchlists = [os.path.splitext(f)[0].upper() for f in self.watchlist_files()]
+        return list(REMOTE_UNIVERSES) + watchlists
+
+    def _load_watchlist(self, name):
+        """Load a watchlist by name ('ARK') or file name ('ark.json')."""
+        filename = name if name.endswith('.json') else f"{name.lower()}.json"
+        path = os.path.join(self.watchlist_dir, filename)
+        with open(path, 'r') as f:
+            data = json.load(f)
+        symbols = data.get('symbols', []) if isinstance(data, dict) else None
+        if not isinstance(symbols, list):
+            raise ValueError(f"{path} has no 'symbols' list")
+        valid = [symbol for symbol in symbols if isinstance(symbol, str)]
+        if len(valid) != len(symbols):
+            logger.warning(f"Skipping {len(symbols) - len(valid)} non-string symbols in {path}")
+        symbols = valid
+
+        # Tag watchlist symbols with the exchange of any cached remote universe
+        exchanges = [""] * len(symbols)
+        for remote_name in REMOTE_UNIVERSES:
+            remote = self._universes.get(remote_name) or self._load_cached(remote_name)
+            if remote is None:
+                continue
+            exchanges = [
+                exchange or (remote_name if symbol.upper() in remote else "")
+                for symbol, exchange in zip(symbols, exchanges)
+            ]
+
+        refreshed_at = datetime.fromtimestamp(os.path.getmtime(path)).isoformat()
+        return Universe(
+            os.path.splitext(filename)[0].upper(),
+            symbols,
+            exchanges,
+            refreshed_at=refreshed_at,
+            source=path
+        )
+
+    def get_universe(self, name, refresh=False):
+        """
+        Get a universe by name.
+
+        Remote universes are served from the local cache and re-downloaded
+        once the cached copy is older than REFRESH_INTERVAL. If the download
+        fails the stale cached copy is used, so this works fully offline.
+
+        Args:
+            name: 'NASDAQ', 'NYSE', or a watchlist name / file name
+            refresh: Force a re-download of a remote universe
+
+        Returns:
+            Universe instance (empty if nothing could be loaded)
+        """
+        if name in REMOTE_UNIVERSES:
+            if refresh:
+                return self.refresh(name)
+            universe = self._universes.get(name) or self._load_cached(name)
+            last_attempt = self._refresh_attempts.get(name)
+            retry_due = last_attempt is None or (datetime.now() - last_attempt).total_seconds() >= RETRY_INTERVAL
+            if not self._is_fresh(universe) and retry_due:
+                return self.refresh(name)
+            if universe is None:
+                universe = Universe(name, [])
+            self._universes[name] = universe
+            return universe
+
+        try:
+            return self._load_watchlist(name)
+        except (OSError, ValueError) as e:  # ValueError covers JSONDecodeError
+            logger.warning(f"Could not load watchlist {name}: {e}")
+            return Universe(name, [])
+
+    def get_us_universe(self):
+        """Get all US listed symbols (NASDAQ and NYSE combined)."""
+        return self.get_universe("NASDAQ") | self.get_universe("NYSE")
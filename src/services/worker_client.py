@@ -0,0 +1,161 @@
+"""
+Client side of the data/monitor worker (see worker.py).
+
+When MBT_WORKER_SOCKET points at a running worker, the Streamlit app sends
+data fetches, chart rendering, quotes and Oracle scans to it over a Unix
+socket instead of doing them on the script thread. Without the variable,
+or while the worker is down, get_worker_client() returns None and
+everything runs in-process as before.
+
+Clients authenticate with MBT_WORKER_AUTHKEY when it is set, otherwise
+with the random key the worker writes next to its socket (<socket>.key,
+readable by its user only).
+"""
+import os
+import time
+import logging
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+
+logger = logging.getLogger('worker_client')
+
+WORKER_SOCKET_ENV = "MBT_WORKER_SOCKET"
+WORKER_AUTHKEY_ENV = "MBT_WORKER_AUTHKEY"
+DEFAULT_SOCKET = os.path.join('.cache', 'worker.sock')
+CALL_TIMEOUT = 10 * 60  # Seconds to wait for a reply; first downloads of big watchlists are slow
+AVAILABILITY_TTL = 5.0  # Seconds a ping result is reused by get_worker_client()
+
+
+class WorkerError(Exception):
+    """The worker could not be reached or the call failed in the worker."""
+
+
+def authkey_path(address):
+    """File the worker at address keeps its generated key in."""
+    return f"{address}.key"
+
+
+def worker_authkey(address=None):
+    """
+    Shared secret the worker and its clients authenticate with.
+
+    Args:
+        address: Socket of the worker whose key file is read when MBT_WORKER_AUTHKEY is unset
+
+    Returns:
+        bytes, or None if the variable is unset and there is no key file
+    """
+    authkey = os.environ.get(WORKER_AUTHKEY_ENV)
+    if authkey:
+        return authkey.encode()
+    if address is None:
+        return None
+    try:
+        with open(authkey_path(address)) as f:
+            return f.read().strip().encode() or None
+    except OSError:
+        return None
+
+
+class WorkerClient:
+    """Calls methods of the worker; one connection per calling thread."""
+
+    def __init__(self, address=DEFAULT_SOCKET, authkey=None, timeout=CALL_TIMEOUT):
+        """
+        Initialize the client.
+
+        Args:
+            address: Path of the worker's Unix socket
+            authkey: Shared secret (default: MBT_WORKER_AUTHKEY or the worker's key file)
+            timeout: Seconds to wait for a reply
+        """
+        self.address = address
+        self.authkey = authkey
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # Read on every connect: a restarted worker generates a new key
+            authkey = self.authkey or worker_authkey(self.address)
+            if authkey is None:
+                raise WorkerError(f"No authkey for the worker at {self.address}; set {WORKER_AUTHKEY_ENV}")
+            try:
+                connection = Client(self.address, family='AF_UNIX', authkey=authkey)
+            except AuthenticationError as e:
+                raise WorkerError(f"Worker at {self.address} rejected the authkey") from e
+            self._local.connection = connection
+        return connection
+
+    def _reset(self):
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection is not None:
+            try:
+                connection.close()
+            except OSError:
+                pass
+
+    def call(self, method, *args, **kwargs):
+        """
+        Call a worker method and return its result.
+
+        A broken connection (e.g. after a worker restart) is reopened once.
+
+        Raises:
+            WorkerError: If the worker is unreachable, times out or the method raised
+        """
+        for attempt in range(2):
+            try:
+                connection = self._connection()
+                connection.send((method, args, kwargs))
+                if not connection.poll(self.timeout):
+                    self._reset()
+                    raise WorkerError(f"Worker did not answer {method} within {self.timeout}s")
+                status, result = connection.recv()
+                break
+            except (OSError, EOFError) as e:
+                self._reset()
+                if attempt:
+                    raise WorkerError(f"Worker unreachable at {self.address}: {e}") from e
+        if status != 'ok':
+            raise WorkerError(result)
+        return result
+
+    def ping(self):
+        """Whether the worker answers."""
+        try:
+            return self.call('ping') is not None
+        except WorkerError:
+            return False
+
+
+_client = None
+_available = (0.0, False)
+_client_lock = threading.Lock()
+
+
+def get_worker_client():
+    """
+    Get the client of the configured worker.
+
+    Returns:
+        WorkerClient, or None if MBT_WORKER_SOCKET is unset or the worker doesn't answer
+    """
+    global _client, _available
+    address = os.environ.get(WORKER_SOCKET_ENV)
+    if not address:
+        return None
+    with _client_lock:
+        if _client is None or _client.address != address:
+            _client = WorkerClient(address)
+            _available = (0.0, False)
+        checked_at, available = _available
+        if time.monotonic() - checked_at > AVAILABILITY_TTL:
+            available = _client.ping()
+            if not available:
+                logger.warning(f"Worker at {address} is not answering, working in-process")
+            _available = (time.monotonic(), available)
+        return _client if available else None
@@ -0,0 +1,263 @@
+"""
+Data/monitor worker serving the Streamlit app over a Unix socket.
+
+The worker process owns the data layer (provider, bar store, price
+cache), the price monitor and Oracle scans. Panels are published to
+shared memory-mapped files (see src/utils/shared_panel.py) and only
+their path goes over the socket; the monitor's indicator history and
+Oracle batches are screened from published panels as well. Requests
+are handled on one thread per connection; charts are rendered in a
+pool of processes so several pages can draw at once without sharing a
+GIL. Started by worker.py; the app talks to it through WorkerClient.
+"""
+import io
+import os
+import socket
+import logging
+import secrets
+import threading
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.connection import Listener
+from src.providers import get_provider
+from src.services.alert_service import AlertService
+from src.services.oracle_service import OracleService
+from src.services.price_monitor_service import PriceMonitorService
+from src.services.rule_engine import HISTORY_PERIOD
+from src.services.stock_service import StockService
+from src.services.worker_client import DEFAULT_SOCKET, authkey_path, worker_authkey
+from src.utils.data_loader import get_panel_data
+from src.utils.price_cache import get_price_cache
+from src.utils.shared_panel import SharedPanelWriter, panel_name
+
+logger = logging.getLogger('worker')
+
+CHART_PROCESSES = max(min((os.cpu_count() or 2) - 1, 4), 1)  # Leave a core for the app and the worker itself
+
+
+def render_chart(symbol, data, show_ema=True, period='1mo', interval='1d'):
+    """
+    Draw a stock chart and return it as PNG bytes.
+
+    Module level so it can run in the chart process pool.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from src.utils.plotting import create_stock_plot
+    from src.utils.market_calendar import calendar_for
+
+    fig = create_stock_plot(data, show_ema=show_ema, period=period, interval=interval,
+                            calendar=calendar_for(symbol))
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format='png', bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
+
+
+class WorkerService:
+    """Methods the app can call in the worker, plus the socket server around them."""
+
+    # Methods clients may call
+    METHODS = ('ping', 'shared_panel', 'stock_info', 'render_chart', 'quote',
+               'start_oracle_scan', 'oracle_status', 'monitor_status', 'set_check_interval')
+
+    def __init__(self, address=DEFAULT_SOCKET, authkey=None, chart_processes=CHART_PROCESSES,
+                 monitor=True, check_interval=300):
+        """
+        Initialize the worker.
+
+        Args:
+            address: Path of the Unix socket to listen on
+            authkey: Shared secret clients must present (default: MBT_WORKER_AUTHKEY,
+                else a random key written to authkey_path(address) on start)
+            chart_processes: Processes rendering charts (0 renders on the request thread)
+            monitor: Run the price monitor in this process
+            check_interval: Seconds between price monitor checks
+        """
+        self.address = address
+        self.authkey = authkey or worker_authkey()
+        self._key_file = None
+        self.started_at = datetime.now().isoformat()
+        self.stock_service = StockService()
+        self.price_cache = get_price_cache()
+        self.shared_panels = SharedPanelWriter()
+        self.monitor = PriceMonitorService(AlertService(), check_interval=check_interval,
+                                           history=self._history_panel) if monitor else None
+        # Spawned, not forked: the worker has threads running when the pool starts
+        self.chart_pool = ProcessPoolExecutor(chart_processes, mp_context=multiprocessing.get_context('spawn')) \
+            if chart_processes else None
+        self._oracle_lock = threading.Lock()
+        self._oracle = {'running': False, 'progress': 0.0, 'message': '', 'started_at': None,
+                        'finished_at': None, 'matches': None, 'error': None}
+        self._listener = None
+        self._stopped = threading.Event()
+
+    # Methods called by the app
+
+    def ping(self):
+        return {'pid': os.getpid(), 'started_at': self.started_at}
+
+    def shared_panel(self, symbols, period='1mo', interval='1d'):
+        """Publish the panel of a watchlist; returns (path, version) for read_shared_panel()."""
+        panel = get_panel_data(symbols, period=period, interval=interval)
+        return self.shared_panels.publish(panel_name(tuple(symbols), period, interval), panel)
+
+    def stock_info(self, symbol, period, interval='1d'):
+        return self.stock_service.get_stock_info(symbol, period, interval)
+
+    def render_chart(self, symbol, data, show_ema=True, period='1mo', interval='1d'):
+        if self.chart_pool is None:
+            return render_chart(symbol, data, show_ema, period, interval)
+        return self.chart_pool.submit(render_chart, symbol, data, show_ema, period, interval).result()
+
+    def quote(self, symbol):
+        return self.price_cache.get_or_fetch(symbol, get_provider().quote)
+
+    def start_oracle_scan(self):
+        """Start an Oracle scan in the background; False if one is already running."""
+        with self._oracle_lock:
+            if self._oracle['running']:
+                return False
+            self._oracle.update(running=True, progress=0.0, message='Starting', error=None,
+                                started_at=datetime.now().isoformat(), finished_at=None, matches=None)
+        threading.Thread(target=self._run_oracle, name='oracle-scan', daemon=True).start()
+        return True
+
+    def oracle_status(self):
+        with self._oracle_lock:
+            return dict(self._oracle)
+
+    def monitor_status(self):
+        if self.monitor is None:
+            return {'running': False}
+        return {'running': self.monitor.is_running, 'check_interval': self.monitor.check_interval,
+                'active_alerts': len(self.monitor.alert_service.get_active_alerts())}
+
+    def set_check_interval(self, seconds):
+        """Change the seconds between monitor checks; False if this worker runs no monitor."""
+        if self.monitor is None:
+            return False
+        self.monitor.check_interval = max(int(seconds), 1)
+        return True
+
+    def _history_panel(self, symbols):
+        """
+        Daily bars of the monitor's indicator rules, read from the panel published for them.
+
+        Published under the same name as shared_panel() gives a watchlist of
+        these symbols over HISTORY_PERIOD, so the app maps the same file.
+        """
+        panel = get_panel_data(list(symbols), period=HISTORY_PERIOD)
+        return self.shared_panels.share(panel_name(tuple(symbols), HISTORY_PERIOD, '1d'), panel)
+
+    def _run_oracle(self):
+        def progress(fraction, message):
+            with self._oracle_lock:
+                self._oracle.update(progress=fraction, message=message)
+
+        matches, error = None, None
+        try:
+            matches = len(OracleService(shared_panels=self.shared_panels).run(progress))
+        except Exception as e:
+            logger.error(f"Oracle scan failed: {e}")
+            error = str(e)
+        with self._oracle_lock:
+            self._oracle.update(running=False, progress=1.0, matches=matches, error=error,
+                                finished_at=datetime.now().isoformat())
+
+    # Socket server
+
+    def _handle(self, connection):
+        """Answer the requests of one client until it disconnects."""
+        try:
+            while not self._stopped.is_set():
+                try:
+                    method, args, kwargs = connection.recv()
+                except (EOFError, OSError):
+                    return
+                if method not in self.METHODS:
+                    connection.send(('error', f"Unknown worker method: {method}"))
+                    continue
+                try:
+                    result = getattr(self, method)(*args, **kwargs)
+                except Exception as e:
+                    logger.error(f"{method} failed: {e}")
+                    connection.send(('error', f"{method} failed: {type(e).__name__}: {e}"))
+                    continue
+                connection.send(('ok', result))
+        finally:
+            connection.close()
+
+    def _remove_stale_socket(self):
+        """Delete a socket file left by a worker that is no longer running."""
+        if not os.path.exists(self.address):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.address)
+        except OSError:
+            os.unlink(self.address)
+        else:
+            raise RuntimeError(f"Another worker is already listening on {self.address}")
+        finally:
+            probe.close()
+
+    def _write_authkey(self):
+        """Generate a key for this run and write it where clients look for it."""
+        self.authkey = secrets.token_hex(32).encode()
+        self._key_file = authkey_path(self.address)
+        if os.path.exists(self._key_file):
+            os.unlink(self._key_file)
+        # O_EXCL: never write the key into a file someone else created
+        fd = os.open(self._key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(self.authkey)
+
+    def serve_forever(self):
+        """Start the monitor and answer clients until stop() is called."""
+        os.makedirs(os.path.dirname(self.address) or '.', exist_ok=True)
+        self._remove_stale_socket()
+        # Only this user may connect (requests are pickled): the socket and
+        # the key file are created without group/other permissions
+        umask = os.umask(0o077)
+        try:
+            if self.authkey is None:
+                self._write_authkey()
+            self._listener = Listener(self.address, family='AF_UNIX', authkey=self.authkey)
+        finally:
+            os.umask(umask)
+        if self.monitor is not None:
+            self.monitor.start()
+        logger.info(f"Worker {os.getpid()} listening on {self.address}")
+
+        while not self._stopped.is_set():
+            try:
+                connection = self._listener.accept()
+            except OSError:
+                if self._stopped.is_set():
+                    break
+                continue
+            except Exception as e:
+                # Failed handshakes (wrong authkey) must not stop the worker
+                logger.warning(f"Rejected connection: {e}")
+                continue
+            threading.Thread(target=self._handle, args=(connection,), daemon=True).start()
+
+    def stop(self):
+        """Stop serving, the monitor and the chart pool, and remove the shared panels."""
+        self._stopped.set()
+        if self.monitor is not None and self.monitor.is_running:
+            self.monitor.stop()
+        if self._listener is not None:
+            self._listener.close()
+        if self.chart_pool is not None:
+            self.chart_pool.shutdown(cancel_futures=True)
+        self.shared_panels.close()
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        if self._key_file is not None and os.path.exists(self._key_file):
+            os.unlink(self._key_file)
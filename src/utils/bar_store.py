@@ -0,0 +1,162 @@
+import os
+import glob
+import time
+import threading
+import pandas as pd
+from src.utils.price_panel import PricePanel
+
+DEFAULT_ROOT = os.path.join('.cache', 'bars')
+INTRADAY_INTERVALS = ('1m', '5m', '15m', '1h')
+INTERVAL_SECONDS = {'1m': 60, '5m': 5 * 60, '15m': 15 * 60, '1h': 60 * 60, '1d': 24 * 60 * 60}
+# How long bars are kept per interval (None keeps everything)
+RETENTION = {
+    '1m': pd.Timedelta(days=7),
+    '5m': pd.Timedelta(days=60),
+    '15m': pd.Timedelta(days=60),
+    '1h': pd.Timedelta(days=730),
+    '1d': pd.Timedelta(days=2 * 366),
+}
+# Seconds after a write before the latest bar is refetched
+STALE_AFTER = {'1m': 60, '5m': 5 * 60, '15m': 5 * 60, '1h': 5 * 60, '1d': 5 * 60}
+PRUNE_INTERVAL = 60 * 60  # Seconds between retention sweeps over the whole store
+
+
+class BarStore:
+    """
+    On-disk OHLCV bars partitioned by interval: <root>/<interval>/<SYMBOL>.npz.
+
+    New bars are merged into what is stored, so refreshes only need to
+    fetch the bars since the last write, and each partition is trimmed to
+    its retention window so minute data doesn't grow unbounded.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT, retention=None):
+        """
+        Initialize the store.
+
+        Args:
+            root: Directory holding one subdirectory per interval
+            retention: dict mapping intervals to a Timedelta (default: RETENTION)
+        """
+        self.root = root
+        self.retention = dict(RETENTION, **(retention or {}))
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+    def path(self, symbol, interval):
+        """File holding the bars of a symbol at an interval."""
+        return os.path.join(self.root, interval, f"{symbol.upper()}.npz")
+
+    def load(self, symbol, interval):
+        """
+        Get the stored bars of a symbol.
+
+        Returns:
+            pd.DataFrame: OHLCV bars, empty if nothing is stored
+        """
+        path = self.path(symbol, interval)
+        try:
+            panel = PricePanel.load(path)
+        except (OSError, ValueError, KeyError):
+            return pd.DataFrame()
+        return panel.frame(symbol.upper()) if symbol.upper() in panel else pd.DataFrame()
+
+    def age(self, symbol, interval):
+        """Seconds since the bars of a symbol were written, or None if nothing is stored."""
+        try:
+            return time.time() - os.path.getmtime(self.path(symbol, interval))
+        except OSError:
+            return None
+
+    def is_fresh(self, symbol, interval, calendar=None):
+        """
+        Whether the stored bars can be served as-is.
+
+        They can if they were written within STALE_AFTER, or if the
+        calendar (a MarketCalendar) shows no trading since they were
+        written, e.g. over a weekend or overnight.
+        """
+        age = self.age(symbol, interval)
+        if age is None:
+            return False
+        if age < STALE_AFTER.get(interval, STALE_AFTER['1d']):
+            return True
+        if calendar is None:
+            return False
+        now = pd.Timestamp.now(tz='UTC')
+        return not calendar.has_new_bar(now - pd.Timedelta(seconds=age), now)
+
+    def _trim(self, data, interval):
+        """Drop bars older than the retention window of an interval."""
+        keep = self.retention.get(interval)
+        if keep is None or data.empty:
+            return data
+        return data[data.index >= data.index[-1] - keep]
+
+    def save(self, symbol, interval, data, replace=False):
+        """
+        Merge new bars into the stored ones and write them back.
+
+        Args:
+            symbol: Symbol the bars belong to
+            interval: Bar interval
+            data: New OHLCV bars; they replace stored bars with the same timestamp
+            replace: Discard the stored bars instead of merging (e.g. after a split)
+
+        Returns:
+            pd.DataFrame: All stored bars after the merge
+        """
+        symbol = symbol.upper()
+        with self._lock:
+            stored = pd.DataFrame() if replace else self.load(symbol, interval)
+            if not stored.empty and not data.empty:
+                if stored.index.tz != data.index.tz and data.index.tz is not None:
+                    stored = stored.tz_convert(data.index.tz)
+                data = pd.concat([stored, data])
+                data = data[~data.index.duplicated(keep='last')].sort_index()
+            elif data.empty:
+                data = stored
+            data = self._trim(data, interval)
+            if not data.empty:
+                path = self.path(symbol, interval)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                PricePanel.from_frames({symbol: data}).save(path)
+        self.maybe_prune()
+        return data
+
+    def prune(self):
+        """
+        Apply the retention windows to every stored file.
+
+        Files whose newest bar is past the window are removed; the rest are
+        trimmed when they hold older bars.
+
+        Returns:
+            int: Number of files removed or rewritten
+        """
+        changed = 0
+        now = pd.Timestamp.now(tz='UTC')
+        for interval, keep in self.retention.items():
+            if keep is None:
+                continue
+            for path in glob.glob(os.path.join(self.root, interval, '*.npz')):
+                with self._lock:
+                    try:
+                        panel = PricePanel.load(path)
+                    except (OSError, ValueError, KeyError):
+                        continue
+                    dates = panel.dates if panel.dates.tz is not None else panel.dates.tz_localize('UTC')
+                    if not len(dates) or dates[-1] < now - keep:
+                        os.remove(path)
+                        changed += 1
+                    elif dates[0] < dates[-1] - keep:
+                        panel.between(panel.dates[-1] - keep, None).save(path)
+                        changed += 1
+        return changed
+
+    def maybe_prune(self):
+        """Run prune() if the last sweep is older than PRUNE_INTERVAL."""
+        if time.monotonic() - self._last_prune < PRUNE_INTERVAL and self._last_prune:
+            return
+        self._last_prune = time.monotonic()
+        self.prune()
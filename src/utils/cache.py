@@ -0,0 +1,243 @@
+"""
+Streamlit caching layer for service objects and screen results.
+
+Cached data is keyed by a data version that only changes when new bars
+can have arrived, so reruns triggered by widgets (e.g. the threshold
+slider) reuse the downloaded data instead of fetching it again.
+
+Cached objects are shared by every session without being copied, so
+they are read-only: panel values are marked non-writeable, and callers
+must not modify the returned dicts and tables. Failed fetches (an empty
+panel or no stock info) are returned but never cached, so a network
+error doesn't hide a symbol until the data version moves on.
+"""
+import hashlib
+import logging
+import os
+import pandas as pd
+import streamlit as st
+from src.services.stock_service import StockService
+from src.services.gpt_service import GPTService
+from src.services.alert_service import history_root
+from src.services.alert_history import AlertHistory
+from src.utils.data_loader import get_panel_data
+from src.utils.bar_store import INTRADAY_INTERVALS, INTERVAL_SECONDS
+from src.utils.market_calendar import get_calendar, calendar_for
+from src.services.worker_client import get_worker_client, WorkerError
+from src.utils.shared_panel import read_shared_panel, shared_panel_intact
+
+INTRADAY_REFRESH_MINUTES = 5  # While the market is open the latest bar changes, refresh this often
+CACHE_TTL = 6 * 60 * 60  # Upper bound on how long any entry lives, in seconds
+NO_WORKER = object()  # Returned by call_worker when the work has to be done in-process
+_panel_generations = {}  # (watchlist, period, interval) -> reloads after the worker rewrote its shared panel
+
+
+class _NotCached(Exception):
+    """Raised inside a cached loader to return a failed result without caching it."""
+
+    def __init__(self, result):
+        super().__init__("fetch failed")
+        self.result = result
+
+
+def _read_only(panel):
+    """Mark the values of a cached panel read-only, as it is shared by every session."""
+    panel.values.flags.writeable = False
+    return panel
+
+
+def file_hash(path):
+    """
+    Hash the contents of a file.
+
+    Args:
+        path (str): File to hash
+
+    Returns:
+        str: SHA-1 hex digest, or an empty string if the file can't be read
+    """
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return ""
+
+
+def data_version(now=None, interval='1d', symbols=()):
+    """
+    Identify the newest bar that can exist at a given time.
+
+    Outside market hours this is the date of the last trading session
+    (looked up in the symbols' market calendar, so holidays and early
+    closes count), so the version (and every cache key built from it)
+    stays the same until the next session opens. During the session the
+    latest bar keeps changing, so the version also advances every
+    INTRADAY_REFRESH_MINUTES, or every bar for intraday intervals shorter
+    than that. Crypto trades 24/7, so its version always advances.
+
+    Args:
+        now (datetime): Time to evaluate, defaults to the current time
+        interval (str): Bar interval the data is fetched at
+        symbols (list): Symbols the data is for; the version combines the
+            calendars they trade on (default: NYSE)
+
+    Returns:
+        str: Version string usable as a cache key
+    """
+    calendars = {calendar.name: calendar for calendar in map(calendar_for, dict.fromkeys(symbols))}
+    if not calendars:
+        calendars = {'NYSE': get_calendar()}
+    return '|'.join(_calendar_version(calendars[name], now, interval) for name in sorted(calendars))
+
+
+def _calendar_version(calendar, now, interval):
+    """data_version() for the symbols of one calendar."""
+    now = pd.Timestamp(now) if now is not None else pd.Timestamp.now(tz=calendar.timezone)
+    if now.tz is None:
+        now = now.tz_localize(calendar.timezone)
+    now = now.tz_convert(calendar.timezone)
+    session = calendar.last_session(now).date()
+
+    if calendar.is_open(now):
+        minutes = now.hour * 60 + now.minute
+        refresh = INTRADAY_REFRESH_MINUTES
+        if interval in INTRADAY_INTERVALS:
+            refresh = min(refresh, INTERVAL_SECONDS[interval] // 60)
+        return f"{session.isoformat()}T{minutes // refresh}"
+    return session.isoformat()
+
+
+def call_worker(method, *args, **kwargs):
+    """
+    Run a call in the worker process if one is running.
+
+    Returns:
+        The result, or NO_WORKER if there is no worker or the call failed
+    """
+    worker = get_worker_client()
+    if worker is None:
+        return NO_WORKER
+    try:
+        return worker.call(method, *args, **kwargs)
+    except WorkerError as e:
+        logging.getLogger('worker_client').warning(f"{e}, falling back to in-process")
+        return NO_WORKER
+
+
+@st.cache_resource
+def get_stock_service():
+    """Shared StockService instance."""
+    return StockService()
+
+
+@st.cache_resource
+def get_gpt_service():
+    """Shared GPTService instance (keeps a single API client)."""
+    return GPTService()
+
+
+@st.cache_resource
+def get_alert_history():
+    """Shared AlertHistory, so the months history pages come from stay parsed between reruns."""
+    return AlertHistory(history_root())
+
+
+@st.cache_resource(max_entries=16, ttl=CACHE_TTL, show_spinner="Downloading watchlist data...")
+def load_watchlist_panel(watchlist_hash, period, interval, version, generation, _symbols):
+    """
+    Fetch the panel for a watchlist once per (watchlist, period, interval, data version).
+
+    With a worker running, the panel is a zero-copy view of the one the
+    worker published to shared memory. Its slot is rewritten by the second
+    publish after it, so callers check the returned snapshot with
+    shared_panel_intact() and load again under the next generation when
+    it fails.
+
+    Returns:
+        tuple: (PricePanel, (path, version) of the shared snapshot, or None if fetched in-process)
+    """
+    shared = call_worker('shared_panel', list(_symbols), period, interval)
+    panel = snapshot = None
+    if shared is not NO_WORKER:
+        try:
+            panel, shared_version = read_shared_panel(shared[0])
+            snapshot = (shared[0], shared_version)
+        except (OSError, ValueError, TimeoutError) as e:
+            logging.getLogger('worker_client').warning(f"Could not map shared panel {shared[0]}: {e}")
+    if panel is None:
+        panel = get_panel_data(list(_symbols), period=period, interval=interval)
+    if not len(panel):
+        raise _NotCached(panel)
+    return _read_only(panel), snapshot
+
+
+@st.cache_resource(max_entries=16, ttl=CACHE_TTL, show_spinner=False)
+def load_diff_table(watchlist_hash, period, interval, version, generation, _symbols):
+    """
+    Build the sorted diff table once per (watchlist, period, interval, data version).
+
+    The threshold is not part of the key: the table answers any threshold
+    by bisection, so slider moves never recompute or refetch anything.
+
+    Returns:
+        tuple: (DiffTable, shared snapshot its panel views, see load_watchlist_panel)
+    """
+    panel, snapshot = load_watchlist_panel(watchlist_hash, period, interval, version, generation, _symbols)
+    return get_stock_service().build_diff_table(panel), snapshot
+
+
+@st.cache_resource(max_entries=64, ttl=CACHE_TTL, show_spinner=False)
+def load_stock_info(symbol, period, interval, version):
+    """Fetch a single symbol once per (symbol, period, interval, data version)."""
+    stock_info = call_worker('stock_info', symbol, period, interval)
+    if stock_info is NO_WORKER:
+        stock_info = get_stock_service().get_stock_info(symbol, period, interval)
+    if stock_info is None:
+        raise _NotCached(None)
+    _read_only(stock_info['panel'])
+    return stock_info
+
+
+def get_filtered_stocks(watchlist_file, symbols, period, threshold, interval='1d'):
+    """
+    Cached equivalent of StockService.get_filtered_stocks for a watchlist.
+
+    The data is downloaded once per (watchlist, period, data version); the
+    threshold is answered from the cached diff table.
+
+    Args:
+        watchlist_file (str): JSON file the symbols were loaded from
+        symbols (list): Symbols of the watchlist
+        period (str): Display period
+        threshold (float): Price-to-high threshold in percent
+        interval (str): Bar interval
+
+    Returns:
+        list: Stock info dicts sharing the cached panel
+    """
+    # Hash the file when there is one, otherwise the symbol list itself
+    if watchlist_file and os.path.exists(watchlist_file):
+        watchlist_hash = file_hash(watchlist_file)
+    else:
+        watchlist_hash = hashlib.sha1(",".join(symbols).encode()).hexdigest()
+    version = data_version(interval=interval, symbols=symbols)
+    key = (watchlist_hash, period, interval)
+    for _ in range(2):
+        generation = _panel_generations.get(key, 0)
+        try:
+            table, snapshot = load_diff_table(watchlist_hash, period, interval, version, generation, tuple(symbols))
+        except _NotCached as e:
+            return get_stock_service().build_diff_table(e.result).within(threshold)
+        if snapshot is None or shared_panel_intact(*snapshot):
+            break
+        # The worker rewrote the slot the cached views point into; map its current panel
+        _panel_generations[key] = generation + 1
+    return table.within(threshold)
+
+
+def get_stock_info(symbol, period, interval='1d'):
+    """Cached equivalent of StockService.get_stock_info."""
+    try:
+        return load_stock_info(symbol, period, interval, data_version(interval=interval, symbols=(symbol,)))
+    except _NotCached as e:
+        return e.result
@@ -1,37 +1,300 @@
+import os
 import json
-import yfinance as yf
+import logging
+import threading
+import numpy as np
 import pandas as pd
+from src.utils.price_panel import PricePanel
+from src.utils.bar_store import BarStore, DEFAULT_ROOT, INTRADAY_INTERVALS, INTERVAL_SECONDS
+from src.utils.resample import resample_bars, CALENDAR_RULES
+from src.providers import get_provider
+from src.providers.base import period_to_timedelta
+from src.utils.market_calendar import calendar_for
+from src.utils.profiling import timed
 
-def get_stock_data(symbol, period='1mo'):
+logger = logging.getLogger('data_loader')
+
+DAILY_HISTORY_PERIOD = '2y'  # Daily history kept per symbol; every daily, weekly and monthly view derives from it
+WARMUP_BARS = 50  # Bars kept before the display window for MA calculation
+
+INTERVAL_OPTIONS = {
+    '1d': 'Daily',
+    '1wk': 'Weekly',
+    '1mo': 'Monthly',
+    '1h': '1 Hour',
+    '15m': '15 Minutes',
+    '5m': '5 Minutes',
+    '1m': '1 Minute',
+}
+RESAMPLED_INTERVALS = tuple(CALENDAR_RULES)  # Built from the daily series, never downloaded
+INTRADAY_PERIOD_OPTIONS = {
+    '1d': '1 Day',
+    '5d': '5 Days',
+    '1mo': '1 Month',
+    '1y': '1 Year',
+}
+RESAMPLED_PERIOD_OPTIONS = {
+    '6mo': '6 Months',
+    '1y': '1 Year',
+    '2y': '2 Years',
+}
+# Longest period Yahoo serves per intraday interval
+MAX_INTRADAY_PERIOD = {'1m': '5d', '5m': '1mo', '15m': '1mo', '1h': '1y'}
+# Periods used for incremental refreshes, shortest first
+REFRESH_PERIODS = ('1d', '5d', '1mo', '1y')
+# Relative close difference on overlapping bars that means the history was re-adjusted (splits, dividends)
+ADJUSTMENT_TOLERANCE = 0.005
+
+_bar_stores = {}
+_bar_stores_lock = threading.Lock()
+
+
+def interval_periods(interval):
+    """Period options available for an intraday, weekly or monthly interval."""
+    if interval in RESAMPLED_INTERVALS:
+        return RESAMPLED_PERIOD_OPTIONS
+    limit = period_to_timedelta(MAX_INTRADAY_PERIOD[interval])
+    return {p: label for p, label in INTRADAY_PERIOD_OPTIONS.items() if period_to_timedelta(p) <= limit}
+
+
+def clamp_period(period, interval):
+    """Limit a period to what the provider serves for an intraday interval."""
+    limit = MAX_INTRADAY_PERIOD[interval]
+    return limit if period_to_timedelta(period) > period_to_timedelta(limit) else period
+
+
+def get_bar_store(provider):
+    """Bar store of a provider, so bars from different sources never mix."""
+    with _bar_stores_lock:
+        if provider.name not in _bar_stores:
+            _bar_stores[provider.name] = BarStore(os.path.join(DEFAULT_ROOT, provider.name))
+        return _bar_stores[provider.name]
+
+
+def _session_date(timestamp, calendar):
+    """Session date (midnight, calendar timezone) a bar belongs to."""
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tz is None:
+        timestamp = timestamp.tz_localize(calendar.timezone)
+    return timestamp.tz_convert(calendar.timezone).normalize()
+
+
+def _covers(data, period, calendar):
+    """Whether stored bars reach back to the first session of a period ending now."""
+    if data.empty:
+        return False
+    return _session_date(data.index[0], calendar) <= calendar.period_start(period)
+
+
+def _consistent(stored, data):
+    """
+    Whether freshly fetched bars agree with the stored ones where they overlap.
+
+    The last stored bar is skipped, it may have been a bar still in progress.
+    """
+    overlap = stored.index[:-1].intersection(data.index)
+    if not len(overlap):
+        return True
+    return np.allclose(data.loc[overlap, 'Close'].to_numpy(dtype=np.float64),
+                       stored.loc[overlap, 'Close'].to_numpy(dtype=np.float64),
+                       rtol=ADJUSTMENT_TOLERANCE, equal_nan=True)
+
+
+def _refresh_period(data, period, calendar):
+    """Shortest period whose sessions reach back to the last stored bar."""
+    last = _session_date(data.index[-1], calendar)
+    for candidate in REFRESH_PERIODS:
+        if period_to_timedelta(candidate) > period_to_timedelta(period):
+            break
+        if calendar.period_start(candidate) <= last:
+            return candidate
+    return period
+
+
+def _from_finer(store, symbol, interval, period, calendar):
+    """Build bars by resampling fresher, finer stored bars that cover the window."""
+    for finer in INTRADAY_INTERVALS:
+        if INTERVAL_SECONDS[finer] >= INTERVAL_SECONDS[interval] or INTERVAL_SECONDS[interval] % INTERVAL_SECONDS[finer]:
+            continue
+        if not store.is_fresh(symbol, finer, calendar):
+            continue
+        data = store.load(symbol, finer)
+        if _covers(data, period, calendar):
+            return resample_bars(data, interval)
+    return None
+
+
+def _window(data, period, calendar):
+    """Bars of the sessions in the period ending at the last bar, plus WARMUP_BARS before them."""
+    if data.empty:
+        return data
+    start = calendar.period_start(period, _session_date(data.index[-1], calendar))
+    if data.index.tz is None:
+        start = start.tz_localize(None)
+    first = data.index.searchsorted(start, side='left')
+    return data.iloc[max(0, first - WARMUP_BARS):]
+
+
+def _bulk_history(provider, symbols, period, interval):
+    """provider.bulk_history, with an empty panel if the download fails."""
+    try:
+        return provider.bulk_history(symbols, period=period, interval=interval)
+    except Exception as e:
+        logger.warning(f"Could not fetch {interval} bars of {len(symbols)} symbols: {e}")
+        return PricePanel.empty()
+
+
+def get_bar_frames(symbols, period, interval):
+    """
+    Get bars for many symbols through the bar store.
+
+    Stored bars are used as they are while they are fresh, or while the
+    symbol's market calendar says no trading happened since they were
+    written; otherwise they may be resampled from a finer
+    intraday interval that covers the window; stale symbols fetch only the
+    bars since their last stored one, and the rest are downloaded together.
+    When refetched bars disagree with the stored ones (the provider
+    re-adjusted the history for a split or dividend) the symbol is
+    downloaded again in full. Symbols a download fails for, or returns
+    nothing for, are served from their stored bars if there are any.
+
+    Args:
+        symbols (list): Symbols
+        period (str): How far back to go (clamped to an intraday interval's maximum)
+        interval (str): '1d' or one of INTRADAY_INTERVALS
+
+    Returns:
+        dict: symbol -> OHLCV DataFrame limited to the period (plus warmup bars)
+    """
+    provider = get_provider()
+    if interval in INTRADAY_INTERVALS:
+        period = clamp_period(period, interval)
+    frames, full, incremental, stored = {}, [], {}, {}
+
+    store = get_bar_store(provider) if provider.cacheable else None
+    for symbol in symbols:
+        if store is None:
+            full.append(symbol)
+            continue
+        calendar = calendar_for(symbol)
+        stored[symbol] = store.load(symbol, interval)
+        if store.is_fresh(symbol, interval, calendar) and _covers(stored[symbol], period, calendar):
+            frames[symbol] = stored[symbol]
+            continue
+        resampled = _from_finer(store, symbol, interval, period, calendar) if interval in INTRADAY_INTERVALS else None
+        if resampled is not None:
+            frames[symbol] = resampled
+        elif _covers(stored[symbol], period, calendar):
+            incremental.setdefault(_refresh_period(stored[symbol], period, calendar), []).append(symbol)
+        else:
+            full.append(symbol)
+
+    # One download per distinct fetch period
+    for fetch_period, batch in list(incremental.items()):
+        panel = _bulk_history(provider, batch, fetch_period, interval)
+        for symbol in panel.symbols:
+            data = panel.frame(symbol)
+            if _consistent(stored[symbol], data):
+                frames[symbol] = store.save(symbol, interval, data)
+            else:
+                full.append(symbol)
+    if full:
+        panel = _bulk_history(provider, full, period, interval)
+        for symbol in panel.symbols:
+            data = panel.frame(symbol)
+            frames[symbol] = store.save(symbol, interval, data, replace=True) if store is not None else data
+
+    # Stale bars beat none when a refetch failed or came back without the symbol
+    for symbol, data in stored.items():
+        if symbol not in frames and not data.empty:
+            frames[symbol] = data
+
+    return {
+        symbol: _window(data, period, calendar_for(symbol))
+        for symbol, data in frames.items() if not data.empty
+    }
+
+
+def get_daily_frames(symbols):
+    """
+    Get the full daily series (DAILY_HISTORY_PERIOD) of many symbols.
+
+    Every daily, weekly and monthly view and every period range is derived
+    from these, so one download serves them all.
+
+    Returns:
+        dict: symbol -> daily OHLCV DataFrame
     """
-    Fetch stock data from Yahoo Finance.
+    return get_bar_frames(symbols, DAILY_HISTORY_PERIOD, '1d')
+
+
+def get_daily_data(symbol):
+    """Get the full daily series of one symbol (empty if unavailable)."""
+    try:
+        return get_daily_frames([symbol]).get(symbol, pd.DataFrame())
+    except Exception:
+        return pd.DataFrame()
+
+
+@timed('fetch')
+def get_stock_data(symbol, period='1mo', interval='1d'):
+    """
+    Fetch stock data from the market data provider.
     
     Args:
         symbol (str): Stock symbol
         period (str): Display period (e.g., '1mo', '3mo', '6mo', '1y')
+        interval (str): Bar interval ('1d', '1wk', '1mo', or one of the intraday intervals)
     
     Returns:
         pd.DataFrame: Stock data with enough history for indicators
     """
     try:
-        ticker = yf.Ticker(symbol)
-        # Always fetch 2 years of data to ensure enough history for indicators
-        data = ticker.history(period='2y')
+        if interval in INTRADAY_INTERVALS:
+            return get_bar_frames([symbol], period, interval).get(symbol, pd.DataFrame())
+
+        # Always work from the 2 year daily series to ensure enough history for indicators
+        data = get_daily_data(symbol)
+        if interval in RESAMPLED_INTERVALS:
+            data = resample_bars(data, interval)
         
-        # Return appropriate amount of data based on period
-        if period == '1mo':
-            return data.tail(80)  # 30 days display + 50 days for MA calculation
-        elif period == '3mo':
-            return data.tail(140)  # 90 days display + 50 days for MA calculation
-        elif period == '6mo':
-            return data.tail(230)  # 180 days display + 50 days for MA calculation
-        else:  # 1y
-            return data.tail(365)  # Full year
-            
-        return data
+        # Return the sessions of the period plus warmup bars for MA calculation
+        return _window(data, period, calendar_for(symbol))
     except Exception:
         return pd.DataFrame()
 
+@timed('fetch')
+def get_panel_data(symbols, period='1mo', interval='1d'):
+    """
+    Fetch stock data for many symbols in one download.
+    
+    Args:
+        symbols (list): Stock symbols
+        period (str): Display period (e.g., '1mo', '3mo', '6mo', '1y')
+        interval (str): Bar interval ('1d', '1wk', '1mo', or one of the intraday intervals)
+    
+    Returns:
+        PricePanel: float32 OHLCV panel with enough history for indicators
+    """
+    symbols = list(symbols)
+    if not symbols:
+        return PricePanel.empty()
+    try:
+        if interval in INTRADAY_INTERVALS:
+            frames = get_bar_frames(symbols, period, interval)
+            return PricePanel.from_frames({s: frames[s] for s in symbols if s in frames})
+
+        # Same 2 year daily series as get_stock_data, fetched for all symbols at once
+        frames = get_daily_frames(symbols)
+        if interval in RESAMPLED_INTERVALS:
+            frames = {s: resample_bars(data, interval) for s, data in frames.items()}
+        return PricePanel.from_frames({
+            s: _window(frames[s], period, calendar_for(s)) for s in symbols if s in frames
+        })
+    except Exception:
+        return PricePanel.empty()
+
+@timed('clean')
 def clean_stock_data(data):
     """
     Clean and validate stock data.
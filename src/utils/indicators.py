@@ -1,5 +1,7 @@
 import pandas as pd
+from src.utils.profiling import timed
 
+@timed('indicators')
 def calculate_rsi(data, periods=14):
     """Calculate RSI indicator"""
     delta = data['Close'].diff()
@@ -14,10 +16,12 @@ def calculate_rsi(data, periods=14):
     
     return rsi
 
+@timed('indicators')
 def calculate_ema(data, span=20):
     """Calculate EMA indicator"""
     return data['Close'].ewm(span=span, adjust=False).mean()
 
+@timed('indicators')
 def is_near_high(data, threshold_percent=1.0):
     """
     Check if the current price is near the period high.
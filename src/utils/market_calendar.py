@@ -0,0 +1,243 @@
+"""
+Exchange calendars precomputed as arrays.
+
+Every session between FIRST_YEAR and LAST_YEAR is materialised once as
+sorted numpy arrays of dates and UTC open/close times, so questions like
+"is the market open", "which session is the latest" or "did any trading
+happen since the last fetch" are answered by bisection instead of date
+arithmetic or a refetch.
+"""
+import threading
+from datetime import date, timedelta, time as dt_time
+import numpy as np
+import pandas as pd
+from src.providers.base import is_crypto_symbol
+
+FIRST_YEAR = 2000
+LAST_YEAR = 2040
+NYSE_TIMEZONE = 'America/New_York'
+NYSE_OPEN = dt_time(9, 30)
+NYSE_CLOSE = dt_time(16, 0)
+NYSE_EARLY_CLOSE = dt_time(13, 0)
+# One-off closures (national days of mourning, weather)
+NYSE_SPECIAL_CLOSURES = (
+    date(2001, 9, 11), date(2001, 9, 12), date(2001, 9, 13), date(2001, 9, 14),
+    date(2004, 6, 11), date(2007, 1, 2), date(2012, 10, 29), date(2012, 10, 30),
+    date(2018, 12, 5), date(2025, 1, 9),
+)
+NS_PER_SECOND = 1_000_000_000
+
+
+def _nth_weekday(year, month, weekday, n):
+    """n-th given weekday of a month (n=-1 for the last one)."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year):
+    """Easter Sunday (anonymous Gregorian algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return date(year, month, day)
+
+
+def _observed(day):
+    """Weekend holidays are observed on the Friday before or the Monday after."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def nyse_holidays(year):
+    """Full-day NYSE holidays of a year."""
+    holidays = {
+        _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _observed(date(year, 7, 4)),  # Independence Day
+        _nth_weekday(year, 9, 0, 1),  # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        _observed(date(year, 12, 25)),  # Christmas
+    }
+    # New Year's Day on a Saturday is not observed on the Friday before
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(_observed(new_year))
+    if year >= 2022:
+        holidays.add(_observed(date(year, 6, 19)))  # Juneteenth
+    holidays.update(d for d in NYSE_SPECIAL_CLOSURES if d.year == year)
+    return holidays
+
+
+def nyse_early_closes(year):
+    """NYSE sessions that close at 13:00."""
+    early = {_nth_weekday(year, 11, 3, 4) + timedelta(days=1)}  # Day after Thanksgiving
+    july3 = date(year, 7, 3)
+    if july3.weekday() < 4:  # Independence Day falls Tuesday to Friday
+        early.add(july3)
+    christmas_eve = date(year, 12, 24)
+    if christmas_eve.weekday() < 4:
+        early.add(christmas_eve)
+    return early
+
+
+class MarketCalendar:
+    """Sessions of one market as sorted arrays of dates and UTC open/close times."""
+
+    def __init__(self, name, timezone, dates, opens, closes):
+        """
+        Initialize the calendar.
+
+        Args:
+            name: Calendar name
+            timezone: Timezone session dates are expressed in
+            dates: Session dates (datetime64[D], sorted)
+            opens: Session open times (int64 ns since epoch, UTC)
+            closes: Session close times (int64 ns since epoch, UTC)
+        """
+        self.name = name
+        self.timezone = timezone
+        self.dates = dates
+        self.opens = opens
+        self.closes = closes
+        # Trading seconds completed before each session opens
+        durations = (closes - opens) // NS_PER_SECOND
+        self._elapsed = np.concatenate(([0], np.cumsum(durations)[:-1]))
+        self._durations = durations
+
+    @classmethod
+    def nyse(cls, first_year=FIRST_YEAR, last_year=LAST_YEAR):
+        """NYSE regular sessions, holidays and early closes."""
+        days = pd.bdate_range(date(first_year, 1, 1), date(last_year, 12, 31))
+        holidays, early = set(), set()
+        for year in range(first_year, last_year + 1):
+            holidays |= nyse_holidays(year)
+            early |= nyse_early_closes(year)
+        days = days[~days.isin(pd.DatetimeIndex(sorted(holidays)))]
+        close_times = np.where(days.isin(pd.DatetimeIndex(sorted(early))),
+                               pd.Timedelta(hours=NYSE_EARLY_CLOSE.hour).value,
+                               pd.Timedelta(hours=NYSE_CLOSE.hour).value)
+        opens = (days + pd.Timedelta(hours=NYSE_OPEN.hour, minutes=NYSE_OPEN.minute))
+        closes = days + pd.to_timedelta(close_times)
+        return cls(
+            'NYSE', NYSE_TIMEZONE,
+            days.values.astype('datetime64[D]'),
+            opens.tz_localize(NYSE_TIMEZONE).tz_convert('UTC').as_unit('ns').asi8,
+            closes.tz_localize(NYSE_TIMEZONE).tz_convert('UTC').as_unit('ns').asi8
+        )
+
+    @classmethod
+    def always_open(cls, first_year=FIRST_YEAR, last_year=LAST_YEAR):
+        """24/7 market (crypto): one session per UTC day."""
+        days = pd.date_range(date(first_year, 1, 1), date(last_year, 12, 31), freq='D')
+        opens = days.tz_localize('UTC').as_unit('ns').asi8
+        return cls('24/7', 'UTC', days.values.astype('datetime64[D]'), opens, opens + 86400 * NS_PER_SECOND)
+
+    def _ns(self, timestamp):
+        """UTC nanoseconds of a timestamp (naive timestamps are in the calendar's timezone)."""
+        timestamp = pd.Timestamp(timestamp)
+        if timestamp.tz is None:
+            timestamp = timestamp.tz_localize(self.timezone)
+        return timestamp.value
+
+    def _session_at(self, timestamp):
+        """Index of the last session that opened at or before a time (-1 if none)."""
+        return int(np.searchsorted(self.opens, self._ns(timestamp), side='right')) - 1
+
+    def _date(self, index):
+        return pd.Timestamp(self.dates[index]).tz_localize(self.timezone)
+
+    def is_open(self, timestamp):
+        """Whether the market is in session at a time."""
+        i = self._session_at(timestamp)
+        return i >= 0 and self._ns(timestamp) < self.closes[i]
+
+    def last_session(self, timestamp):
+        """Date (midnight, calendar timezone) of the latest session that opened at or before a time."""
+        return self._date(max(self._session_at(timestamp), 0))
+
+    def is_session(self, day):
+        """Whether a date is a trading day."""
+        day = np.datetime64(pd.Timestamp(day).date(), 'D')
+        i = np.searchsorted(self.dates, day)
+        return i < len(self.dates) and self.dates[i] == day
+
+    def trading_seconds(self, start, end):
+        """Seconds the market was in session between two times."""
+        def elapsed(timestamp):
+            i = self._session_at(timestamp)
+            if i < 0:
+                return 0
+            into = (self._ns(timestamp) - self.opens[i]) // NS_PER_SECOND
+            return int(self._elapsed[i] + min(into, self._durations[i]))
+        return max(elapsed(end) - elapsed(start), 0)
+
+    def has_new_bar(self, since, now=None):
+        """Whether any trading happened between two times, i.e. a refetch can return new data."""
+        return self.trading_seconds(since, now if now is not None else pd.Timestamp.now(tz='UTC')) > 0
+
+    def sessions_between(self, start, end):
+        """Number of sessions whose date lies in [start, end]."""
+        lo = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start).date(), 'D'), side='left')
+        hi = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end).date(), 'D'), side='right')
+        return int(max(hi - lo, 0))
+
+    def period_start(self, period, end=None):
+        """
+        First session of a yfinance style period ending at a time.
+
+        'Nd' periods count sessions like Yahoo does ('5d' is the last five
+        sessions); week, month and year periods go back by calendar offset
+        and start at the first session on or after that date.
+
+        Args:
+            period (str): '1d', '5d', '1wk', '1mo', '6mo', '1y', '2y', ...
+            end: End of the window (default: now)
+
+        Returns:
+            pd.Timestamp: Date of the first session in the window
+        """
+        end = pd.Timestamp(end) if end is not None else pd.Timestamp.now(tz=self.timezone)
+        if end.tz is None:
+            end = end.tz_localize(self.timezone)
+        count, unit = int(period.rstrip('dwkmoy')), period.lstrip('0123456789')
+        end_date = np.datetime64(end.tz_convert(self.timezone).date(), 'D')
+        last = max(int(np.searchsorted(self.dates, end_date, side='right')) - 1, 0)
+        if unit == 'd':
+            return self._date(max(last - count + 1, 0))
+        offset = {'wk': pd.DateOffset(weeks=count), 'mo': pd.DateOffset(months=count),
+                  'y': pd.DateOffset(years=count)}[unit]
+        start = (end.tz_convert(self.timezone) - offset).date()
+        i = int(np.searchsorted(self.dates, np.datetime64(start, 'D'), side='left'))
+        return self._date(min(i, last))
+
+
+_calendars = {}
+_calendars_lock = threading.Lock()
+
+
+def get_calendar(name='NYSE'):
+    """Get a calendar by name ('NYSE' or '24/7'); built once per process."""
+    with _calendars_lock:
+        if name not in _calendars:
+            _calendars[name] = MarketCalendar.always_open() if name == '24/7' else MarketCalendar.nyse()
+        return _calendars[name]
+
+
+def calendar_for(symbol):
+    """Calendar a symbol trades on: 24/7 for crypto pairs, NYSE otherwise."""
+    return get_calendar('24/7' if symbol and is_crypto_symbol(symbol) else 'NYSE')
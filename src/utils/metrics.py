@@ -0,0 +1,280 @@
+"""
+Process-wide counters and histograms in the Prometheus text format.
+
+Metrics are defined here and updated where the work happens (providers,
+price monitor, notifications, Oracle); components that already keep
+their own counters (PriceCache, HttpTransport) register a collector that
+reads them at scrape time. start_metrics_server() serves everything on
+http://127.0.0.1:<MBT_METRICS_PORT>/metrics from a daemon thread.
+
+No client library is needed: the exposition format is plain text, and the
+price monitor starts the server when it starts.
+"""
+import os
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+METRICS_PORT_ENV = "MBT_METRICS_PORT"
+DEFAULT_METRICS_PORT = 9108
+METRICS_HOST = '127.0.0.1'  # Local only, there is no authentication
+# Latency buckets in seconds, from cached lookups up to slow batch downloads
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+logger = logging.getLogger('metrics')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines += self._samples(items)
+        return lines
+
+    def _samples(self, items):
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Value that goes up and down."""
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        with self._lock:
+            counts, _ = self._values.get(self._key(labels), ((), 0.0))
+            return sum(counts)
+
+    def _samples(self, items):
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, [('le', _format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Metrics of the process plus collectors evaluated at scrape time."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, *args, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter, name, documentation, labels)
+
+    def gauge(self, name, documentation, labels=()):
+        return self._register(Gauge, name, documentation, labels)
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, documentation, labels, buckets)
+
+    def register_collector(self, collect):
+        """
+        Add a function called on every scrape.
+
+        Args:
+            collect: Callable returning (name, kind, documentation, [(labels dict, value), ...])
+                     tuples, kind being 'counter' or 'gauge'
+        """
+        with self._lock:
+            self._collectors.append(collect)
+
+    def render(self):
+        """All metrics in the Prometheus text format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines += metric.render()
+        for collect in collectors:
+            try:
+                families = collect()
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+PROVIDER_FETCH_SECONDS = REGISTRY.histogram(
+    'mbt_provider_fetch_seconds', "Market data fetch latency by provider and method", ('provider', 'method'))
+PROVIDER_FETCH_ERRORS = REGISTRY.counter(
+    'mbt_provider_fetch_errors_total', "Market data fetches that raised", ('provider', 'method'))
+ALERTS_EVALUATED = REGISTRY.counter(
+    'mbt_alerts_evaluated_total', "Alerts compared against a current price")
+ALERTS_TRIGGERED = REGISTRY.counter(
+    'mbt_alerts_triggered_total', "Alerts whose condition was met")
+ALERTS_HELD = REGISTRY.counter(
+    'mbt_alerts_held_total', "Checks where an armed alert's condition was met but its cooldown or daily budget held it back")
+ALERTS_REARMED = REGISTRY.counter(
+    'mbt_alerts_rearmed_total', "Recurring alerts re-armed after their condition cleared the hysteresis band")
+ALERTS_ACTIVE = REGISTRY.gauge(
+    'mbt_alerts_active', "Active alerts at the last check")
+ALERT_CHECK_SECONDS = REGISTRY.histogram(
+    'mbt_alert_check_seconds', "Duration of one price monitor check over all active alerts")
+NOTIFICATION_SECONDS = REGISTRY.histogram(
+    'mbt_notification_send_seconds', "Notification send latency", ('channel',))
+NOTIFICATIONS = REGISTRY.counter(
+    'mbt_notifications_total', "Notifications by outcome", ('channel', 'result'))
+ORACLE_SYMBOLS = REGISTRY.counter(
+    'mbt_oracle_symbols_processed_total', "Symbols screened by the Oracle")
+ORACLE_BATCH_SECONDS = REGISTRY.histogram(
+    'mbt_oracle_batch_seconds', "Oracle download and screening time per batch")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood the logs
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=None, host=METRICS_HOST):
+    """
+    Serve /metrics from a daemon thread; only the first call starts a server.
+
+    Args:
+        port: Port to listen on (default: MBT_METRICS_PORT or 9108; 0 disables)
+        host: Interface to bind
+
+    Returns:
+        The HTTP server, or None if disabled or the port is taken
+    """
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+        port = int(port if port is not None else os.environ.get(METRICS_PORT_ENV, DEFAULT_METRICS_PORT))
+        if not port:
+            return None
+        try:
+            _server = ThreadingHTTPServer((host, port), _Handler)
+        except OSError as e:
+            logger.warning(f"Could not start metrics server on {host}:{port}: {e}")
+            return None
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True).start()
+        logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+        return _server
+
+
+def stop_metrics_server():
+    """Shut the metrics server down."""
+    global _server
+    with _server_lock:
+        if _server is not None:
+            _server.shutdown()
+            _server.server_close()
+            _server = None
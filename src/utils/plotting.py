@@ -1,9 +1,14 @@
-import matplotlib.pyplot as plt
 import pandas as pd
 from .indicators import calculate_rsi, calculate_ema
+from .market_calendar import get_calendar
+from .profiling import timed
 
-def create_stock_plot(data, show_ema=True, period='1mo'):
+@timed('plot')
+def create_stock_plot(data, show_ema=True, period='1mo', interval='1d', calendar=None):
     """Create the stock chart with indicators"""
+    # matplotlib is only imported once a chart is drawn
+    import matplotlib.pyplot as plt
+    
     # Create figure and axis
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(16, 9), height_ratios=[3, 1], gridspec_kw={'hspace': 0.3})
     
@@ -19,15 +24,12 @@ def create_stock_plot(data, show_ema=True, period='1mo'):
     high50 = data['High'].rolling(window=50).max()
     low10 = data['Low'].rolling(window=10).min()
     
-    # Get the display period based on selected timeframe
-    if period == '1mo':
-        display_length = 30
-    elif period == '3mo':
-        display_length = 90
-    elif period == '6mo':
-        display_length = 180
-    else:  # Default to all available data
-        display_length = len(data)
+    # Display the sessions of the selected period (calendar lookup, not a row count)
+    calendar = calendar or get_calendar()
+    start = calendar.period_start(period, data.index[-1])
+    if data.index.tz is None:
+        start = start.tz_localize(None)
+    display_length = len(data) - data.index.searchsorted(start, side='left')
         
     # Ensure we don't try to display more data than we have
     display_length = min(display_length, len(data))
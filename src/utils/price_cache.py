@@ -0,0 +1,197 @@
+import sys
+import time
+import threading
+from collections import OrderedDict
+from src.utils.metrics import REGISTRY
+
+DEFAULT_TTL = 60.0  # Seconds a price stays fresh
+MAX_ENTRIES = 2048  # Symbols kept before the least recently used is evicted
+MAX_BYTES = 4 * 1024 * 1024  # Approximate memory bound for the cached values
+
+
+def _entry_size(symbol, value):
+    """Rough memory footprint of a cached entry in bytes."""
+    size = sys.getsizeof(symbol) + sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    return size
+
+
+class PriceCache:
+    """
+    Thread-safe LRU cache for latest prices with per-symbol TTLs.
+
+    Entries expire after their TTL and the least recently used entries are
+    evicted once either the entry count or the approximate memory bound is
+    exceeded. Hits, misses, expirations and evictions are counted.
+    """
+
+    def __init__(self, default_ttl=DEFAULT_TTL, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, ttls=None):
+        """
+        Initialize the cache.
+
+        Args:
+            default_ttl: Seconds an entry stays fresh unless the symbol has its own TTL
+            max_entries: Maximum number of symbols kept
+            max_bytes: Approximate maximum size of the cached values
+            ttls: dict mapping symbols to their own TTL in seconds
+        """
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._ttls = {symbol.upper(): ttl for symbol, ttl in (ttls or {}).items()}
+        self._entries = OrderedDict()  # symbol -> (expires_at, size, value), oldest first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+
+    def ttl_for(self, symbol):
+        """TTL in seconds used for a symbol."""
+        return self._ttls.get(symbol.upper(), self.default_ttl)
+
+    def set_ttl(self, symbol, ttl):
+        """Give a symbol its own TTL (None restores the default)."""
+        with self._lock:
+            if ttl is None:
+                self._ttls.pop(symbol.upper(), None)
+            else:
+                self._ttls[symbol.upper()] = ttl
+
+    def get(self, symbol):
+        """
+        Get a fresh cached value.
+
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        symbol = symbol.upper()
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            if time.monotonic() >= entry[0]:
+                self._remove(symbol)
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(symbol)
+            self._stats['hits'] += 1
+            return entry[2]
+
+    def set(self, symbol, value, ttl=None):
+        """
+        Store a value.
+
+        Args:
+            symbol: Symbol the value belongs to
+            value: Value to cache (e.g. a quote dict)
+            ttl: Seconds the value stays fresh (default: the symbol's TTL)
+        """
+        symbol = symbol.upper()
+        ttl = self.ttl_for(symbol) if ttl is None else ttl
+        size = _entry_size(symbol, value)
+        with self._lock:
+            if symbol in self._entries:
+                self._remove(symbol)
+            self._entries[symbol] = (time.monotonic() + ttl, size, value)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+
+    def get_or_fetch(self, symbol, fetch):
+        """
+        Get a cached value, calling fetch(symbol) and caching its result on a miss.
+
+        None results are not cached, so failed lookups are retried next time.
+        """
+        value = self.get(symbol)
+        if value is None:
+            value = fetch(symbol)
+            if value is not None:
+                self.set(symbol, value)
+        return value
+
+    def get_many_or_fetch(self, symbols, fetch_many):
+        """
+        Get cached values for many symbols, fetching all misses with one fetch_many(missing) call.
+
+        Args:
+            symbols: Symbols to look up
+            fetch_many: Callable taking a list of symbols and returning a symbol -> value dict
+
+        Returns:
+            dict: symbol -> value for the symbols that have one
+        """
+        values, missing = {}, []
+        for symbol in dict.fromkeys(symbols):
+            value = self.get(symbol)
+            if value is None:
+                missing.append(symbol)
+            else:
+                values[symbol] = value
+        if missing:
+            for symbol, value in fetch_many(missing).items():
+                if value is not None:
+                    self.set(symbol, value)
+                    values[symbol] = value
+        return values
+
+    def invalidate(self, symbol):
+        """Drop a symbol from the cache."""
+        with self._lock:
+            self._remove(symbol.upper())
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, symbol):
+        """Remove an entry (lock held)."""
+        entry = self._entries.pop(symbol, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def stats(self):
+        """Counters plus current size."""
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=self._bytes)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_price_cache = None
+_price_cache_lock = threading.Lock()
+
+
+def get_price_cache():
+    """Get the process-wide PriceCache shared by the price monitor and the UI."""
+    global _price_cache
+    if _price_cache is None:
+        with _price_cache_lock:
+            if _price_cache is None:
+                _price_cache = PriceCache()
+    return _price_cache
+
+
+def _collect_metrics():
+    """Counters of the shared cache, read when the metrics endpoint is scraped."""
+    if _price_cache is None:
+        return []
+    stats = _price_cache.stats()
+    return [
+        ('mbt_price_cache_hits_total', 'counter', "Price lookups served from the cache", [({}, stats['hits'])]),
+        ('mbt_price_cache_misses_total', 'counter', "Price lookups that had to fetch", [({}, stats['misses'])]),
+        ('mbt_price_cache_expired_total', 'counter', "Cached prices found past their TTL", [({}, stats['expired'])]),
+        ('mbt_price_cache_evictions_total', 'counter', "Prices evicted to stay within bounds",
+         [({}, stats['evictions'])]),
+        ('mbt_price_cache_entries', 'gauge', "Prices currently cached", [({}, stats['entries'])]),
+        ('mbt_price_cache_bytes', 'gauge', "Approximate memory held by cached prices", [({}, stats['bytes'])]),
+    ]
+
+
+REGISTRY.register_collector(_collect_metrics)
@@ -0,0 +1,191 @@
+import numpy as np
+import pandas as pd
+
+# Fields stored in every panel, in storage order
+PANEL_FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+class PricePanel:
+    """
+    Compact multi-symbol OHLCV store.
+
+    Each field is a contiguous float32 array of shape (symbols, dates)
+    sharing one date index; missing bars are NaN. Per-symbol series and
+    date windows are views into these arrays, so slicing a symbol out of
+    the panel does not copy the data.
+    """
+
+    def __init__(self, symbols, dates, values):
+        """
+        Initialize the panel.
+
+        Args:
+            symbols: Sequence of symbols, one per row
+            dates: pd.DatetimeIndex shared by all symbols
+            values: float32 array of shape (len(PANEL_FIELDS), len(symbols), len(dates))
+        """
+        self.symbols = tuple(symbols)
+        self.dates = pd.DatetimeIndex(dates)
+        self.values = values
+        self.rows = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self.rows
+
+    @property
+    def nbytes(self):
+        """Memory held by the price arrays."""
+        return self.values.nbytes
+
+    @classmethod
+    def empty(cls):
+        """Create a panel without symbols or dates."""
+        return cls([], pd.DatetimeIndex([]), np.empty((len(PANEL_FIELDS), 0, 0), dtype=np.float32))
+
+    @classmethod
+    def from_frames(cls, frames):
+        """
+        Build a panel from per-symbol DataFrames.
+
+        Args:
+            frames: dict mapping symbol to an OHLCV DataFrame
+
+        Returns:
+            PricePanel aligned on the union of all dates
+        """
+        frames = {symbol: df for symbol, df in frames.items() if df is not None and not df.empty}
+        if not frames:
+            return cls.empty()
+
+        dates = frames[next(iter(frames))].index
+        for df in frames.values():
+            if not df.index.equals(dates):
+                dates = dates.union(df.index)
+
+        values = np.full((len(PANEL_FIELDS), len(frames), len(dates)), np.nan, dtype=np.float32)
+        for row, df in enumerate(frames.values()):
+            positions = dates.get_indexer(df.index)
+            for f, field in enumerate(PANEL_FIELDS):
+                if field in df.columns:
+                    values[f, row, positions] = df[field].to_numpy(dtype=np.float32)
+        return cls(frames.keys(), dates, values)
+
+    @classmethod
+    def from_download(cls, data, symbols):
+        """
+        Build a panel from a yf.download result.
+
+        Args:
+            data: DataFrame from yf.download(..., group_by="ticker"); columns
+                are a (symbol, field) MultiIndex, or plain fields for one symbol
+            symbols: Symbols that were requested
+
+        Returns:
+            PricePanel holding the symbols that came back
+        """
+        if data is None or data.empty:
+            return cls.empty()
+
+        symbols = list(symbols)
+        if not isinstance(data.columns, pd.MultiIndex):
+            return cls.from_frames({symbols[0]: data})
+
+        available = set(data.columns.get_level_values(0))
+        symbols = [s for s in symbols if s in available]
+        values = np.full((len(PANEL_FIELDS), len(symbols), len(data.index)), np.nan, dtype=np.float32)
+        for row, symbol in enumerate(symbols):
+            for f, field in enumerate(PANEL_FIELDS):
+                if (symbol, field) in data.columns:
+                    values[f, row] = data[(symbol, field)].to_numpy(dtype=np.float32)
+
+        # Drop symbols that returned no bars at all
+        has_data = ~np.isnan(values[PANEL_FIELDS.index('Close')]).all(axis=1)
+        if not has_data.all():
+            values = np.ascontiguousarray(values[:, has_data])
+            symbols = [s for s, keep in zip(symbols, has_data) if keep]
+        return cls(symbols, data.index, values)
+
+    def field(self, name):
+        """Get a (symbols, dates) view of one field."""
+        return self.values[PANEL_FIELDS.index(name)]
+
+    def series(self, symbol, name):
+        """Get a zero-copy view of one field for one symbol."""
+        return self.values[PANEL_FIELDS.index(name), self.rows[symbol]]
+
+    def frame(self, symbol):
+        """
+        Get one symbol as an OHLCV DataFrame.
+
+        The frame wraps the panel memory; dates where the symbol has no
+        close are left out. Only gaps inside the symbol's history force a
+        copy, leading and trailing missing dates are sliced off as a view.
+        """
+        block = self.values[:, self.rows[symbol]].T
+        df = pd.DataFrame(block, index=self.dates, columns=list(PANEL_FIELDS), copy=False)
+        valid = ~np.isnan(block[:, PANEL_FIELDS.index('Close')])
+        if not valid.any():
+            return df.iloc[0:0]
+        first = np.argmax(valid)
+        last = len(valid) - np.argmax(valid[::-1])
+        if valid[first:last].all():
+            return df.iloc[first:last]
+        return df[valid]
+
+    def tail(self, n):
+        """Get a panel view of the last n dates."""
+        if n >= len(self.dates):
+            return self
+        return PricePanel(self.symbols, self.dates[-n:], self.values[:, :, -n:])
+
+    def between(self, start=None, end=None):
+        """Get a panel view of the dates in [start, end]."""
+        lo = 0 if start is None else self.dates.searchsorted(start, side='left')
+        hi = len(self.dates) if end is None else self.dates.searchsorted(end, side='right')
+        if lo == 0 and hi == len(self.dates):
+            return self
+        return PricePanel(self.symbols, self.dates[lo:hi], self.values[:, :, lo:hi])
+
+    def select(self, symbols):
+        """Get a panel holding only the given symbols."""
+        symbols = [s for s in symbols if s in self.rows]
+        rows = [self.rows[s] for s in symbols]
+        return PricePanel(symbols, self.dates, self.values[:, rows])
+
+    def last_valid(self, name):
+        """Get the last non-NaN value of a field for every symbol."""
+        values = self.field(name)
+        if values.shape[1] == 0:
+            return np.full(len(self.symbols), np.nan, dtype=np.float32)
+        valid = ~np.isnan(values)
+        last = values.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+        result = values[np.arange(len(self.symbols)), last]
+        result[~valid.any(axis=1)] = np.nan
+        return result
+
+    def save(self, path):
+        """Write the panel to an .npz file as raw buffers."""
+        dates = self.dates
+        tz = str(dates.tz) if dates.tz is not None else ""
+        if dates.tz is not None:
+            dates = dates.tz_convert('UTC').tz_localize(None)
+        np.savez(
+            path,
+            values=self.values,
+            dates=dates.as_unit('ns').asi8,
+            symbols=np.array(self.symbols, dtype=str),
+            tz=np.array(tz)
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Read a panel written by save()."""
+        with np.load(path, allow_pickle=False) as f:
+            dates = pd.DatetimeIndex(f['dates'].astype('datetime64[ns]'))
+            tz = str(f['tz'])
+            if tz:
+                dates = dates.tz_localize('UTC').tz_convert(tz)
+            return cls(list(f['symbols']), dates, f['values'])
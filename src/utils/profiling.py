@@ -0,0 +1,218 @@
+"""
+Opt-in timing of the stages of a Streamlit rerun.
+
+Set MBT_PROFILE to turn it on:
+
+- '1': time the stages wrapped in stage() / @timed and show them in the
+  sidebar's profile panel
+- 'cprofile' or 'pyinstrument': additionally capture a full profile of
+  every rerun to MBT_PROFILE_DIR (default .cache/profiles)
+
+Stages nest ('render/plot') and are aggregated per rerun on the thread
+running the script, so worker threads and the price monitor don't mix
+into a page's numbers. When profiling is off stage() returns a shared
+no-op context manager and @timed calls straight through.
+"""
+import os
+import time
+import logging
+import threading
+import functools
+from contextlib import contextmanager, nullcontext
+
+PROFILE_ENV = "MBT_PROFILE"
+PROFILE_DIR_ENV = "MBT_PROFILE_DIR"
+DEFAULT_PROFILE_DIR = os.path.join('.cache', 'profiles')
+CAPTURE_MODES = ('cprofile', 'pyinstrument')
+
+_NULL = nullcontext()
+_local = threading.local()
+_enabled = False
+_capture = None
+
+
+def configure(mode=None):
+    """
+    Turn profiling on or off.
+
+    Args:
+        mode: '1', 'cprofile', 'pyinstrument', or '' / '0' to disable
+              (default: MBT_PROFILE)
+    """
+    global _enabled, _capture
+    mode = (os.environ.get(PROFILE_ENV, '') if mode is None else mode).strip().lower()
+    _enabled = mode not in ('', '0', 'false', 'off')
+    _capture = mode if mode in CAPTURE_MODES else None
+
+
+def enabled():
+    """Whether stage timing is on."""
+    return _enabled
+
+
+class RerunProfile:
+    """Stage timings of one rerun."""
+
+    def __init__(self, view):
+        self.view = view
+        self.started_at = time.time()
+        self.total = 0.0
+        self.stages = {}  # path -> [calls, seconds], in first-seen order
+        self.capture_path = None
+        self._path = []
+
+    def add(self, path, seconds):
+        entry = self.stages.setdefault(path, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    @property
+    def untracked(self):
+        """Time of the rerun not inside any top-level stage."""
+        tracked = sum(seconds for path, (_, seconds) in self.stages.items() if '/' not in path)
+        return max(self.total - tracked, 0.0)
+
+    def rows(self):
+        """
+        Stage table for display.
+
+        Returns:
+            list: Dicts with stage, calls, seconds and share of the rerun
+        """
+        total = self.total or 1.0
+        rows = [
+            {'stage': path, 'calls': calls, 'seconds': round(seconds, 4), 'share': f"{seconds / total:.0%}"}
+            for path, (calls, seconds) in self.stages.items()
+        ]
+        rows.append({'stage': '(untracked)', 'calls': 1, 'seconds': round(self.untracked, 4),
+                     'share': f"{self.untracked / total:.0%}"})
+        return rows
+
+    def summary(self):
+        """One-line summary for logs."""
+        parts = ", ".join(f"{path}={seconds:.3f}s" for path, (_, seconds) in self.stages.items() if '/' not in path)
+        return f"{self.view} rerun {self.total:.3f}s ({parts})"
+
+
+class _Stage:
+    __slots__ = ('profile', 'name', 'path', 'start')
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.profile._path.append(self.name)
+        self.path = "/".join(self.profile._path)
+        # Register on entry so parents are listed before their children
+        self.profile.stages.setdefault(self.path, [0, 0.0])
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profile.add(self.path, time.perf_counter() - self.start)
+        self.profile._path.pop()
+        return False
+
+
+def stage(name):
+    """
+    Time a block as a stage of the current rerun.
+
+    Usage:
+        with profiling.stage('fetch'):
+            data = get_stock_data(symbol)
+    """
+    if not _enabled:
+        return _NULL
+    profile = getattr(_local, 'profile', None)
+    if profile is None:
+        return _NULL
+    return _Stage(profile, name)
+
+
+def timed(name):
+    """Decorator timing every call of a function as a stage."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def current():
+    """RerunProfile being recorded on this thread, or None."""
+    return getattr(_local, 'profile', None)
+
+
+def _start_capture():
+    """Start the configured whole-rerun profiler, if any."""
+    if _capture == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+        except ImportError:
+            logging.warning("pyinstrument is not installed, capturing with cProfile instead")
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # Only one profiler can be active per process on newer Pythons
+        logging.warning(f"Could not start profiler: {e}")
+        return None
+    return profiler
+
+
+def _stop_capture(profiler, view):
+    """Stop a profiler and write its output; returns the file path."""
+    directory = os.environ.get(PROFILE_DIR_ENV, DEFAULT_PROFILE_DIR)
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    if hasattr(profiler, 'output_html'):
+        profiler.stop()
+        path = os.path.join(directory, f"{view}-{stamp}.html")
+        with open(path, 'w') as f:
+            f.write(profiler.output_html())
+    else:
+        profiler.disable()
+        path = os.path.join(directory, f"{view}-{stamp}.prof")
+        profiler.dump_stats(path)
+    return path
+
+
+@contextmanager
+def rerun(view):
+    """
+    Record the stages of one rerun of a view.
+
+    Yields:
+        RerunProfile, or None when profiling is off
+    """
+    if not _enabled:
+        yield None
+        return
+    profile = RerunProfile(view)
+    _local.profile = profile
+    profiler = _start_capture() if _capture else None
+    start = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        profile.total = time.perf_counter() - start
+        _local.profile = None
+        if profiler is not None:
+            try:
+                profile.capture_path = _stop_capture(profiler, view)
+            except OSError as e:
+                logging.warning(f"Could not write profile: {e}")
+        logging.debug(profile.summary())
+
+
+configure()
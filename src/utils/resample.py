@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+# How each OHLCV column combines when bars are merged into coarser ones
+OHLCV_AGG = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+# pandas frequency of each bar interval
+INTERVAL_RULES = {'1m': '1min', '5m': '5min', '15m': '15min', '1h': '1h'}
+# Calendar intervals derived from daily bars, labelled by the first day of the week/month
+CALENDAR_RULES = {'1wk': 'W-MON', '1mo': 'MS'}
+
+
+def resample_bars(data, interval):
+    """
+    Merge bars into coarser bars (e.g. 1m into 5m or 1h).
+
+    Bins are aligned to the minute of the first bar, so hourly bars built
+    from an equity session start at 9:30 like the ones Yahoo serves, while
+    24/7 markets stay aligned to the hour. Empty bins (nights, weekends)
+    are dropped.
+
+    Args:
+        data (pd.DataFrame): OHLCV bars with a DatetimeIndex
+        interval (str): Target interval ('5m', '15m', '1h', or '1wk'/'1mo' from daily bars)
+
+    Returns:
+        pd.DataFrame: Resampled OHLCV bars
+    """
+    if data.empty:
+        return data
+    columns = {column: how for column, how in OHLCV_AGG.items() if column in data.columns}
+    if interval in CALENDAR_RULES:
+        bars = data.resample(CALENDAR_RULES[interval], label='left', closed='left').agg(columns)
+        return bars.dropna(subset=['Close'])
+
+    rule = pd.Timedelta(INTERVAL_RULES[interval])
+    first = data.index[0]
+    offset = pd.Timedelta(minutes=(first.hour * 60 + first.minute) % (rule.total_seconds() // 60))
+    bars = data.resample(rule, origin='start_day', offset=offset).agg(columns)
+    return bars.dropna(subset=['Close'])
+
+
+def period_ranges(data, starts):
+    """
+    High and low of the trailing windows of a series, in one pass.
+
+    Suffix maxima/minima are computed once; every window is then a lookup
+    at the index where it starts.
+
+    Args:
+        data (pd.DataFrame): Bars with 'High' and 'Low' columns
+        starts (dict): name -> first timestamp of the trailing window
+
+    Returns:
+        dict: name -> {'high', 'low'}, or None when the series is empty
+    """
+    if data.empty:
+        return {name: None for name in starts}
+    highs = np.fmax.accumulate(data['High'].to_numpy(dtype=np.float64)[::-1])[::-1]
+    lows = np.fmin.accumulate(data['Low'].to_numpy(dtype=np.float64)[::-1])[::-1]
+    rows = np.minimum(data.index.searchsorted(list(starts.values()), side='left'), len(data) - 1)
+    return {
+        name: {'high': float(highs[row]), 'low': float(lows[row])}
+        for name, row in zip(starts, rows)
+    }
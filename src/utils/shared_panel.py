@@ -0,0 +1,366 @@
+"""
+Price panels shared between processes through memory-mapped files.
+
+The worker publishes the panels it builds into files under
+SHARED_PANEL_DIR (in /dev/shm where available, so they never touch the
+disk). Readers map them read-only and wrap the mapping in a PricePanel,
+so every consumer reads the same bytes without pickling or copying.
+
+Each file holds two slots of dates and values. The writer fills the slot
+readers are not using and then flips the active slot, bumping a version
+counter around the flip (odd while it is switching). A reader retries
+while the counter is odd or changes under it, so a snapshot is always
+one complete publish. Each slot also records the version it holds, which
+the writer clears before it starts overwriting the slot (the second
+publish after a snapshot), so is_intact() tells whether a snapshot's
+views still show what was read. A panel with other symbols or more dates
+than fit is written to a new file that replaces the old one; the old
+file is marked retired, so readers reopen the path, and existing views
+stay valid until they are dropped.
+
+File layout (all little-endian):
+    header     int64[HEADER_WORDS], see the H_* indices
+    tz         TZ_BYTES, timezone name of the dates (empty for naive)
+    symbols    S<width>[symbols]
+    per slot:  dates int64[capacity] (ns since epoch, UTC)
+               values float32[len(PANEL_FIELDS), symbols, capacity]
+"""
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from src.utils.price_panel import PricePanel, PANEL_FIELDS
+
+SHARED_PANEL_DIR_ENV = "MBT_SHARED_PANEL_DIR"
+DEFAULT_DIR = os.path.join('/dev/shm', 'mbt') if os.path.isdir('/dev/shm') else os.path.join('.cache', 'shm')
+MAGIC = 0x4c454e4150544d42  # b'MBTPANEL'
+HEADER_WORDS = 16
+TZ_BYTES = 64
+DATE_HEADROOM = 64  # Spare dates per slot, so new bars are written in place
+MAX_SEGMENTS = 32  # Files a writer keeps before removing the least recently published
+READ_RETRIES = 1000  # Attempts to read a stable header before giving up
+
+# Header words
+H_MAGIC, H_VERSION, H_RETIRED, H_SYMBOLS, H_CAPACITY, H_WIDTH, H_ACTIVE, H_DATES = range(8)  # H_DATES, H_DATES + 1: dates per slot
+H_SLOT_VERSION = 9  # H_SLOT_VERSION, H_SLOT_VERSION + 1: version each slot holds, EMPTY_SLOT while it is written
+EMPTY_SLOT = -1
+
+
+def shared_panel_dir():
+    """Directory the shared panel files live in."""
+    return os.environ.get(SHARED_PANEL_DIR_ENV, DEFAULT_DIR)
+
+
+def panel_name(*key):
+    """Stable file name for a panel identified by key (e.g. symbols, period, interval)."""
+    return hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+
+
+def _align(offset):
+    return (offset + 7) // 8 * 8
+
+
+class _Layout:
+    """Offsets of the arrays in a panel file."""
+
+    def __init__(self, symbols, capacity, width):
+        self.symbols = symbols
+        self.capacity = capacity
+        self.width = width
+        self.tz = HEADER_WORDS * 8
+        self.names = self.tz + TZ_BYTES
+        slot = _align(self.names + symbols * width)
+        self.dates_size = capacity * 8
+        self.values_shape = (len(PANEL_FIELDS), symbols, capacity)
+        self.slot_size = _align(self.dates_size + int(np.prod(self.values_shape)) * 4)
+        self.slots = (slot, slot + self.slot_size)
+        self.size = slot + 2 * self.slot_size
+
+    @classmethod
+    def of(cls, header):
+        return cls(int(header[H_SYMBOLS]), int(header[H_CAPACITY]), int(header[H_WIDTH]))
+
+    def header(self, data):
+        return np.ndarray((HEADER_WORDS,), dtype='<i8', buffer=data, offset=0)
+
+    def dates(self, data, slot):
+        return np.ndarray((self.capacity,), dtype='<i8', buffer=data, offset=self.slots[slot])
+
+    def values(self, data, slot):
+        return np.ndarray(self.values_shape, dtype='<f4', buffer=data, offset=self.slots[slot] + self.dates_size)
+
+
+def _utc_ns(dates):
+    """Dates as int64 nanoseconds since the epoch (UTC), plus their timezone name."""
+    tz = str(dates.tz) if dates.tz is not None else ""
+    if dates.tz is not None:
+        dates = dates.tz_convert('UTC').tz_localize(None)
+    return dates.as_unit('ns').asi8, tz
+
+
+class SharedPanelWriter:
+    """Publishes panels into shared files; used by the process that builds them (the worker)."""
+
+    def __init__(self, directory=None, max_segments=MAX_SEGMENTS):
+        """
+        Initialize the writer.
+
+        Args:
+            directory: Where the files are created (default: shared_panel_dir())
+            max_segments: Files kept before the least recently published one is removed
+        """
+        self.directory = directory or shared_panel_dir()
+        self.max_segments = max_segments
+        self._segments = OrderedDict()  # name -> (memmap, layout)
+        self._lock = threading.Lock()
+
+    def path(self, name):
+        """File a named panel is published to."""
+        return os.path.join(self.directory, f"{name}.panel")
+
+    def publish(self, name, panel):
+        """
+        Make a panel available to readers under a name.
+
+        The active slot of the existing file is left alone while the other
+        slot is written. Publishing a panel equal to the current one keeps
+        the version, so readers' caches stay valid.
+
+        Returns:
+            tuple: (path, version) of the published panel
+        """
+        dates, tz = _utc_ns(panel.dates)
+        with self._lock:
+            data, layout = self._segments.get(name, (None, None))
+            fits = data is not None and self._fits(data, layout, panel, tz)
+            if fits and self._unchanged(data, layout, panel, dates):
+                self._segments.move_to_end(name)
+                return self.path(name), int(layout.header(data)[H_VERSION])
+            if not fits:
+                data, layout = self._create(name, panel, dates, tz, data, layout)
+            else:
+                header = layout.header(data)
+                slot = 1 - int(header[H_ACTIVE])
+                # Views of the snapshot in this slot stop being intact before it changes
+                header[H_SLOT_VERSION + slot] = EMPTY_SLOT
+                self._fill(data, layout, slot, panel, dates)
+                header[H_SLOT_VERSION + slot] = int(header[H_VERSION]) + 2
+                # Readers retry while the version is odd
+                header[H_VERSION] += 1
+                header[H_ACTIVE] = slot
+                header[H_VERSION] += 1
+            self._segments[name] = (data, layout)
+            self._segments.move_to_end(name)
+            self._evict()
+            return self.path(name), int(layout.header(data)[H_VERSION])
+
+    def share(self, name, panel):
+        """
+        Publish a panel and map it back, for consumers in the writer's own process.
+
+        Returns:
+            PricePanel: Views of the published copy, the bytes other processes read
+        """
+        path, _ = self.publish(name, panel)
+        return read_shared_panel(path)[0]
+
+    def _fill(self, data, layout, slot, panel, dates):
+        count = len(dates)
+        layout.dates(data, slot)[:count] = dates
+        layout.values(data, slot)[:, :, :count] = panel.values
+        layout.header(data)[H_DATES + slot] = count
+
+    def _unchanged(self, data, layout, panel, dates):
+        header = layout.header(data)
+        slot = int(header[H_ACTIVE])
+        count = int(header[H_DATES + slot])
+        if count != len(dates):
+            return False
+        stored = layout.values(data, slot)[:, :, :count]
+        return (np.array_equal(layout.dates(data, slot)[:count], dates)
+                and np.array_equal(stored, panel.values, equal_nan=True))
+
+    def _fits(self, data, layout, panel, tz):
+        """Whether a panel can be written into an existing file."""
+        if len(panel.dates) > layout.capacity or len(panel) != layout.symbols:
+            return False
+        names = np.ndarray((layout.symbols,), dtype=f'S{layout.width}', buffer=data, offset=layout.names)
+        stored_tz = bytes(data[layout.tz:layout.tz + TZ_BYTES]).rstrip(b'\0').decode()
+        return stored_tz == tz and tuple(s.decode() for s in names) == panel.symbols
+
+    def _create(self, name, panel, dates, tz, old=None, old_layout=None):
+        """Write a panel to a new file and swap it in for the old one."""
+        encoded = [s.encode() for s in panel.symbols]
+        width = max([len(s) for s in encoded] + [1])
+        layout = _Layout(len(encoded), len(dates) + DATE_HEADROOM, width)
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(name)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        data = np.memmap(tmp, dtype=np.uint8, mode='w+', shape=(layout.size,))
+        header = layout.header(data)
+        header[H_MAGIC] = MAGIC
+        header[H_SYMBOLS] = layout.symbols
+        header[H_CAPACITY] = layout.capacity
+        header[H_WIDTH] = width
+        header[H_ACTIVE] = 0
+        # Versions keep increasing across files, so readers' cache keys do too
+        header[H_VERSION] = (int(old_layout.header(old)[H_VERSION]) if old is not None else 0) + 2
+        header[H_SLOT_VERSION] = header[H_VERSION]
+        header[H_SLOT_VERSION + 1] = EMPTY_SLOT
+        data[layout.tz:layout.tz + len(tz)] = np.frombuffer(tz.encode(), dtype=np.uint8)
+        np.ndarray((layout.symbols,), dtype=f'S{width}', buffer=data, offset=layout.names)[:] = encoded
+        self._fill(data, layout, 0, panel, dates)
+        # Complete before readers can open it
+        os.replace(tmp, path)
+        if old is not None:
+            old_layout.header(old)[H_RETIRED] = 1
+        return data, layout
+
+    def _evict(self):
+        while len(self._segments) > self.max_segments:
+            name, (data, layout) = self._segments.popitem(last=False)
+            self._remove(name, data, layout)
+
+    def _remove(self, name, data, layout):
+        layout.header(data)[H_RETIRED] = 1
+        try:
+            os.unlink(self.path(name))
+        except OSError:
+            pass
+
+    def close(self):
+        """Remove every published file; readers keep the views they already have."""
+        with self._lock:
+            while self._segments:
+                name, (data, layout) = self._segments.popitem()
+                self._remove(name, data, layout)
+
+
+class SharedPanelReader:
+    """Maps a published panel read-only and hands out zero-copy snapshots of it."""
+
+    def __init__(self, path):
+        """
+        Initialize the reader.
+
+        Args:
+            path: File the panel is published to (from SharedPanelWriter.publish)
+        """
+        self.path = path
+        self._data = None
+        self._layout = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        data = np.memmap(self.path, dtype=np.uint8, mode='r')
+        header = np.ndarray((HEADER_WORDS,), dtype='<i8', buffer=data, offset=0)
+        if int(header[H_MAGIC]) != MAGIC:
+            raise ValueError(f"{self.path} is not a shared panel")
+        self._data, self._layout = data, _Layout.of(header)
+
+    def _header(self):
+        if self._data is None or self._layout.header(self._data)[H_RETIRED]:
+            self._open()
+        return self._layout.header(self._data)
+
+    @property
+    def version(self):
+        """Version of the latest publish."""
+        with self._lock:
+            return int(self._header()[H_VERSION]) & ~1
+
+    def read(self, copy=False):
+        """
+        Get the current panel.
+
+        The values are views into the shared mapping. They stay as they
+        are until the writer publishes twice more, so callers that keep a
+        panel check its version with is_intact() before using it (and read
+        again if it fails), or read a copy.
+
+        Args:
+            copy: Copy the values out of the mapping, checked against the
+                version after copying, so the panel can be kept indefinitely
+
+        Returns:
+            tuple: (PricePanel, version)
+
+        Raises:
+            OSError: If the file doesn't exist (the writer is gone)
+            TimeoutError: If the writer never lets go of the header
+        """
+        with self._lock:
+            for _ in range(READ_RETRIES):
+                header = self._header()
+                version = int(header[H_VERSION])
+                if version & 1:
+                    time.sleep(0)
+                    continue
+                data, layout = self._data, self._layout
+                slot = int(header[H_ACTIVE])
+                count = int(header[H_DATES + slot])
+                dates = layout.dates(data, slot)[:count].copy()
+                values = layout.values(data, slot)[:, :, :count]
+                if copy:
+                    values = values.copy()
+                if (int(header[H_VERSION]) != version or header[H_RETIRED]
+                        or int(header[H_SLOT_VERSION + slot]) != version):
+                    continue
+                break
+            else:
+                raise TimeoutError(f"{self.path} stayed locked by its writer")
+
+            names = np.ndarray((layout.symbols,), dtype=f'S{layout.width}', buffer=data, offset=layout.names)
+            tz = bytes(data[layout.tz:layout.tz + TZ_BYTES]).rstrip(b'\0').decode()
+        index = pd.DatetimeIndex(dates.astype('datetime64[ns]'))
+        if tz:
+            index = index.tz_localize('UTC').tz_convert(tz)
+        return PricePanel([s.decode() for s in names], index, values), version
+
+    def is_intact(self, version):
+        """
+        Whether the views of a snapshot read at a version still hold that version's data.
+
+        A slot's version is cleared before the writer overwrites it, so this
+        is False from the start of the second publish after the snapshot.
+        Snapshots of a retired file stay intact (it is never written again);
+        ones from a file this reader has since replaced report False.
+        """
+        with self._lock:
+            if self._data is None:
+                return False
+            # The mapping the latest snapshot came from, without reopening a retired file
+            header = self._layout.header(self._data)
+            return version in (int(header[H_SLOT_VERSION]), int(header[H_SLOT_VERSION + 1]))
+
+
+_readers = {}
+_readers_lock = threading.Lock()
+
+
+def read_shared_panel(path, copy=False):
+    """
+    Map a published panel, reusing one reader per file.
+
+    Args:
+        path: File the panel is published to
+        copy: Return a private copy instead of views (see SharedPanelReader.read)
+
+    Returns:
+        tuple: (PricePanel, version)
+    """
+    with _readers_lock:
+        reader = _readers.get(path)
+        if reader is None:
+            reader = _readers[path] = SharedPanelReader(path)
+    return reader.read(copy)
+
+
+def shared_panel_intact(path, version):
+    """Whether a snapshot read_shared_panel() returned for a path still holds its data."""
+    with _readers_lock:
+        reader = _readers.get(path)
+    return reader is not None and reader.is_intact(version)
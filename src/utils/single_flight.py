@@ -0,0 +1,97 @@
+import time
+import threading
+
+MAX_RESULTS = 4096  # Completed results kept for the TTL window
+
+
+class _Call:
+    """An in-flight call that other callers wait on."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls with the same key.
+
+    The first caller for a key runs the function; callers arriving while it
+    runs wait for it and share its result (or exception). With a ttl the
+    result is also reused by callers arriving within ttl seconds after the
+    call finished, so upstream load is capped at one call per key per window.
+    """
+
+    def __init__(self, ttl=0.0, max_results=MAX_RESULTS):
+        """
+        Initialize the group.
+
+        Args:
+            ttl: Seconds a completed result is reused (0 only shares in-flight calls)
+            max_results: Maximum number of completed results kept
+        """
+        self.ttl = ttl
+        self.max_results = max_results
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._results = {}
+        self.stats = {'executed': 0, 'shared': 0, 'cached': 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) once for all concurrent callers with this key.
+
+        Returns:
+            The result of the shared call
+        """
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                expires_at, result = cached
+                if time.monotonic() < expires_at:
+                    self.stats['cached'] += 1
+                    return result
+                del self._results[key]
+
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats['executed'] += 1
+            else:
+                self.stats['shared'] += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None and self.ttl > 0:
+                    self._store(key, call.result)
+            call.event.set()
+
+    def _store(self, key, result):
+        """Keep a completed result for the TTL window (lock held)."""
+        now = time.monotonic()
+        if len(self._results) >= self.max_results:
+            self._results = {k: v for k, v in self._results.items() if v[0] > now}
+            # Still full: drop the oldest entries
+            while len(self._results) >= self.max_results:
+                del self._results[next(iter(self._results))]
+        self._results[key] = (now + self.ttl, result)
+
+    def forget(self, key):
+        """Drop a completed result so the next call fetches again."""
+        with self._lock:
+            self._results.pop(key, None)
@@ -0,0 +1,165 @@
+import os
+import time
+import logging
+import numpy as np
+
+logger = logging.getLogger('symbol_index')
+
+SYMBOL_INDEX_FILE = os.path.join('.cache', 'symbol_index.npy')
+MAX_ENTRY_AGE = 7 * 24 * 60 * 60  # Price/market cap entries older than a week are treated as unknown
+STALE_TOLERANCE = 0.25  # Known values may have moved this much since they were recorded
+
+# One fixed-width record per symbol; NaN marks an unknown value
+INDEX_DTYPE = np.dtype([
+    ('symbol', 'U12'),
+    ('length', 'u1'),
+    ('exchange', 'U8'),
+    ('last_price', 'f4'),
+    ('market_cap', 'f8'),
+    ('avg_volume', 'f8'),
+    ('updated_at', 'f8'),
+])
+
+
+class SymbolIndex:
+    """Compact, array-backed metadata index consulted before downloading symbol data."""
+
+    def __init__(self, path=SYMBOL_INDEX_FILE):
+        """
+        Initialize the index, loading it from disk if it exists.
+
+        Args:
+            path: File the index is persisted to
+        """
+        self.path = path
+        self.records = np.empty(0, dtype=INDEX_DTYPE)
+        self._rows = {}
+        self._load()
+
+    def _load(self):
+        """Load the index from disk."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            records = np.load(self.path, allow_pickle=False)
+            if records.dtype != INDEX_DTYPE:
+                logger.warning(f"Ignoring symbol index {self.path} with outdated layout")
+                return
+            self.records = records
+            self._rows = {symbol: i for i, symbol in enumerate(records['symbol'])}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load symbol index {self.path}: {e}")
+
+    def save(self):
+        """Persist the index to disk."""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp.npy"
+        np.save(tmp_path, self.records, allow_pickle=False)
+        os.replace(tmp_path, self.path)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, symbol):
+        return symbol in self._rows
+
+    def ensure(self, symbols, exchanges=None):
+        """
+        Add any symbols not yet in the index.
+
+        Args:
+            symbols: Iterable of symbols (a Universe also provides exchanges)
+            exchanges: Optional exchange per symbol, parallel to symbols
+        """
+        if exchanges is None:
+            exchanges = getattr(symbols, 'exchanges', None)
+        symbols = list(symbols)
+        if exchanges is None:
+            exchanges = [""] * len(symbols)
+
+        new_symbols = []
+        new_exchanges = []
+        for symbol, exchange in zip(symbols, exchanges):
+            if symbol not in self._rows:
+                self._rows[symbol] = len(self.records) + len(new_symbols)
+                new_symbols.append(symbol)
+                new_exchanges.append(exchange or "")
+            elif exchange and not self.records['exchange'][self._rows[symbol]]:
+                self.records['exchange'][self._rows[symbol]] = exchange
+
+        if not new_symbols:
+            return
+
+        new_records = np.empty(len(new_symbols), dtype=INDEX_DTYPE)
+        new_records['symbol'] = new_symbols
+        new_records['length'] = [len(s) for s in new_symbols]
+        new_records['exchange'] = new_exchanges
+        for field in ('last_price', 'market_cap', 'avg_volume', 'updated_at'):
+            new_records[field] = np.nan
+        self.records = np.concatenate([self.records, new_records])
+
+    def update(self, symbol, last_price=None, market_cap=None, avg_volume=None):
+        """Record the latest known values for a symbol."""
+        self.ensure([symbol])
+        record = self.records[self._rows[symbol]]
+        if last_price is not None:
+            record['last_price'] = last_price
+        if market_cap is not None:
+            record['market_cap'] = market_cap
+        if avg_volume is not None:
+            record['avg_volume'] = avg_volume
+        record['updated_at'] = time.time()
+
+    def get(self, symbol):
+        """Get the record of a symbol as a dict, or None if it is not indexed."""
+        row = self._rows.get(symbol)
+        if row is None:
+            return None
+        record = self.records[row]
+        return {name: record[name].item() for name in INDEX_DTYPE.names}
+
+    def candidates(self, symbols, max_symbol_length=None, min_price=None, max_price=None,
+                   min_market_cap=None, min_avg_volume=None, tolerance=STALE_TOLERANCE):
+        """
+        Select the symbols that can possibly pass the static filters.
+
+        Symbol length is exact; price, market cap and volume are last known
+        values, so they are widened by `tolerance` and ignored when unknown or
+        older than MAX_ENTRY_AGE. A symbol is only dropped when its recorded
+        values rule it out.
+
+        Args:
+            symbols: Symbols to plan downloads for, in order
+            max_symbol_length: Maximum symbol length
+            min_price: Minimum price
+            max_price: Maximum price
+            min_market_cap: Minimum market cap
+            min_avg_volume: Minimum average volume
+            tolerance: Relative slack applied to recorded values
+
+        Returns:
+            list: The subset of symbols worth downloading, in input order
+        """
+        symbols = list(symbols)
+        self.ensure(symbols)
+        records = self.records[[self._rows[s] for s in symbols]]
+
+        keep = np.ones(len(records), dtype=bool)
+        if max_symbol_length is not None:
+            keep &= records['length'] <= max_symbol_length
+
+        # Only trust values that were recorded recently
+        known = (time.time() - records['updated_at']) <= MAX_ENTRY_AGE
+
+        with np.errstate(invalid='ignore'):
+            price = records['last_price']
+            if min_price is not None:
+                keep &= ~(known & (price < min_price * (1 - tolerance)))
+            if max_price is not None:
+                keep &= ~(known & (price > max_price * (1 + tolerance)))
+            if min_market_cap is not None:
+                keep &= ~(known & (records['market_cap'] < min_market_cap * (1 - tolerance)))
+            if min_avg_volume is not None:
+                keep &= ~(known & (records['avg_volume'] < min_avg_volume * (1 - tolerance)))
+
+        return [symbols[i] for i in np.flatnonzero(keep)]
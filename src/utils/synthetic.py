@@ -0,0 +1,318 @@
+"""
+Synthetic market data for load testing.
+
+generate_panel() builds OHLCV bars for any number of symbols on the
+sessions of a market calendar: geometric Brownian motion with Merton
+jumps, per-symbol volatility, overnight gaps, late listings, missing bars
+and stray NaNs (which clean_stock_data has to drop). Everything is
+vectorised, so 10k symbols x 2 years of daily bars take a few seconds.
+The result is a PricePanel that can be saved for the replay provider or
+written in the bar store format, which SyntheticProvider.from_bar_store
+(MBT_SYNTHETIC_BAR_STORE) serves to the data loader.
+
+TickStream continues the last closes as a live random walk, for load
+testing the alert monitor through SyntheticProvider.
+
+Command line (from the repository root):
+    python -m src.utils.synthetic --symbols 10000 --sessions 504 --out .cache/replay/synthetic.npz
+    python -m src.utils.synthetic --symbols 100 --bar-store .cache/synthetic
+    python -m src.utils.synthetic --symbols 5 --ticks 20 --tick-interval 0.5
+"""
+import os
+import sys
+import time
+import string
+import argparse
+import numpy as np
+import pandas as pd
+from src.utils.price_panel import PricePanel, PANEL_FIELDS
+from src.utils.market_calendar import get_calendar
+from src.utils.bar_store import BarStore, INTERVAL_SECONDS
+
+TRADING_DAYS = 252
+SESSION_SECONDS = 6.5 * 60 * 60  # Length of a regular NYSE session
+DEFAULT_SESSIONS = 2 * TRADING_DAYS
+DEFAULT_VOLATILITY = (0.15, 0.80)  # Range of annualised volatilities drawn per symbol
+DEFAULT_DRIFT = 0.05  # Annualised drift
+JUMP_INTENSITY = 2.0  # Expected jumps per symbol per year
+JUMP_MEAN = -0.01  # Mean log jump size
+JUMP_STD = 0.06  # Standard deviation of the log jump size
+GAP_PROBABILITY = 0.02  # Chance an open gaps away from the previous close
+GAP_STD = 0.03  # Standard deviation of a gap
+MISSING_PROBABILITY = 0.002  # Chance a bar is missing entirely
+NAN_PROBABILITY = 0.001  # Chance a single field of a bar is NaN
+LISTING_PROBABILITY = 0.05  # Share of symbols listed part way through the range
+
+
+def make_symbols(count):
+    """Distinct 4-letter symbols (AAAA, AAAB, ...)."""
+    letters = np.array(list(string.ascii_uppercase))
+    index = np.arange(count)
+    digits = [(index // 26 ** p) % 26 for p in range(3, -1, -1)]
+    return ["".join(chars) for chars in zip(*(letters[d] for d in digits))]
+
+
+def bar_times(calendar, start=None, end=None, sessions=DEFAULT_SESSIONS, interval='1d'):
+    """
+    Timestamps of the bars between two dates on a calendar.
+
+    Args:
+        calendar: MarketCalendar the bars trade on
+        start: First session (default: `sessions` sessions before end)
+        end: Last session (default: today)
+        sessions: Number of sessions when start is not given
+        interval: '1d' or an intraday interval
+
+    Returns:
+        pd.DatetimeIndex in the calendar's timezone
+    """
+    end = pd.Timestamp(end if end is not None else pd.Timestamp.now(tz=calendar.timezone).date())
+    hi = int(np.searchsorted(calendar.dates, np.datetime64(end.date(), 'D'), side='right'))
+    if start is not None:
+        lo = int(np.searchsorted(calendar.dates, np.datetime64(pd.Timestamp(start).date(), 'D'), side='left'))
+    else:
+        lo = max(hi - sessions, 0)
+
+    if interval == '1d':
+        return pd.DatetimeIndex(calendar.dates[lo:hi]).tz_localize(calendar.timezone)
+
+    # Intraday: every step from each session's open up to its close
+    step = INTERVAL_SECONDS[interval] * 1_000_000_000
+    opens, closes = calendar.opens[lo:hi], calendar.closes[lo:hi]
+    counts = (closes - opens) // step
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    stamps = np.repeat(opens, counts) + offsets * step
+    return pd.DatetimeIndex(stamps.astype('datetime64[ns]')).tz_localize('UTC').tz_convert(calendar.timezone)
+
+
+def generate_panel(symbols=100, start=None, end=None, sessions=DEFAULT_SESSIONS, interval='1d',
+                   volatility=DEFAULT_VOLATILITY, drift=DEFAULT_DRIFT, jump_intensity=JUMP_INTENSITY,
+                   gap_probability=GAP_PROBABILITY, missing_probability=MISSING_PROBABILITY,
+                   nan_probability=NAN_PROBABILITY, listing_probability=LISTING_PROBABILITY,
+                   calendar=None, seed=0):
+    """
+    Generate OHLCV bars for many symbols.
+
+    Args:
+        symbols: Number of symbols, or a list of symbol names
+        start: First session (default: `sessions` sessions before end)
+        end: Last session (default: today)
+        sessions: Number of sessions when start is not given
+        interval: '1d' or an intraday interval ('1h', '15m', '5m', '1m')
+        volatility: Annualised volatility, or a (low, high) range drawn per symbol
+        drift: Annualised drift
+        jump_intensity: Expected jumps per symbol per year
+        gap_probability: Chance an open gaps away from the previous close
+        missing_probability: Chance a bar is missing entirely (all fields NaN)
+        nan_probability: Chance a single field of a bar is NaN
+        listing_probability: Share of symbols without bars before a random listing date
+        calendar: MarketCalendar (default: NYSE)
+        seed: Random seed
+
+    Returns:
+        PricePanel with float32 values
+    """
+    rng = np.random.default_rng(seed)
+    calendar = calendar or get_calendar()
+    names = make_symbols(symbols) if isinstance(symbols, int) else list(symbols)
+    dates = bar_times(calendar, start, end, sessions, interval)
+    count, bars = len(names), len(dates)
+    if not count or not bars:
+        return PricePanel(names, dates, np.full((len(PANEL_FIELDS), count, bars), np.nan, dtype=np.float32))
+
+    # Share of a trading year each bar covers
+    if interval == '1d':
+        dt = 1.0 / TRADING_DAYS
+    else:
+        dt = INTERVAL_SECONDS[interval] / SESSION_SECONDS / TRADING_DAYS
+
+    if np.ndim(volatility):
+        sigma = rng.uniform(volatility[0], volatility[1], size=(count, 1))
+    else:
+        sigma = np.full((count, 1), float(volatility))
+
+    # Log returns: GBM plus compound Poisson jumps
+    returns = (drift - 0.5 * sigma ** 2) * dt + sigma * np.sqrt(dt) * rng.standard_normal((count, bars))
+    jumps = rng.random((count, bars)) < jump_intensity * dt
+    returns[jumps] += rng.normal(JUMP_MEAN, JUMP_STD, size=int(jumps.sum()))
+    start_prices = np.exp(rng.uniform(np.log(2), np.log(500), size=(count, 1)))
+    close = start_prices * np.exp(np.cumsum(returns, axis=1))
+
+    # Opens sit near the previous close, sometimes gapping away from it
+    previous = np.concatenate([start_prices, close[:, :-1]], axis=1)
+    noise = sigma * np.sqrt(dt) * 0.2 * rng.standard_normal((count, bars))
+    gaps = rng.random((count, bars)) < gap_probability
+    noise[gaps] += rng.normal(0, GAP_STD, size=int(gaps.sum()))
+    open_ = previous * np.exp(noise)
+
+    wick = np.abs(sigma * np.sqrt(dt) * 0.5 * rng.standard_normal((2, count, bars)))
+    high = np.maximum(open_, close) * np.exp(wick[0])
+    low = np.minimum(open_, close) * np.exp(-wick[1])
+    # Volume rises with the size of the move
+    volume = rng.lognormal(np.log(1e6), 1.0, size=(count, 1)) * (1 + 20 * np.abs(returns)) \
+        * rng.lognormal(0, 0.3, size=(count, bars))
+
+    values = np.stack([open_, high, low, close, volume]).astype(np.float32)
+
+    # Late listings: no bars before a random date
+    listed = rng.random(count) < listing_probability
+    first_bar = np.where(listed, rng.integers(0, max(bars - 1, 1), size=count), 0)
+    values[:, np.arange(bars)[None, :] < first_bar[:, None]] = np.nan
+    # Missing bars and single NaN fields
+    values[:, rng.random((count, bars)) < missing_probability] = np.nan
+    values[rng.random(values.shape) < nan_probability] = np.nan
+
+    return PricePanel(names, dates, values)
+
+
+def write_bar_store(panel, root, interval='1d'):
+    """
+    Write a panel into a BarStore directory, one file per symbol.
+
+    Args:
+        panel: PricePanel to write
+        root: Store root, e.g. .cache/synthetic
+        interval: Interval partition the bars belong to
+
+    Returns:
+        BarStore for the root
+    """
+    store = BarStore(root)
+    os.makedirs(os.path.join(root, interval), exist_ok=True)
+    for symbol in panel.symbols:
+        panel.select([symbol]).save(store.path(symbol, interval))
+    return store
+
+
+class TickStream:
+    """
+    Live prices continuing from a set of last closes as a random walk.
+
+    Every tick moves all prices at once; quotes catch up on the ticks
+    elapsed since the last call, so the stream runs at wall-clock speed
+    without a background thread.
+    """
+
+    def __init__(self, symbols, prices, volatility=0.5, tick_interval=1.0, seed=0, clock=time.monotonic,
+                 volumes=None):
+        """
+        Initialize the stream.
+
+        Args:
+            symbols: Symbols to quote
+            prices: Starting price per symbol
+            volatility: Annualised volatility
+            tick_interval: Wall-clock seconds per tick
+            seed: Random seed
+            clock: Monotonic clock in seconds
+            volumes: Average session volume per symbol (default: no volume)
+        """
+        self.symbols = list(symbols)
+        self.rows = {symbol: i for i, symbol in enumerate(self.symbols)}
+        prices = np.asarray(prices, dtype=np.float64)
+        self.prices = np.where(np.isnan(prices), 1.0, prices)
+        self.day_high = self.prices.copy()
+        self.day_low = self.prices.copy()
+        volumes = np.zeros(len(self.prices)) if volumes is None else np.asarray(volumes, dtype=np.float64)
+        # Expected volume per tick, so a session's ticks add up to the average
+        self.tick_volume = np.nan_to_num(volumes) * tick_interval / SESSION_SECONDS
+        self.day_volume = np.zeros(len(self.prices))
+        self.volume_rng = np.random.default_rng([seed, 1])  # Separate, so prices don't depend on volumes
+        self.tick_interval = tick_interval
+        self.tick_sigma = volatility * np.sqrt(tick_interval / SESSION_SECONDS / TRADING_DAYS)
+        self.rng = np.random.default_rng(seed)
+        self.clock = clock
+        self.ticks = 0
+        self._last = clock()
+
+    def advance(self, steps=1):
+        """Move every price forward by a number of ticks."""
+        if steps <= 0:
+            return
+        moves = self.tick_sigma * np.sqrt(steps) * self.rng.standard_normal(len(self.prices))
+        self.prices *= np.exp(moves)
+        np.maximum(self.day_high, self.prices, out=self.day_high)
+        np.minimum(self.day_low, self.prices, out=self.day_low)
+        self.day_volume += self.tick_volume * steps * self.volume_rng.lognormal(-0.125, 0.5, len(self.prices))
+        self.ticks += steps
+
+    def catch_up(self):
+        """Apply the ticks elapsed since the last call."""
+        now = self.clock()
+        steps = int((now - self._last) / self.tick_interval)
+        if steps:
+            self._last += steps * self.tick_interval
+            self.advance(steps)
+
+    def quotes(self, symbols):
+        """Current quotes (same shape as MarketDataProvider.quote) for the known symbols."""
+        self.catch_up()
+        timestamp = pd.Timestamp.now(tz='UTC')
+        return {
+            symbol: {
+                'price': float(self.prices[self.rows[symbol]]),
+                'timestamp': timestamp,
+                'day_high': float(self.day_high[self.rows[symbol]]),
+                'day_low': float(self.day_low[self.rows[symbol]]),
+                'volume': float(self.day_volume[self.rows[symbol]])
+            }
+            for symbol in symbols if symbol in self.rows
+        }
+
+    def stream(self, ticks=None, sleep=True):
+        """
+        Yield (timestamp, {symbol: price}) once per tick.
+
+        Args:
+            ticks: Number of ticks (default: forever)
+            sleep: Wait tick_interval between ticks instead of running flat out
+        """
+        emitted = 0
+        while ticks is None or emitted < ticks:
+            if sleep and emitted:
+                time.sleep(self.tick_interval)
+            self.advance()
+            emitted += 1
+            yield pd.Timestamp.now(tz='UTC'), dict(zip(self.symbols, self.prices.tolist()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic OHLCV data")
+    parser.add_argument('--symbols', type=int, default=100, help="Number of symbols")
+    parser.add_argument('--sessions', type=int, default=DEFAULT_SESSIONS, help="Number of sessions")
+    parser.add_argument('--start', help="First session (overrides --sessions)")
+    parser.add_argument('--end', help="Last session (default: today)")
+    parser.add_argument('--interval', default='1d', help="Bar interval: 1d, 1h, 15m, 5m or 1m")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help="Write the panel to this .npz (replay provider format)")
+    parser.add_argument('--bar-store', help="Write the bars into this bar store root")
+    parser.add_argument('--ticks', type=int, help="Print this many ticks as CSV instead of writing bars")
+    parser.add_argument('--tick-interval', type=float, default=1.0, help="Seconds between ticks")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    panel = generate_panel(args.symbols, start=args.start, end=args.end, sessions=args.sessions,
+                           interval=args.interval, seed=args.seed)
+    print(f"Generated {len(panel.symbols)} symbols x {len(panel.dates)} bars "
+          f"({panel.nbytes / 1e6:.1f} MB) in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+    if args.ticks:
+        stream = TickStream(panel.symbols, panel.last_valid('Close'), tick_interval=args.tick_interval,
+                            seed=args.seed + 1)
+        print("timestamp,symbol,price")
+        for timestamp, prices in stream.stream(args.ticks):
+            for symbol, price in prices.items():
+                print(f"{timestamp.isoformat()},{symbol},{price:.4f}")
+        return 0
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+        panel.save(args.out)
+        print(f"Wrote {args.out}", file=sys.stderr)
+    if args.bar_store:
+        write_bar_store(panel, args.bar_store, args.interval)
+        print(f"Wrote {len(panel.symbols)} files to {os.path.join(args.bar_store, args.interval)}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
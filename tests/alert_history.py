@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Alert History Check
+-------------------
+This script records triggered alerts into a temporary directory and checks
+that AlertHistory:
+1. Pages through entries newest first, filtered by symbol and date range
+2. Picks up lines appended by another process to an open month
+3. Archives ended months with their counts, and removes those past retention
+4. Merges alerts appended to an already archived month into its archive
+5. Moves the history kept in old alerts files into the monthly partitions
+
+Run it from the repository root: python tests/alert_history.py
+"""
+
+import sys
+import os
+import json
+import tempfile
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.alert_history import AlertHistory
+from src.services.alert_service import AlertService, history_root
+
+NOW = datetime(2026, 10, 19)
+
+
+def entry(symbol, triggered_at):
+    return {'id': f"{symbol}-{triggered_at}", 'symbol': symbol, 'triggered_at': triggered_at}
+
+
+def ids(entries):
+    return [e['id'] for e in entries]
+
+
+def new_history(root):
+    """History whose sweeps only run when archive() is called."""
+    history = AlertHistory(root, retention=6)
+    history._last_archive = float('inf')
+    return history
+
+
+def main():
+    root = tempfile.mkdtemp()
+    history = new_history(root)
+    months = ['2026-03', '2026-08', '2026-09', '2026-10']
+    entries = [entry('AAA' if day % 3 else 'BBB', f"{month}-{day:02d}T10:00:00")
+               for month in months for day in range(1, 11)]
+    history.append(entries)
+    newest_first = entries[::-1]
+
+    # 1. Paging, symbol and date filters
+    assert history.months() == months
+    assert history.count() == 40 and history.count('BBB') == 12
+    assert ids(history.query(limit=5)) == ids(newest_first[:5])
+    assert ids(history.query(offset=8, limit=5)) == ids(newest_first[8:13])
+    assert ids(history.query('BBB', offset=2, limit=3)) == ids([e for e in newest_first if e['symbol'] == 'BBB'][2:5])
+    september = history.query(start=date(2026, 9, 5), end='2026-10-01')
+    assert ids(september) == ids([e for e in newest_first if '2026-09-05' <= e['triggered_at'] < '2026-10-01'])
+    assert history.count(start=date(2026, 9, 5), end='2026-10-01') == len(september) == 6
+    assert history.query(offset=40) == []
+
+    # 2. Lines written by another process to the open month
+    with open(os.path.join(root, '2026-10.jsonl'), 'a') as f:
+        f.write(json.dumps(entry('CCC', '2026-10-18T09:00:00')) + '\n')
+    assert history.query(limit=1)[0]['symbol'] == 'CCC' and history.symbols() == ['AAA', 'BBB', 'CCC']
+
+    # 3. March is past retention; August and September are compressed
+    assert history.archive(NOW) == 3
+    names = sorted(os.listdir(root))
+    assert names == ['2026-08.counts.json', '2026-08.jsonl.gz', '2026-09.counts.json', '2026-09.jsonl.gz',
+                     '2026-10.jsonl'], names
+    assert history.counts('2026-09') == {'AAA': 7, 'BBB': 3}
+    assert history.count() == 31
+    assert ids(history.query(offset=11, limit=12)) == ids(newest_first[10:22])
+
+    # 4. Late appends to an archived month are merged, not lost
+    late = entry('DDD', '2026-09-30T23:00:00')
+    history.append([late])
+    assert not os.path.exists(os.path.join(root, '2026-09.jsonl'))
+    assert history.counts('2026-09')['DDD'] == 1 and history.count() == 32
+    assert ids(history.query(start='2026-09-30', end='2026-10-01')) == [late['id']]
+    # A live file left next to an archive (e.g. by an older version) is merged by the next sweep
+    stray = entry('EEE', '2026-08-15T12:00:00')
+    with open(os.path.join(root, '2026-08.jsonl'), 'a') as f:
+        f.write(json.dumps(stray) + '\n')
+    assert new_history(root).archive(NOW) == 1
+    reopened = new_history(root)
+    assert reopened.count('EEE') == 1 and reopened.count() == 33
+    assert stray['id'] in ids(reopened.query(start='2026-08-15', end='2026-08-16'))
+
+    # 5. History kept in an old alerts file moves to the partitions
+    alerts_file = os.path.join(tempfile.mkdtemp(), 'alerts.json')
+    with open(alerts_file, 'w') as f:
+        json.dump({'active': [], 'history': [entry('OLD', '2026-10-01T08:00:00'),
+                                             dict(entry('OLD', None), created_at='2026-09-01T08:00:00')]}, f)
+    service = AlertService(alerts_file)
+    with open(alerts_file) as f:
+        assert 'history' not in json.load(f)
+    assert service.count_alert_history() == 2 and service.get_history_symbols() == ['OLD']
+    assert os.path.isdir(history_root(alerts_file))
+
+    print("✅ Alert history paging, archival and late append checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Data Version Check
+------------------
+This script checks the data version cache keys are built from, per market
+calendar:
+1. Stocks keep the last session's version through a weekend and a holiday
+2. During the NYSE session the version advances every refresh interval
+3. Crypto pairs trade 24/7, so their version advances on a Saturday
+4. A watchlist mixing both advances whenever either market has new bars
+
+Run it from the repository root: python tests/data_version.py
+"""
+
+import sys
+import os
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.cache import data_version, INTRADAY_REFRESH_MINUTES
+
+SATURDAY = pd.Timestamp('2026-02-14 15:00', tz='UTC')
+HOUR = pd.Timedelta(hours=1)
+
+
+def main():
+    # 1. Friday's session until Tuesday's opens (Monday 2026-02-16 is Presidents' Day)
+    assert data_version(SATURDAY) == data_version(SATURDAY, symbols=['AAPL']) == '2026-02-13'
+    assert data_version(SATURDAY + 48 * HOUR, symbols=['AAPL']) == '2026-02-13'
+    assert data_version(pd.Timestamp('2026-02-17 15:00', tz='UTC'), symbols=['AAPL']).startswith('2026-02-17T')
+
+    # 2. Intraday refreshes while the market is open
+    open_at = pd.Timestamp('2026-02-13 15:00', tz='UTC')
+    later = open_at + pd.Timedelta(minutes=INTRADAY_REFRESH_MINUTES)
+    assert data_version(open_at, symbols=['AAPL']) != data_version(later, symbols=['AAPL'])
+    assert data_version(open_at, '1m', ['AAPL']) != data_version(open_at + pd.Timedelta(minutes=1), '1m', ['AAPL'])
+
+    # 3. Crypto moves on over the weekend
+    saturday = data_version(SATURDAY, symbols=['BTC-USD'])
+    assert saturday.startswith('2026-02-14T'), saturday
+    assert data_version(SATURDAY + HOUR, symbols=['BTC-USD']) != saturday
+    assert data_version(SATURDAY + 24 * HOUR, symbols=['BTC-USD']).startswith('2026-02-15T')
+
+    # 4. Mixed watchlists follow both calendars
+    mixed = ['AAPL', 'BTC-USD', 'MSFT']
+    assert data_version(SATURDAY + HOUR, symbols=mixed) != data_version(SATURDAY, symbols=mixed)
+    assert data_version(SATURDAY, symbols=mixed) == data_version(SATURDAY, symbols=mixed[::-1])
+
+    print("✅ Data version checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+GPT Response Cache Check
+------------------------
+This script starts a local fake OpenAI-compatible server and checks that
+GPTService:
+1. Returns the completion for a new prompt
+2. Serves a repeated (model, prompt, snapshot date) from the cache
+3. Streams tokens as they arrive and caches the streamed text
+4. Persists the cache to disk
+5. Runs bulk analysis concurrently under a concurrency cap, backing off on 429s
+
+Run it from the repository root: python tests/gpt_cache.py
+"""
+
+import sys
+import os
+import json
+import time
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.gpt_service import GPTService, ResponseCache
+
+ANSWER = "### Trend\n- Bias: bullish above EMA20\n- Risk: stop below 10D low"
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Minimal /chat/completions endpoint, streamed or not."""
+
+    request_count = 0
+    rate_limited = 0  # Number of upcoming requests to answer with 429
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        words = ANSWER.split(' ')
+        with FakeOpenAIHandler.lock:
+            FakeOpenAIHandler.request_count += 1
+            if FakeOpenAIHandler.rate_limited > 0:
+                FakeOpenAIHandler.rate_limited -= 1
+                limited = True
+            else:
+                limited = False
+                FakeOpenAIHandler.in_flight += 1
+                FakeOpenAIHandler.max_in_flight = max(FakeOpenAIHandler.max_in_flight, FakeOpenAIHandler.in_flight)
+
+        if limited:
+            payload = json.dumps({"error": {"message": "Rate limit reached", "type": "rate_limit"}}).encode()
+            self.send_response(429)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Retry-After', '0.05')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        try:
+            self._respond(body, words)
+        finally:
+            with FakeOpenAIHandler.lock:
+                FakeOpenAIHandler.in_flight -= 1
+
+    def _respond(self, body, words):
+        if body.get('stream'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.end_headers()
+            for i, word in enumerate(words):
+                chunk = {
+                    "id": "fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                    "model": body['model'],
+                    "choices": [{"index": 0, "delta": {"content": word if i == 0 else f" {word}"}, "finish_reason": None}]
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+                time.sleep(0.01)
+            self.wfile.write(b"data: [DONE]\n\n")
+            return
+
+        response = {
+            "id": "fake", "object": "chat.completion", "created": int(time.time()), "model": body['model'],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": ANSWER}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": len(words), "total_tokens": len(words) + 1}
+        }
+        payload = json.dumps(response).encode()
+        time.sleep(0.05)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def main():
+    """Run the checks against a fake server on a free local port."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeOpenAIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    cache_file = os.path.join(tempfile.mkdtemp(), 'gpt_responses.json')
+    service = GPTService(api_key="test", base_url=base_url, cache=ResponseCache(cache_file))
+
+    # 1. New prompt goes to the server
+    assert service.get_stock_analysis("Analyze TSLA", "2025-01-02") == ANSWER
+    assert FakeOpenAIHandler.request_count == 1
+
+    # 2. Same prompt and snapshot date is served from the cache
+    assert service.get_stock_analysis("Analyze TSLA", "2025-01-02") == ANSWER
+    assert FakeOpenAIHandler.request_count == 1
+
+    # 3. Streaming yields several chunks, then the streamed text is cached
+    chunks = list(service.stream_stock_analysis("Analyze TSLA", "2025-01-03"))
+    assert len(chunks) > 1 and "".join(chunks) == ANSWER
+    assert list(service.stream_stock_analysis("Analyze TSLA", "2025-01-03")) == [ANSWER]
+    assert FakeOpenAIHandler.request_count == 2
+
+    # 4. A new service reads the persisted cache
+    reloaded = GPTService(api_key="test", base_url=base_url, cache=ResponseCache(cache_file))
+    assert reloaded.get_stock_analysis("Analyze TSLA", "2025-01-02") == ANSWER
+    assert FakeOpenAIHandler.request_count == 2
+
+    # 5. Bulk analysis: 1 cached, 8 new with 2 rate-limited responses on the way
+    FakeOpenAIHandler.rate_limited = 2
+    prompts = {f"SYM{i}": (f"Analyze SYM{i}", "2025-01-02") for i in range(8)}
+    prompts["TSLA"] = ("Analyze TSLA", "2025-01-02")
+    results = reloaded.analyze_many(prompts, max_concurrency=3)
+    assert list(results) == list(prompts)
+    assert all(text == ANSWER for text in results.values())
+    assert FakeOpenAIHandler.request_count == 2 + 8 + 2
+    assert FakeOpenAIHandler.max_in_flight <= 3
+    reloaded.analyze_many(prompts)
+    assert FakeOpenAIHandler.request_count == 12
+
+    server.shutdown()
+    print("✅ GPT response cache, streaming and bulk analysis checks passed")
+
+
+if __name__ == "__main__":
+    main()
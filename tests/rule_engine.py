@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Alert Rule Engine Check
+-----------------------
+This script evaluates alerts against hand-built bars and quotes and checks
+that RuleEngine:
+1. Evaluates price-only alerts without fetching history (no state rows yet)
+2. Fires indicator rules (percent move, EMA cross, breakout, RSI, volume)
+3. Fires intraday rules from the current session's bars, and not while the market is closed
+4. Holds recurring alerts within their hysteresis band, cooldown and daily budget
+
+Run it from the repository root: python tests/rule_engine.py
+"""
+
+import sys
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.alert_service import AlertService
+from src.services.rule_engine import RuleEngine, RATE_WINDOW
+from src.utils.price_panel import PricePanel, PANEL_FIELDS
+
+NOW = pd.Timestamp('2026-02-10 16:00', tz='UTC')  # Tuesday, 11:00 in New York
+
+
+def flat_panel(symbols, dates, price=100.0, volume=1000.0):
+    """Bars with every price at one level."""
+    values = np.full((len(PANEL_FIELDS), len(symbols), len(dates)), price, dtype=np.float32)
+    values[PANEL_FIELDS.index('Volume')] = volume
+    return PricePanel(list(symbols), dates, values)
+
+
+def daily_history(symbols):
+    """Sixty flat sessions ending the day before NOW."""
+    return flat_panel(symbols, pd.bdate_range(end='2026-02-09', periods=60, tz='America/New_York'))
+
+
+def intraday_bars(symbols):
+    """Five-minute bars of NOW's session opening at 100."""
+    return flat_panel(symbols, pd.date_range('2026-02-10 09:30', '2026-02-10 11:00', freq='5min',
+                                              tz='America/New_York'))
+
+
+def alert(symbol, alert_type, value=None, **fields):
+    """Alert dict as AlertService stores it."""
+    price_threshold = value if alert_type in ('above', 'below') else None
+    return dict({'id': f"{symbol}-{alert_type}", 'symbol': symbol, 'alert_type': alert_type,
+                 'price_threshold': price_threshold, 'value': None if price_threshold else value}, **fields)
+
+
+def fired(triggered):
+    return sorted(a['id'] for a, _, _ in triggered)
+
+
+def check_price_only():
+    def no_history(symbols):
+        raise AssertionError("price-only alerts must not fetch history")
+
+    engine = RuleEngine(no_history)
+    alerts = [alert('AAA', 'above', 100.0), alert('BBB', 'below', 50.0)]
+    triggered, rearmed, held = engine.evaluate(alerts, {'AAA': {'price': 101.0}, 'BBB': {'price': 60.0}}, NOW)
+    assert fired(triggered) == ['AAA-above'] and not rearmed and held == 0
+    assert "above your threshold of $100.00" in triggered[0][2]
+    # Quotes missing for a symbol don't trigger anything
+    assert engine.evaluate(alerts, {}, NOW) == ([], [], 0)
+
+
+def check_indicators():
+    engine = RuleEngine(daily_history)
+    alerts = [alert('AAA', rule_type) for rule_type in ('ema_cross_up', 'ema_cross_down', 'breakout_20d',
+                                                        'breakdown_10d')]
+    alerts += [alert('AAA', 'pct_up', 5.0), alert('AAA', 'pct_down', 5.0), alert('AAA', 'rsi_above', 80.0),
+               alert('AAA', 'rsi_below', 50.0), alert('AAA', 'volume_spike', 2.0),
+               # Price-only alert of a symbol without state, next to symbols with state
+               alert('CCC', 'above', 10.0)]
+    triggered, _, _ = engine.evaluate(alerts, {'AAA': {'price': 110.0, 'volume': 3000.0},
+                                               'CCC': {'price': 11.0}}, NOW)
+    assert fired(triggered) == ['AAA-breakout_20d', 'AAA-ema_cross_up', 'AAA-pct_up', 'AAA-rsi_above',
+                                'AAA-volume_spike', 'CCC-above'], fired(triggered)
+    messages = {a['id']: message for a, _, message in triggered}
+    assert "+10.00% from the previous close" in messages['AAA-pct_up']
+    assert "3.0x its 20D average" in messages['AAA-volume_spike']
+
+    # A cross fires once: the spread stays positive at the next check
+    triggered, _, _ = engine.evaluate(alerts, {'AAA': {'price': 111.0}, 'CCC': {'price': 11.0}}, NOW)
+    assert 'AAA-ema_cross_up' not in fired(triggered)
+
+
+def check_intraday():
+    engine = RuleEngine(daily_history, intraday=intraday_bars)
+    alerts = [alert('AAA', 'intraday_up', 2.0), alert('AAA', 'intraday_down', 2.0),
+              alert('BBB', 'intraday_down', 2.0)]
+    quotes = {'AAA': {'price': 103.0}, 'BBB': {'price': 97.0}}
+    triggered, _, _ = engine.evaluate(alerts, quotes, NOW)
+    assert fired(triggered) == ['AAA-intraday_up', 'BBB-intraday_down'], fired(triggered)
+    assert "+3.00% within the last hour" in dict((a['id'], m) for a, _, m in triggered)['AAA-intraday_up']
+
+    # Saturday: no session, no reference price
+    triggered, _, _ = RuleEngine(daily_history, intraday=intraday_bars).evaluate(
+        alerts, quotes, pd.Timestamp('2026-02-14 16:00', tz='UTC'))
+    assert triggered == []
+
+
+def check_recurring():
+    directory = tempfile.mkdtemp()
+    service = AlertService(os.path.join(directory, 'alerts.json'))
+    created = service.add_alert('AAA', 100.0, 'above', recurring=True, hysteresis=1.0, cooldown=600,
+                                max_triggers=2)
+    engine = RuleEngine(daily_history)
+    now = pd.Timestamp.now(tz='UTC')
+
+    def check(price, seconds):
+        triggered, rearmed, held = engine.evaluate(service.get_active_alerts(), {'AAA': {'price': price}},
+                                                   now + pd.Timedelta(seconds=seconds))
+        service.mark_alerts_triggered({a['id']: p for a, p, _ in triggered}, rearmed)
+        return len(triggered), len(rearmed), held
+
+    assert check(101.0, 0) == (1, 0, 0)
+    # Disarmed: stays quiet above the level and inside the 1% band
+    assert check(102.0, 10) == (0, 0, 0)
+    assert check(99.5, 20) == (0, 0, 0)
+    assert check(98.5, 30) == (0, 1, 0)
+    # Re-armed, but the 10 minute cooldown isn't over
+    assert check(101.0, 40) == (0, 0, 1)
+    assert check(101.0, 700) == (1, 0, 0)
+    assert check(98.5, 710) == (0, 1, 0)
+    # Two triggers used the daily budget
+    assert check(101.0, 1400) == (0, 0, 1)
+    assert check(101.0, RATE_WINDOW + 10) == (1, 0, 0)
+
+    stored = service.get_active_alerts()[0]
+    assert stored['id'] == created['id'] and stored['trigger_count'] == 3
+    assert service.count_alert_history() == 3
+
+
+def main():
+    check_price_only()
+    check_indicators()
+    check_intraday()
+    check_recurring()
+    print("✅ Alert rule engine checks passed")
+
+
+if __name__ == "__main__":
+    main()
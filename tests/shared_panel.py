@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Shared Price Panel Check
+------------------------
+This script publishes panels into a temporary directory and checks that
+the shared panel files:
+1. Read back the published symbols, dates and values
+2. Keep their version when an equal panel is republished
+3. Keep a snapshot's views intact for one publish, and copies for good,
+   with is_intact() turning False as soon as the second publish starts writing
+4. Move to a new file when the panel outgrows its slots, retiring the old one
+5. Are removed when evicted or when the writer closes
+
+Run it from the repository root: python tests/shared_panel.py
+"""
+
+import sys
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.price_panel import PricePanel, PANEL_FIELDS
+from src.utils.shared_panel import SharedPanelWriter, SharedPanelReader, DATE_HEADROOM, H_RETIRED
+
+
+def make_panel(symbols, sessions, level=100.0):
+    """Daily bars of distinct values, offset by level."""
+    dates = pd.bdate_range('2026-01-02', periods=sessions, tz='America/New_York')
+    values = np.arange(len(PANEL_FIELDS) * len(symbols) * sessions, dtype=np.float32)
+    values = values.reshape(len(PANEL_FIELDS), len(symbols), sessions) + level
+    return PricePanel(list(symbols), dates, values)
+
+
+def same(a, b):
+    return (a.symbols == b.symbols and a.dates.equals(b.dates)
+            and np.array_equal(a.values, b.values, equal_nan=True))
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    writer = SharedPanelWriter(directory, max_segments=2)
+
+    # 1. Published panel reads back unchanged, timezone included
+    panel = make_panel(['AAA', 'BBBB'], 20)
+    path, version = writer.publish('watchlist', panel)
+    reader = SharedPanelReader(path)
+    read, read_version = reader.read()
+    assert same(read, panel) and read_version == version
+    assert str(read.dates.tz) == 'America/New_York'
+
+    # 2. Republishing equal data keeps the version, so caches keyed by it stay valid
+    assert writer.publish('watchlist', make_panel(['AAA', 'BBBB'], 20)) == (path, version)
+
+    # 3. Views hold for one publish, copies for any number
+    view, view_version = reader.read()
+    copy, _ = reader.read(copy=True)
+    # is_intact() as seen in the middle of each publish's fill
+    during_fill = []
+    fill = writer._fill
+
+    def checked_fill(*args):
+        during_fill.append(reader.is_intact(view_version))
+        fill(*args)
+
+    writer._fill = checked_fill
+    writer.publish('watchlist', make_panel(['AAA', 'BBBB'], 21, level=200.0))
+    assert reader.is_intact(view_version) and same(view, panel)
+    writer.publish('watchlist', make_panel(['AAA', 'BBBB'], 21, level=300.0))
+    writer._fill = fill
+    assert during_fill == [True, False], during_fill
+    assert not reader.is_intact(view_version) and not same(view, panel)
+    assert same(copy, panel)
+    assert same(reader.read()[0], make_panel(['AAA', 'BBBB'], 21, level=300.0))
+
+    # 4. More dates than the slots hold: new file at the same path, the old mapping retired
+    old_data, old_layout = writer._segments['watchlist']
+    grown = make_panel(['AAA', 'BBBB'], 21 + DATE_HEADROOM + 1)
+    path, grown_version = writer.publish('watchlist', grown)
+    assert old_layout.header(old_data)[H_RETIRED] == 1
+    read, read_version = reader.read()
+    assert same(read, grown) and read_version == grown_version > version
+    # Other symbols don't fit either
+    other = make_panel(['CCC'], 5)
+    writer.publish('watchlist', other)
+    # The retired file is never written again, so its snapshots stay intact
+    assert reader.is_intact(read_version) and same(read, grown)
+    assert same(reader.read()[0], other)
+
+    # 5. Least recently published files are evicted, the rest removed on close
+    paths = [writer.publish(name, make_panel(['AAA'], 5))[0] for name in ('a', 'b')]
+    assert not os.path.exists(path) and all(os.path.exists(p) for p in paths)
+    writer.close()
+    assert not any(os.path.exists(p) for p in paths)
+    try:
+        SharedPanelReader(paths[0]).read()
+    except OSError:
+        pass
+    else:
+        raise AssertionError("reading a removed panel must raise OSError")
+
+    print("✅ Shared panel publish, read and retirement checks passed")
+
+
+if __name__ == "__main__":
+    main()
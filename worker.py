@@ -0,0 +1,49 @@
+"""
+Standalone worker process for the data layer, price monitor and Oracle scans.
+
+Start it next to the app and point the app at its socket:
+    python worker.py --socket .cache/worker.sock
+    MBT_WORKER_SOCKET=.cache/worker.sock streamlit run app.py
+
+The app then fetches, renders charts and runs Oracle scans through the
+worker, and does not start its own price monitor. If the worker stops,
+the app falls back to doing the work in-process.
+"""
+import os
+import sys
+import signal
+import logging
+import argparse
+from src.services.worker_client import WORKER_SOCKET_ENV, DEFAULT_SOCKET
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Data/monitor worker for the Streamlit app")
+    parser.add_argument('--socket', default=os.environ.get(WORKER_SOCKET_ENV, DEFAULT_SOCKET),
+                        help="Unix socket to listen on")
+    parser.add_argument('--chart-processes', type=int, help="Processes rendering charts (0: none)")
+    parser.add_argument('--check-interval', type=int, default=300, help="Seconds between alert checks")
+    parser.add_argument('--no-monitor', action='store_true', help="Don't run the price monitor")
+    args = parser.parse_args()
+
+    from src.services.worker_service import WorkerService, CHART_PROCESSES
+    worker = WorkerService(
+        args.socket,
+        chart_processes=CHART_PROCESSES if args.chart_processes is None else args.chart_processes,
+        monitor=not args.no_monitor,
+        check_interval=args.check_interval
+    )
+
+    def shutdown(signum, frame):
+        logging.getLogger('worker').info(f"Stopping on signal {signum}")
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    print(f"Worker {os.getpid()} listening on {args.socket}", flush=True)
+    worker.serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())